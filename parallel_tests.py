@@ -0,0 +1,269 @@
+"""
+Параллельный запуск тестов ya_news и ya_note для run_tests.sh --parallel.
+
+Проекты тестируются одновременно, а тесты каждого делятся между
+процессами pytest. Базу с миграциями для проекта один раз строит
+отдельный процесс, и каждый процесс тестов получает её копию: файл
+или базу SQLite в памяти, как в настройках проекта (--db auto).
+Проект, которому настройки задают тестовую базу в файле (TEST NAME,
+как ya_note: его тесты пишут из нескольких потоков и проверяют WAL),
+получает файл и при --db memory.
+Вывод pytest идёт в stderr, в stdout — имя первого проекта с упавшими
+тестами, код возврата — код pytest этого проекта.
+
+Модуль же служит плагином pytest в процессах тестов (-p parallel_tests).
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ElementTree
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+BASE_DIR = Path(__file__).resolve().parent
+PROJECTS = (
+    ('ya_news', 'yanews.settings'),
+    ('ya_note', 'yanote.settings'),
+)
+SHARD_ENV = 'TEST_SHARD'
+TEMPLATE_ENV = 'TEST_DB_TEMPLATE'
+DB_MODE_ENV = 'TEST_DB_MODE'
+WORKER_DB_ENV = 'TEST_DB_WORKER'
+NO_TESTS_COLLECTED = 5
+
+ProjectResult = namedtuple(
+    'ProjectResult', ('name', 'status', 'outputs', 'counts', 'elapsed')
+)
+
+
+# Плагин pytest.
+
+def shard_items(items, index, total):
+    """
+    Тесты процесса index из total.
+
+    Методы одного класса остаются в одном процессе, чтобы не повторять
+    setUpTestData. Группы раскладываются от больших к меньшим в самый
+    свободный процесс; все процессы собирают одни и те же тесты,
+    поэтому и раскладка у них одна.
+    """
+    groups = {}
+    for item in items:
+        key = item.parent.nodeid if item.cls else item.nodeid
+        groups.setdefault(key, []).append(item)
+    loads = [0] * total
+    selected = set()
+    for key in sorted(groups, key=lambda key: (-len(groups[key]), key)):
+        worker = loads.index(min(loads))
+        loads[worker] += len(groups[key])
+        if worker == index:
+            selected.update(id(item) for item in groups[key])
+    return [item for item in items if id(item) in selected]
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_collection_modifyitems(config, items):
+    if not os.environ.get(SHARD_ENV):
+        return
+    index, total = map(int, os.environ[SHARD_ENV].split('/'))
+    config.parallel_collected = len(items)
+    selected = shard_items(items, index, total)
+    deselected = [item for item in items if item not in selected]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+    items[:] = selected
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Процессу без тестов нечего запускать, это не ошибка."""
+    if (
+        exitstatus == NO_TESTS_COLLECTED
+        and getattr(session.config, 'parallel_collected', 0)
+    ):
+        session.exitstatus = 0
+
+
+def pytest_configure(config):
+    # Регистрируется позже pytest-django и подменяет его django_db_setup.
+    if os.environ.get(TEMPLATE_ENV):
+        config.pluginmanager.register(TemplateDatabase(), 'template_db')
+
+
+class TemplateDatabase:
+    """Тестовая база процесса — копия готовой базы с миграциями."""
+
+    @pytest.fixture(scope='session')
+    def django_db_setup(self, django_db_blocker):
+        from django.db import connection
+
+        template = os.environ[TEMPLATE_ENV]
+        worker_db = os.environ[WORKER_DB_ENV]
+        in_memory = os.environ[DB_MODE_ENV] == 'memory'
+        with django_db_blocker.unblock():
+            connection.close()
+            if in_memory:
+                connection.settings_dict['NAME'] = (
+                    f'file:{Path(worker_db).stem}?mode=memory&cache=shared'
+                )
+                connection.ensure_connection()
+                source = sqlite3.connect(template)
+                try:
+                    source.backup(connection.connection)
+                finally:
+                    source.close()
+            else:
+                shutil.copyfile(template, worker_db)
+                connection.settings_dict['NAME'] = worker_db
+        yield
+        with django_db_blocker.unblock():
+            connection.close()
+
+
+# Запуск.
+
+def build_template(path):
+    """Строит базу с миграциями и печатает, где держать копии тестам."""
+    import django
+    django.setup()
+    from django.db import connection
+
+    if connection.vendor != 'sqlite':
+        raise SystemExit('Параллельный запуск поддерживает только SQLite.')
+    mode = 'file' if connection.settings_dict['TEST']['NAME'] else 'memory'
+    connection.settings_dict['TEST']['NAME'] = path
+    connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    connection.close()
+    print(mode)
+
+
+def junit_counts(path):
+    counts = dict.fromkeys(('tests', 'failures', 'errors', 'skipped'), 0)
+    if not path.exists():
+        return counts
+    root = ElementTree.parse(path).getroot()
+    suites = [root] if root.tag == 'testsuite' else root.iter('testsuite')
+    for suite in suites:
+        for key in counts:
+            counts[key] += int(suite.get(key, 0))
+    return counts
+
+
+def run_project(name, settings_module, workers, db_mode, directory):
+    started = time.monotonic()
+    project_dir = BASE_DIR / name
+    env = {
+        **os.environ,
+        'DJANGO_SETTINGS_MODULE': settings_module,
+        'PYTHONPATH': os.pathsep.join(
+            filter(None, (str(BASE_DIR), os.environ.get('PYTHONPATH')))
+        ),
+    }
+    template = Path(directory) / f'{name}-template.sqlite3'
+    built = subprocess.run(
+        [sys.executable, '-m', 'parallel_tests',
+         '--build-template', str(template)],
+        cwd=project_dir, env=env, capture_output=True, text=True,
+    )
+    if built.returncode:
+        return ProjectResult(
+            name, built.returncode, [built.stderr], None,
+            time.monotonic() - started,
+        )
+    settings_mode = built.stdout.split()[-1]
+    if db_mode == 'auto' or settings_mode == 'file':
+        db_mode = settings_mode
+    processes = []
+    for index in range(workers):
+        log = open(Path(directory) / f'{name}-{index}.log', 'w+')
+        junit = Path(directory) / f'{name}-{index}.xml'
+        worker_env = {
+            **env,
+            SHARD_ENV: f'{index}/{workers}',
+            TEMPLATE_ENV: str(template),
+            DB_MODE_ENV: db_mode,
+            WORKER_DB_ENV: str(Path(directory) / f'{name}-{index}.sqlite3'),
+        }
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'pytest', '--tb=line',
+             '-p', 'parallel_tests', f'--junitxml={junit}'],
+            cwd=project_dir, env=worker_env,
+            stdout=log, stderr=subprocess.STDOUT,
+        )
+        processes.append((process, log, junit))
+    statuses, outputs = [], []
+    counts = dict.fromkeys(('tests', 'failures', 'errors', 'skipped'), 0)
+    for process, log, junit in processes:
+        statuses.append(process.wait())
+        log.seek(0)
+        outputs.append(log.read())
+        log.close()
+        for key, value in junit_counts(junit).items():
+            counts[key] += value
+    return ProjectResult(
+        name, max(statuses), outputs, counts, time.monotonic() - started
+    )
+
+
+def report(result, workers):
+    for output in result.outputs:
+        sys.stderr.write(output)
+    if result.counts is None:
+        summary = 'не удалось подготовить тестовую базу'
+    else:
+        counts = result.counts
+        failed = counts['failures'] + counts['errors']
+        passed = counts['tests'] - failed - counts['skipped']
+        summary = (
+            f'пройдено {passed}, упало {failed}, '
+            f'пропущено {counts["skipped"]}'
+        )
+    sys.stderr.write(
+        f'\n{result.name}: {summary} за {result.elapsed:.1f} с '
+        f'в {workers} процессах\n\n'
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--workers', type=int, default=os.cpu_count(),
+        help='процессов pytest на каждый проект',
+    )
+    parser.add_argument(
+        '--db', choices=('auto', 'file', 'memory'), default='auto',
+        help='где держать базы процессов: как в настройках, файл или '
+        'память (кроме проектов, которым нужен файл)',
+    )
+    parser.add_argument('--build-template', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.build_template:
+        return build_template(args.build_template)
+    with tempfile.TemporaryDirectory() as directory:
+        with ThreadPoolExecutor(len(PROJECTS)) as pool:
+            results = list(pool.map(
+                lambda project: run_project(
+                    *project, args.workers, args.db, directory
+                ),
+                PROJECTS,
+            ))
+    for result in results:
+        report(result, args.workers)
+    for result in results:
+        if result.status:
+            print(result.name)
+            return result.status
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
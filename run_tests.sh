@@ -14,6 +14,12 @@ print_message () {
     echo -e "${left_filler_len// /$symbol}$message${right_filler_len// /$symbol}\033[0m"
 }
 
+# С --parallel [N] проекты тестируются одновременно, каждый в N процессах
+# (см. parallel_tests.py); сообщения и коды возврата те же.
+if [[ "$1" == "--parallel" ]]; then parallel_args=(--workers "${2:-$(nproc)}"); fi
+news_failed=" При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта "
+note_failed=" При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта "
+
 
 if python -m flake8 --config=setup.cfg 1>&2;
 then
@@ -21,6 +27,15 @@ then
     echo $LF 1>&2
     if python structure_test.py
     then
+        if [[ -n "$parallel_args" ]]
+        then
+            failed=$(python parallel_tests.py "${parallel_args[@]}")
+            status=$?
+            if [[ "$failed" == "ya_news" ]]; then print_message "$news_failed" "=" 1; fi
+            if [[ "$failed" == "ya_note" ]]; then print_message "$note_failed" "=" 1; fi
+            if [[ $status -ne 0 ]]; then echo \`\`\` 1>&2; fi
+            exit $status
+        fi
         cd ya_news
         export DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:="yanews.settings"}"
         if pytest --tb=line 1>&2;
@@ -33,13 +48,13 @@ then
                 exit 0
             else
                 status=$?
-                print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
+                print_message "$note_failed" "=" 1
                 echo \`\`\` 1>&2
                 exit $status
             fi
         else
             status=$?
-            print_message " При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта " "=" 1
+            print_message "$news_failed" "=" 1
             echo \`\`\` 1>&2
             exit $status
         fi
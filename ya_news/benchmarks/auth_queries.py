@@ -0,0 +1,88 @@
+"""
+SQL-запросы авторизованного пользователя на странице новости.
+
+Каждый профиль сессий запускается отдельным процессом с переменными
+окружения профиля (SESSION_PROFILE, USER_CACHE_TIMEOUT), пользователь
+запрашивает news:detail, и выводится среднее число запросов к базе
+и время на запрос после первого, прогревающего кэши.
+Запуск из каталога ya_news:
+
+    python -m benchmarks.auth_queries [число запросов]
+"""
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.utils import setup_django, test_database
+
+PROFILES = {
+    'db, без кэша пользователей': {
+        'SESSION_PROFILE': 'db', 'USER_CACHE_TIMEOUT': '0',
+    },
+    'db': {'SESSION_PROFILE': 'db'},
+    'cached_db': {'SESSION_PROFILE': 'cached_db'},
+    'signed_cookies': {'SESSION_PROFILE': 'signed_cookies'},
+}
+DEFAULT_REQUESTS = 200
+COMMENTS = 20
+
+
+def run_profile(requests):
+    """Замер в текущем процессе; итог выводится строкой JSON."""
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import (
+        CaptureQueriesContext, setup_test_environment
+    )
+    from django.urls import reverse
+
+    from news.factories import create_comments, create_news, create_users
+
+    setup_test_environment(debug=False)
+    settings.QUERY_BUDGET_MODE = None
+    with test_database():
+        user, = create_users(1)
+        news, = create_news(1)
+        create_comments([news], [user], COMMENTS)
+        url = reverse('news:detail', args=(news.pk,))
+        client = Client()
+        client.force_login(user)
+        client.get(url)
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(requests):
+                client.get(url)
+        elapsed = time.perf_counter() - started
+    print(json.dumps({
+        'queries': len(queries) / requests,
+        'ms': elapsed * 1000 / requests,
+    }))
+
+
+def main():
+    if sys.argv[1:2] == ['--profile']:
+        return run_profile(int(sys.argv[2]))
+    requests = sys.argv[1] if len(sys.argv) > 1 else str(DEFAULT_REQUESTS)
+    for name, environment in PROFILES.items():
+        completed = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.auth_queries',
+             '--profile', requests],
+            env={**os.environ, **environment},
+            capture_output=True, text=True,
+        )
+        if completed.returncode:
+            print(f'{name}: ошибка\n{completed.stderr}')
+            continue
+        result = json.loads(completed.stdout.splitlines()[-1])
+        print(
+            f'{name}: {result["queries"]:.1f} SQL-запроса на запрос, '
+            f'{result["ms"]:.2f} мс'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Скорость фабрик news.factories на больших наборах данных.
+
+Во временной базе создаются пользователи, новости и по несколько
+комментариев к каждой новости; для каждой модели выводятся число
+записей, число SQL-запросов и время. Запуск из каталога ya_news:
+
+    python -m benchmarks.datasets [число комментариев]
+"""
+import sys
+import time
+
+from benchmarks.utils import setup_django, test_database
+
+DEFAULT_COMMENTS = 100_000
+COMMENTS_PER_NEWS = 10
+USERS = 1000
+
+
+def measure(title, action):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    started = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        rows = action()
+    elapsed = time.perf_counter() - started
+    print(
+        f'{title}: записей {len(rows)}, запросов {len(queries)}, '
+        f'время {elapsed:.2f} с'
+    )
+    return rows
+
+
+def main():
+    comments = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COMMENTS
+    setup_django()
+    from django.test.utils import setup_test_environment
+
+    from news.factories import create_comments, create_news, create_users
+
+    setup_test_environment()
+    with test_database():
+        users = measure('пользователи', lambda: create_users(USERS))
+        news = measure('новости', lambda: create_news(
+            max(comments // COMMENTS_PER_NEWS, 1)
+        ))
+        measure('комментарии', lambda: create_comments(
+            news, users, COMMENTS_PER_NEWS
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Нагрузочный тест ленты новостей под разными профилями базы.
+
+Каждый профиль запускается отдельным процессом с переменными
+окружения профиля: читатели в потоках запрашивают news:home, пока
+писатели добавляют комментарии, и выводится число запросов в секунду.
+Читатели авторизованы: анонимам лента отдаётся из кэша страниц
+и базу почти не затрагивает.
+Профиль postgresql запускается, только если задана POSTGRES_DB
+(база на локальном сервере, см. DATABASES в настройках).
+Запуск из каталога ya_news:
+
+    python -m benchmarks.load_test [секунд на профиль]
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.utils import setup_django, test_database
+
+PROFILES = {
+    'sqlite': {'DB_ENGINE': 'sqlite', 'SQLITE_TUNING': '0'},
+    'sqlite-tuned': {'DB_ENGINE': 'sqlite', 'SQLITE_TUNING': '1'},
+    'postgresql': {'DB_ENGINE': 'postgresql'},
+}
+DEFAULT_SECONDS = 10
+READERS = 8
+WRITERS = 2
+NEWS = 500
+SQLITE_TEST_DB = Path(__file__).resolve().parent / 'load_test.sqlite3'
+
+
+def reader(url, user, deadline, results):
+    from django.db import connection
+    from django.test import Client
+
+    client = Client()
+    client.force_login(user)
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            response = client.get(url)
+        except Exception:
+            errors += 1
+            continue
+        if response.status_code == 200:
+            done += 1
+        else:
+            errors += 1
+    # Тестовый клиент не закрывает соединения после запроса.
+    connection.close()
+    results.append((done, errors))
+
+
+def writer(user, news, deadline, results):
+    from django.db import connection
+
+    from news.models import Comment
+
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            Comment.objects.create(news=news, author=user, text='Нагрузка')
+        except Exception:
+            errors += 1
+        else:
+            done += 1
+    connection.close()
+    results.append((done, errors))
+
+
+def run_threads(target, count, *args):
+    results = []
+    threads = [
+        threading.Thread(target=target, args=(*args, results))
+        for _ in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def run_profile(seconds):
+    """Замер в текущем процессе; итог выводится строкой JSON."""
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+
+    from news.factories import create_news, create_users
+
+    setup_test_environment(debug=False)
+    # Как в боевом окружении: без учёта запросов в отладочном режиме.
+    settings.QUERY_BUDGET_MODE = None
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = str(SQLITE_TEST_DB)
+    with test_database():
+        reader_user, writer_user = create_users(2)
+        news = create_news(NEWS)[0]
+        deadline = time.monotonic() + seconds
+        writes = []
+        writers = threading.Thread(target=lambda: writes.extend(
+            run_threads(writer, WRITERS, writer_user, news, deadline)
+        ))
+        writers.start()
+        reads = run_threads(
+            reader, READERS, reverse('news:home'), reader_user, deadline
+        )
+        writers.join()
+        connection.close()
+    print(json.dumps({
+        'reads': sum(done for done, _ in reads) / seconds,
+        'read_errors': sum(errors for _, errors in reads),
+        'writes': sum(done for done, _ in writes) / seconds,
+        'write_errors': sum(errors for _, errors in writes),
+    }))
+
+
+def main():
+    if sys.argv[1:2] == ['--profile']:
+        return run_profile(float(sys.argv[2]))
+    seconds = sys.argv[1] if len(sys.argv) > 1 else str(DEFAULT_SECONDS)
+    for name, environment in PROFILES.items():
+        if name == 'postgresql' and 'POSTGRES_DB' not in os.environ:
+            print(f'{name}: пропущен, не задана POSTGRES_DB')
+            continue
+        completed = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.load_test',
+             '--profile', seconds],
+            env={**os.environ, **environment},
+            capture_output=True, text=True,
+        )
+        if completed.returncode:
+            print(f'{name}: ошибка\n{completed.stderr}')
+            continue
+        result = json.loads(completed.stdout.splitlines()[-1])
+        print(
+            f'{name}: чтений {result["reads"]:.0f}/с '
+            f'(ошибок {result["read_errors"]}), '
+            f'записей {result["writes"]:.0f}/с '
+            f'(ошибок {result["write_errors"]})'
+        )
+
+
+if __name__ == '__main__':
+    main()
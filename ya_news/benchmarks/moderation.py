@@ -0,0 +1,67 @@
+"""
+Сравнение проверки комментариев по списку слов.
+
+Старый способ — цикл `word in text` по всем словам, новый —
+news.moderation.WordMatcher. Запуск из каталога ya_news:
+
+    python -m benchmarks.moderation
+"""
+import random
+import time
+
+from news.moderation import WordMatcher
+
+ALPHABET = 'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+SEED = 2023
+TEXT_COUNT = 200
+TEXT_WORDS = 60
+
+
+def random_word(rnd, min_length=4, max_length=10):
+    return ''.join(
+        rnd.choice(ALPHABET)
+        for _ in range(rnd.randint(min_length, max_length))
+    )
+
+
+def make_texts(rnd):
+    return [
+        ' '.join(random_word(rnd, 2, 9) for _ in range(TEXT_WORDS))
+        for _ in range(TEXT_COUNT)
+    ]
+
+
+def loop_check(words, text):
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return True
+    return False
+
+
+def measure(check, texts):
+    """Среднее время проверки одного текста, мкс."""
+    start = time.perf_counter()
+    for text in texts:
+        check(text)
+    return (time.perf_counter() - start) / len(texts) * 10 ** 6
+
+
+def main():
+    rnd = random.Random(SEED)
+    texts = make_texts(rnd)
+    print(f'{"слов":>8} {"цикл, мкс":>12} {"дерево, мкс":>14} '
+          f'{"сборка, мс":>12} {"ускорение":>10}')
+    for count in (10, 1000, 50000):
+        words = [random_word(rnd, 6, 12) for _ in range(count)]
+        start = time.perf_counter()
+        matcher = WordMatcher(words)
+        build = (time.perf_counter() - start) * 1000
+        loop = measure(lambda text: loop_check(words, text), texts)
+        compiled = measure(matcher.find, texts)
+        print(f'{count:>8} {loop:>12.1f} {compiled:>14.1f} '
+              f'{build:>12.1f} {loop / compiled:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
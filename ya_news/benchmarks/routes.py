@@ -0,0 +1,69 @@
+"""
+Задержки, SQL-запросы и память каждого маршрута news.urls.
+
+Во временную базу фабриками news.factories засеваются scale новостей
+с комментариями, затем каждый маршрут запрашивается анонимом
+и автором комментариев (см. benchmarks.harness). Все маршруты
+замеряются GET-запросами: формы правки и удаления открываются,
+но не отправляются, чтобы данные не менялись между запросами.
+Запуск из каталога ya_news:
+
+    python -m benchmarks.routes [--scale N] [--save итог.json]
+        [--baseline база.json] [--threshold 0.2]
+
+С --baseline код возврата 1 означает регрессию.
+"""
+from benchmarks.harness import Route, check_routes, finish, parse_args, run
+from benchmarks.utils import setup_django, test_database
+
+DEFAULT_SCALE = 1000
+COMMENTS_PER_NEWS = 20
+USERS = 10
+
+
+def seed(scale):
+    """Маршруты с аргументами по засеянным данным и автор комментариев."""
+    from news.factories import create_comments, create_news, create_users
+
+    users = create_users(USERS)
+    news = create_news(scale)
+    # Комментарии есть у каждой десятой новости.
+    comments = create_comments(
+        news[:max(scale // 10, 1)], users, COMMENTS_PER_NEWS
+    )
+    item, comment = news[0], comments[0]
+    routes = {
+        'news:home': Route(),
+        'news:detail': Route({'pk': item.pk}),
+        'news:search': Route(query={'q': 'новость'}),
+        'news:edit': Route({'pk': comment.pk}),
+        'news:delete': Route({'pk': comment.pk}),
+        'news:api_list': Route(),
+        'news:api_detail': Route({'pk': item.pk}),
+        'news:api_comments': Route({'pk': item.pk}),
+    }
+    return routes, comment.author
+
+
+def main():
+    args = parse_args(__doc__.split('\n')[1], DEFAULT_SCALE)
+    setup_django()
+    from django.conf import settings
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment(debug=False)
+    settings.QUERY_BUDGET_MODE = None
+    with test_database():
+        routes, author = seed(args.scale)
+        check_routes('news', 'news.urls', routes)
+        author_client = Client()
+        author_client.force_login(author)
+        report = run(
+            routes, {'anonymous': Client(), 'author': author_client}, args
+        )
+    finish(report, args)
+
+
+if __name__ == '__main__':
+    main()
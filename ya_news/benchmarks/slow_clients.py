@@ -0,0 +1,308 @@
+"""
+Ленты под WSGI и ASGI при медленных клиентах.
+
+Медленные клиенты открывают соединение и по байту в секунду
+досылают заголовки, как мобильные клиенты на плохой связи или
+slowloris. WSGI-сервер с пулом потоков (как gunicorn с --threads)
+отдаёт каждому такому соединению поток, ASGI-сервер (uvicorn с
+асинхронными страницами из news.async_urls) держит их в цикле событий.
+Одновременно быстрый клиент читает ленту и новости; выводятся
+задержки его запросов, число таймаутов и число потоков сервера.
+
+Вторая таблица — задержки быстрого клиента, пока другие клиенты
+без перерыва открывают страницы новостей по 50 комментариев.
+Они авторизованы, поэтому страницы не берутся из кэша и каждый раз
+отрисовываются заново; быстрый клиент читает ленту из кэша, и его
+задержки показывают, насколько отрисовка мешает остальным запросам.
+Запуск из каталога ya_news:
+
+    python -m benchmarks.slow_clients [секунд на замер]
+"""
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+from benchmarks.utils import setup_django
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+HOST = '127.0.0.1'
+DEFAULT_SECONDS = 5
+WSGI_THREADS = 16
+SLOW_CLIENTS = (0, 50, 500)
+RENDER_CLIENTS = (0, 4, 16)
+NEWS = 200
+# Новости со страницей комментариев целиком для клиентов с отрисовкой.
+COMMENTED_NEWS = 10
+COMMENTS_PER_NEWS = 50
+REQUEST_TIMEOUT = 1
+START_TIMEOUT = 10
+
+
+class ThreadPoolWSGIServer(WSGIServer):
+    """wsgiref-сервер с ограниченным пулом потоков, как у gunicorn."""
+
+    def __init__(self, *args, threads, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_wsgi(port, threads):
+    """Запускается в дочернем процессе сервера."""
+    from yanews.wsgi import application
+
+    server = ThreadPoolWSGIServer(
+        (HOST, port), QuietHandler, threads=threads
+    )
+    server.set_app(application)
+    server.serve_forever()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind((HOST, 0))
+        return sock.getsockname()[1]
+
+
+def fetch(port, path, headers=None):
+    connection = http.client.HTTPConnection(
+        HOST, port, timeout=REQUEST_TIMEOUT
+    )
+    try:
+        connection.request('GET', path, headers=headers or {})
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def start_server(kind, port, environment):
+    if kind == 'asgi':
+        command = [
+            sys.executable, '-m', 'uvicorn', 'yanews.asgi:application',
+            '--host', HOST, '--port', str(port), '--log-level', 'warning',
+        ]
+    else:
+        command = [
+            sys.executable, '-m', 'benchmarks.slow_clients',
+            '--wsgi', str(port), str(WSGI_THREADS),
+        ]
+    server = subprocess.Popen(command, cwd=PROJECT_DIR, env=environment)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            fetch(port, '/')
+        except OSError:
+            time.sleep(0.1)
+        else:
+            return server
+    server.kill()
+    raise RuntimeError(f'Сервер {kind} не запустился.')
+
+
+def thread_count(pid):
+    status = Path(f'/proc/{pid}/status')
+    if not status.exists():
+        return None
+    for line in status.read_text().splitlines():
+        if line.startswith('Threads:'):
+            return int(line.split()[1])
+
+
+def open_slow_clients(port, count, stop):
+    """Соединения, которые досылают заголовки по байту в секунду."""
+    sockets = []
+    for _ in range(count):
+        sock = socket.create_connection((HOST, port))
+        sock.sendall(f'GET / HTTP/1.1\r\nHost: {HOST}\r\n'.encode())
+        sockets.append(sock)
+
+    def trickle():
+        while not stop.wait(1):
+            for sock in sockets:
+                try:
+                    sock.sendall(b'X')
+                except OSError:
+                    pass
+
+    threading.Thread(target=trickle, daemon=True).start()
+    return sockets
+
+
+def start_renderers(port, sessions, commented_ids, stop):
+    """Авторизованные клиенты, читающие страницы новостей без перерыва."""
+
+    def render_pages(session):
+        headers = {'Cookie': f'sessionid={session}'}
+        number = 0
+        while not stop.is_set():
+            path = f'/news/{commented_ids[number % len(commented_ids)]}/'
+            number += 1
+            try:
+                fetch(port, path, headers)
+            except OSError:
+                pass
+
+    threads = [
+        threading.Thread(target=render_pages, args=(session,), daemon=True)
+        for session in sessions
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def measure(kind, seconds, environment, paths, slow_count=0, sessions=(),
+            commented_ids=()):
+    port = free_port()
+    server = start_server(kind, port, environment)
+    stop = threading.Event()
+    sockets = []
+    renderers = []
+    try:
+        sockets = open_slow_clients(port, slow_count, stop)
+        renderers = start_renderers(port, sessions, commented_ids, stop)
+        # Даём серверу разобрать новые соединения.
+        time.sleep(0.5)
+        latencies = []
+        timeouts = 0
+        number = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            path = paths[number % len(paths)]
+            number += 1
+            started = time.monotonic()
+            try:
+                fetch(port, path)
+            except OSError:
+                timeouts += 1
+            else:
+                latencies.append(time.monotonic() - started)
+        threads = thread_count(server.pid)
+    finally:
+        stop.set()
+        for sock in sockets:
+            sock.close()
+        for thread in renderers:
+            thread.join()
+        server.kill()
+        server.wait()
+    return latencies, timeouts, threads
+
+
+def prepare_database(path):
+    """
+    Отдельная база с миграциями, новостями и комментариями для серверов.
+
+    Возвращает id новостей, id новостей с комментариями и сессии
+    авторизованных клиентов, сохранённые в базе.
+    """
+    os.environ['DB_NAME'] = str(path)
+    os.environ['SESSION_PROFILE'] = 'db'
+    setup_django()
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client
+
+    from news.factories import create_comments, create_news, create_users
+
+    call_command('migrate', verbosity=0)
+    news = create_news(NEWS)
+    commented = news[:COMMENTED_NEWS]
+    users = create_users(max(RENDER_CLIENTS))
+    create_comments(commented, users, COMMENTS_PER_NEWS)
+    sessions = []
+    for user in users:
+        client = Client()
+        client.force_login(user)
+        sessions.append(client.cookies['sessionid'].value)
+    connection.close()
+    return (
+        [item.pk for item in news], [item.pk for item in commented],
+        sessions,
+    )
+
+
+def print_row(title, load, latencies, timeouts, threads):
+    if latencies:
+        p50 = statistics.median(latencies) * 1000
+        p95 = statistics.quantiles(
+            latencies, n=20, method='inclusive'
+        )[-1] * 1000 if len(latencies) > 1 else p50
+        timing = f'{p50:>9.1f}{p95:>9.1f}'
+    else:
+        timing = f'{"—":>9}{"—":>9}'
+    print(
+        f'{title:<14}{load:>10}{len(latencies):>10}'
+        f'{timing}{timeouts:>11}{threads or "—":>9}'
+    )
+
+
+def print_header(load):
+    print(
+        f'{"сервер":<14}{load:>10}{"запросов":>10}'
+        f'{"p50, мс":>9}{"p95, мс":>9}{"таймаутов":>11}{"потоков":>9}'
+    )
+
+
+def main():
+    if sys.argv[1:2] == ['--wsgi']:
+        return serve_wsgi(int(sys.argv[2]), int(sys.argv[3]))
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SECONDS
+    with tempfile.TemporaryDirectory() as directory:
+        database = Path(directory) / 'slow_clients.sqlite3'
+        news_ids, commented_ids, sessions = prepare_database(database)
+        environment = {**os.environ, 'DB_NAME': str(database)}
+        servers = (
+            ('wsgi', f'wsgi ({WSGI_THREADS} п.)'), ('asgi', 'asgi'),
+        )
+        paths = [
+            path
+            for news_id in news_ids
+            for path in (f'/news/{news_id}/', '/')
+        ]
+        print_header('медленных')
+        for kind, title in servers:
+            for slow_count in SLOW_CLIENTS:
+                print_row(title, slow_count, *measure(
+                    kind, seconds, environment, paths, slow_count=slow_count
+                ))
+        print()
+        print_header('отрисовок')
+        for kind, title in servers:
+            for render_count in RENDER_CLIENTS:
+                print_row(title, render_count, *measure(
+                    kind, seconds, environment, ['/'],
+                    sessions=sessions[:render_count],
+                    commented_ids=commented_ids,
+                ))
+
+
+if __name__ == '__main__':
+    main()
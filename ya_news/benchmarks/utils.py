@@ -0,0 +1,20 @@
+"""Общие части бенчмарков: настройка Django и временная база."""
+import os
+from contextlib import contextmanager
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Временная база с миграциями, как у тестов; удаляется по выходу."""
+    from django.test.utils import setup_databases, teardown_databases
+    old_config = setup_databases(verbosity=0, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity=0)
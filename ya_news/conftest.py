@@ -1,9 +1,10 @@
 import pytest
 from collections import namedtuple
 from django.conf import settings
+from django.core.cache import cache, caches
 from django.urls import reverse
+from news.factories import create_comments, create_news
 from news.models import News, Comment
-from datetime import datetime, timedelta
 
 
 PK = 1
@@ -53,29 +54,14 @@ def news():
 
 @pytest.fixture
 def news_count():
-    today = datetime.today()
-    news_count_on_page = News.objects.bulk_create(
-        News(title=f'Новость {index}',
-             text='Просто текст.',
-             date=today - timedelta(days=index),
-             )
-        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1)
-    )
-    return news_count_on_page
+    return create_news(settings.NEWS_COUNT_ON_HOME_PAGE + 1)
 
 
 @pytest.fixture
 def comment_sorted_on_page(author, news):
-    today = datetime.today()
-    comment_sorted = Comment.objects.bulk_create(
-        Comment(news=news,
-                author=author,
-                text='Текст комментария',
-                created=today - timedelta(days=index),
-                )
-        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE + 1)
+    return create_comments(
+        [news], [author], settings.NEWS_COUNT_ON_HOME_PAGE + 1
     )
-    return comment_sorted
 
 
 @pytest.fixture
@@ -117,3 +103,16 @@ def comment(author, news):
         author=author,
         text='Текст комментария',
     )
+
+
+@pytest.fixture(autouse=True)
+def query_budget(settings):
+    """Превышение бюджета SQL-запросов роняет тест."""
+    settings.QUERY_BUDGET_MODE = 'raise'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэш страниц и пользователей не переживает тест, в отличие от базы."""
+    cache.clear()
+    caches[settings.USER_CACHE_ALIAS].clear()
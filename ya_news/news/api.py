@@ -0,0 +1,173 @@
+"""
+JSON API новостей и комментариев только для чтения.
+
+Данные выбираются через .values_list() без создания экземпляров моделей,
+порядок и курсоры страниц те же, что у NewsList и NewsDetail.
+"""
+import json
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views import generic
+
+from .models import Comment, News
+from .pagination import paginate
+
+NEWS_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'text': 'text',
+    'date': 'date',
+    'comment_count': 'comment_count',
+}
+COMMENT_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+}
+STREAM_CHUNK_SIZE = 500
+JSON_PARAMS = {'ensure_ascii': False}
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def select_fields(request, param, available):
+    """
+    Поля ответа из параметра запроса вида ?fields=id,title.
+
+    Возвращает словарь «имя в ответе — путь в ORM».
+    Без параметра отдаются все поля.
+    """
+    requested = request.GET.get(param)
+    if not requested:
+        return available
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = set(names) - set(available)
+    if unknown:
+        raise FieldsError(
+            f'Неизвестные поля в {param}: {", ".join(sorted(unknown))}.'
+        )
+    return {name: available[name] for name in names}
+
+
+def streaming_response(request, chunks, **kwargs):
+    """
+    Потоковый ответ из chunks.
+
+    Под ASGI Django 3.2 перебирает потоковый ответ в цикле событий, где
+    обращаться к базе нельзя. Поэтому там chunks собираются заранее,
+    ещё в потоке представления, и поток с постоянной памятью остаётся
+    только под WSGI.
+    """
+    if isinstance(request, ASGIRequest):
+        chunks = list(chunks)
+    return StreamingHttpResponse(chunks, **kwargs)
+
+
+def serialize(row, fields):
+    return {name: row[lookup] for name, lookup in fields.items()}
+
+
+def keyset_rows(queryset, fields, field, cursor, per_page, descending=False):
+    """Страница строк .values(); поля курсора выбираются всегда."""
+    lookups = {*fields.values(), field, 'id'}
+    page = paginate(
+        queryset.values(*lookups), field, cursor, per_page, descending
+    )
+    rows = [serialize(row, fields) for row in page.object_list]
+    return rows, page.next_cursor
+
+
+def stream_json_array(rows):
+    """Отдаёт JSON-массив по частям, не собирая его в памяти целиком."""
+    yield '['
+    chunk = []
+    separator = ''
+    for row in rows:
+        chunk.append(separator + json.dumps(
+            row, cls=DjangoJSONEncoder, **JSON_PARAMS
+        ))
+        separator = ','
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    yield ''.join(chunk) + ']'
+
+
+class ApiView(generic.View):
+    """Базовый класс API: только GET, ошибки полей — 400 в JSON."""
+    http_method_names = ('get', 'head', 'options')
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        except FieldsError as error:
+            return JsonResponse({'error': str(error)}, status=400)
+
+    def json(self, data):
+        return JsonResponse(data, json_dumps_params=JSON_PARAMS)
+
+
+class NewsListApi(ApiView):
+    """Лента новостей постранично, как на главной."""
+
+    def get(self, request):
+        fields = select_fields(request, 'fields', NEWS_FIELDS)
+        results, next_cursor = keyset_rows(
+            News.objects.all(),
+            fields,
+            'date',
+            request.GET.get('after'),
+            settings.NEWS_COUNT_ON_HOME_PAGE,
+            descending=True,
+        )
+        return self.json({'results': results, 'next': next_cursor})
+
+
+class NewsDetailApi(ApiView):
+    """Новость с первой страницей комментариев, как на её странице."""
+
+    def get(self, request, pk):
+        fields = select_fields(request, 'fields', NEWS_FIELDS)
+        comment_fields = select_fields(
+            request, 'comment_fields', COMMENT_FIELDS
+        )
+        news = get_object_or_404(
+            News.objects.values(*fields.values()), pk=pk
+        )
+        comments, next_cursor = keyset_rows(
+            Comment.objects.visible().filter(news_id=pk),
+            comment_fields,
+            'created',
+            request.GET.get('after'),
+            settings.COMMENTS_COUNT_ON_DETAIL_PAGE,
+        )
+        return self.json({
+            'news': serialize(news, fields),
+            'comments': comments,
+            'next': next_cursor,
+        })
+
+
+class CommentStreamApi(ApiView):
+    """Все комментарии новости одним потоковым JSON-массивом."""
+
+    def get(self, request, pk):
+        fields = select_fields(request, 'fields', COMMENT_FIELDS)
+        get_object_or_404(News.objects.values('id'), pk=pk)
+        rows = Comment.objects.visible().filter(news_id=pk).order_by(
+            'created', 'id'
+        ).values_list(*fields.values()).iterator(
+            chunk_size=STREAM_CHUNK_SIZE
+        )
+        return streaming_response(
+            request,
+            stream_json_array(dict(zip(fields, row)) for row in rows),
+            content_type='application/json',
+        )
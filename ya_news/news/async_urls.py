@@ -0,0 +1,17 @@
+"""
+Маршруты news под ASGI: страницы для чтения заменены асинхронными.
+
+Остальные адреса берутся из news.urls; Django проверяет шаблоны
+по порядку, поэтому асинхронные варианты стоят первыми.
+"""
+from django.urls import path
+
+from news import async_views, urls
+
+app_name = 'news'
+
+urlpatterns = [
+    path('', async_views.news_list, name='home'),
+    path('news/<int:pk>/', async_views.news_detail, name='detail'),
+    *urls.urlpatterns,
+]
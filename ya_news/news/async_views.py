@@ -0,0 +1,110 @@
+"""
+Асинхронные страницы новостей для запуска под ASGI.
+
+Django 3.2 работает с ORM только синхронно, поэтому всё, что странице
+нужно от базы и кэша, выполняется за один переход в sync_to_async
+теми же классами, что и в синхронных представлениях. Под ASGI такой
+код всех запросов идёт в одном потоке. Шаблон (на странице новости —
+до 50 комментариев через linebreaksbr) отрисовывается в отдельном
+потоке пула: в цикле событий он задерживал бы все остальные запросы,
+а в общем потоке — их работу с базой.
+"""
+import calendar
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from . import cache
+from .views import (
+    NewsComment, NewsDetail, NewsList, news_etag, news_last_modified,
+    news_list_etag
+)
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+PreparedPage = namedtuple(
+    'PreparedPage', ('response', 'context', 'cache_key', 'validators')
+)
+
+
+def list_context(view):
+    view.object_list = view.get_queryset()
+    return view.get_context_data()
+
+
+def detail_context(view):
+    view.object = view.get_object()
+    return view.get_context_data(object=view.object)
+
+
+def prepare_page(request, view_class, load_context, etag_func,
+                 last_modified_func, kwargs):
+    """
+    Синхронная часть страницы: валидаторы, кэш анонимов и данные из базы.
+
+    Повторяет condition() и AnonymousCacheMixin синхронных представлений.
+    Если ответ готов без шаблона (304 или страница из кэша), он
+    возвращается в поле response, иначе — контекст для шаблона.
+    """
+    etag = quote_etag(etag_func(request, **kwargs))
+    validators = {'ETag': etag}
+    last_modified = None
+    if last_modified_func is not None:
+        modified = last_modified_func(request, **kwargs)
+        if modified is not None:
+            last_modified = calendar.timegm(modified.utctimetuple())
+            validators['Last-Modified'] = http_date(last_modified)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        return PreparedPage(response, None, None, validators)
+    view = view_class()
+    view.setup(request, **kwargs)
+    key = view.get_page_key()
+    if key is not None:
+        content = cache.get_page(key)
+        if content is not None:
+            return PreparedPage(HttpResponse(content), None, None, validators)
+    return PreparedPage(None, load_context(view), key, validators)
+
+
+async def render_page(request, view_class, load_context, etag_func,
+                      last_modified_func=None, **kwargs):
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    page = await sync_to_async(prepare_page)(
+        request, view_class, load_context, etag_func, last_modified_func,
+        kwargs,
+    )
+    response = page.response
+    if response is None:
+        response = await sync_to_async(render, thread_sensitive=False)(
+            request, view_class.template_name, page.context
+        )
+        if page.cache_key is not None:
+            await sync_to_async(cache.set_page)(
+                page.cache_key, response.content
+            )
+    for header, value in page.validators.items():
+        response.headers.setdefault(header, value)
+    return response
+
+
+async def news_list(request):
+    """Лента новостей."""
+    return await render_page(request, NewsList, list_context, news_list_etag)
+
+
+async def news_detail(request, pk):
+    """Новость с комментариями; отправка комментария идёт синхронно."""
+    if request.method == 'POST':
+        return await sync_to_async(NewsComment.as_view())(request, pk=pk)
+    return await render_page(
+        request, NewsDetail, detail_context, news_etag, news_last_modified,
+        pk=pk,
+    )
@@ -0,0 +1,127 @@
+"""
+Кэш страниц новостей для анонимных пользователей.
+
+Ключ страницы содержит штамп версии. Штампы меняются сигналами при
+сохранении и удалении новостей и комментариев, поэтому устаревшие
+страницы просто перестают читаться и вытесняются кэшем сами.
+
+Штампы меняет процесс, который записал изменение, поэтому страницы
+и штампы хранятся в кэше NEWS_CACHE_ALIAS, общем для всех процессов
+веб-сервера; с кэшем в памяти процесса настройки не дают запустить
+несколько процессов (WEB_CONCURRENCY).
+"""
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .metrics import count_cache
+from .models import News
+
+LIST_VERSION_KEY = 'news:list:version'
+NEWS_VERSION_KEY = 'news:{pk}:version'
+NEWS_MODIFIED_KEY = 'news:{pk}:modified'
+PAGE_KEY = 'news:page:{version}:{path}'
+
+
+def get_cache():
+    return caches[settings.NEWS_CACHE_ALIAS]
+
+
+def get_version(key):
+    """
+    Возвращает штамп версии, заводя его при первом обращении.
+
+    Начальное значение берётся из времени, чтобы после вытеснения
+    штампа из кэша не вернуться к уже использованной версии.
+    """
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump(key):
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+
+
+def list_version():
+    return get_version(LIST_VERSION_KEY)
+
+
+def news_version(pk):
+    return get_version(NEWS_VERSION_KEY.format(pk=pk))
+
+
+def bump_list_version():
+    """Сбрасывает кэш ленты, меняя штамп так же, как bump_news_version."""
+    _bump(LIST_VERSION_KEY)
+    transaction.on_commit(lambda: _bump(LIST_VERSION_KEY))
+
+
+def bump_news_version(pk):
+    """
+    Сбрасывает кэш страницы новости и ленты.
+
+    Штамп меняется сразу и ещё раз после фиксации транзакции: иначе
+    конкурентный запрос мог бы успеть закэшировать старые данные
+    под уже новым штампом.
+    """
+    def bump():
+        _bump(NEWS_VERSION_KEY.format(pk=pk))
+        _bump(LIST_VERSION_KEY)
+        get_cache().set(
+            NEWS_MODIFIED_KEY.format(pk=pk), timezone.now(), timeout=None
+        )
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def news_last_modified(pk):
+    """
+    Время последнего изменения новости или её комментариев.
+
+    Обычно берётся из кэша, куда его пишет bump_news_version. Если
+    значения там нет, вычисляется одним запросом по дате новости
+    и времени последнего комментария.
+    """
+    key = NEWS_MODIFIED_KEY.format(pk=pk)
+    modified = get_cache().get(key)
+    if modified is not None:
+        return modified
+    row = News.objects.filter(pk=pk).annotate(
+        last_comment=Max('comment__created')
+    ).values_list('date', 'last_comment').first()
+    if row is None:
+        return None
+    date, last_comment = row
+    modified = timezone.make_aware(datetime.combine(date, datetime.min.time()))
+    if last_comment is not None:
+        modified = max(modified, last_comment)
+    get_cache().add(key, modified, timeout=None)
+    return modified
+
+
+def page_key(path, version):
+    return PAGE_KEY.format(version=version, path=path)
+
+
+def get_page(key):
+    content = get_cache().get(key)
+    count_cache('page', content is not None)
+    return content
+
+
+def set_page(key, content):
+    get_cache().set(key, content, settings.NEWS_CACHE_TIMEOUT)
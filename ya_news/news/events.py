@@ -0,0 +1,183 @@
+"""
+Рассылка изменений комментариев подписчикам новости.
+
+Сигналы комментариев после фиксации транзакции публикуют событие
+в канал новости, а потоки SSE (news.sse) на него подписаны. Доставку
+выполняет бэкенд из settings.NEWS_EVENTS_BACKEND; LocalBackend
+рассылает события внутри одного процесса.
+"""
+import itertools
+import threading
+import uuid
+from collections import OrderedDict, deque, namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.formats import date_format
+from django.utils.module_loading import import_string
+
+CREATED, UPDATED, DELETED = 'created', 'updated', 'deleted'
+# Сколько последних событий канала помнится для переподключившихся
+# клиентов и для скольких каналов.
+HISTORY_SIZE = 100
+HISTORY_CHANNELS = 1000
+
+Event = namedtuple('Event', ('id', 'data'))
+
+
+class Subscription:
+    """
+    Ограниченный буфер событий одного соединения.
+
+    Если клиент не успевает забирать события и буфер переполнен,
+    события больше не копятся, а подписка помечается overflowed:
+    клиенту остаётся перезагрузить страницу. notify вызывается
+    после каждого события из потока, который его опубликовал.
+    """
+
+    def __init__(self, notify, maxsize):
+        self.notify = notify
+        self.maxsize = maxsize
+        self.overflowed = False
+        self._events = deque()
+        self._lock = threading.Lock()
+
+    def put(self, event):
+        with self._lock:
+            if self.overflowed:
+                return
+            if len(self._events) >= self.maxsize:
+                self.overflowed = True
+                self._events.clear()
+            else:
+                self._events.append(event)
+        self.notify()
+
+    def drain(self):
+        """Забирает накопленные события."""
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+
+class Channel:
+    """Подписчики канала и его последние события."""
+
+    def __init__(self, floor):
+        self.subscribers = set()
+        self.history = deque(maxlen=HISTORY_SIZE)
+        # Все события канала после floor есть в history.
+        self.floor = floor
+
+
+class LocalBackend:
+    """
+    Рассылка внутри процесса.
+
+    Бэкенд реализует publish(), subscribe() и unsubscribe(). Процессы
+    друг о друге не знают, поэтому при нескольких воркерах uvicorn
+    нужен бэкенд с общей шиной; переподключение к другому процессу
+    распознаётся по префиксу id события и заканчивается сбросом.
+    """
+
+    def __init__(self):
+        self.prefix = uuid.uuid4().hex[:8]
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._channels = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _channel(self, name):
+        channel = self._channels.get(name)
+        if channel is None:
+            channel = self._channels[name] = Channel(self._last_id)
+            for stale in list(self._channels):
+                if len(self._channels) <= HISTORY_CHANNELS:
+                    break
+                if not self._channels[stale].subscribers:
+                    del self._channels[stale]
+        self._channels.move_to_end(name)
+        return channel
+
+    def publish(self, name, data):
+        with self._lock:
+            channel = self._channel(name)
+            self._last_id = next(self._ids)
+            event = Event(f'{self.prefix}-{self._last_id}', data)
+            if len(channel.history) == channel.history.maxlen:
+                channel.floor = self.parse_id(channel.history[0].id)
+            channel.history.append(event)
+            subscribers = list(channel.subscribers)
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def subscribe(self, name, subscription, last_id=None):
+        """
+        Подписывает на канал.
+
+        Для переподключения с last_id возвращает пропущенные события;
+        None — если часть из них уже забыта и клиенту нужен сброс.
+        """
+        with self._lock:
+            channel = self._channel(name)
+            channel.subscribers.add(subscription)
+            if last_id is None:
+                return []
+            number = self.parse_id(last_id)
+            if number is None or number < channel.floor:
+                return None
+            return [
+                event for event in channel.history
+                if self.parse_id(event.id) > number
+            ]
+
+    def unsubscribe(self, name, subscription):
+        with self._lock:
+            channel = self._channels.get(name)
+            if channel is not None:
+                channel.subscribers.discard(subscription)
+
+    def subscriber_count(self, name):
+        with self._lock:
+            channel = self._channels.get(name)
+            return len(channel.subscribers) if channel else 0
+
+    def parse_id(self, event_id):
+        """Номер события этого процесса или None для чужого id."""
+        prefix, _, number = event_id.partition('-')
+        if prefix != self.prefix or not number.isdigit():
+            return None
+        return int(number)
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    return import_string(settings.NEWS_EVENTS_BACKEND)()
+
+
+def channel_name(news_id):
+    return f'news:{news_id}:comments'
+
+
+def comment_data(comment, kind):
+    """Событие комментария: только то, что нужно странице новости."""
+    data = {'type': kind, 'id': comment.pk}
+    if kind == DELETED:
+        return data
+    data['text'] = comment.text
+    if kind == CREATED:
+        data['author'] = str(comment.author)
+        data['created'] = date_format(
+            timezone.localtime(comment.created), 'DATETIME_FORMAT'
+        )
+    return data
+
+
+def publish_comment(comment, kind):
+    """Публикует событие, когда изменение будет зафиксировано."""
+    name = channel_name(comment.news_id)
+    data = comment_data(comment, kind)
+    transaction.on_commit(lambda: get_backend().publish(name, data))
@@ -0,0 +1,138 @@
+"""
+Детерминированные наборы данных для тестов и бенчмарков.
+
+Каждая фабрика вставляет записи одной модели одним bulk_create
+(на SQLite Django сам режет его на пачки по лимиту параметров)
+и возвращает их с первичными ключами. Имена, тексты и даты зависят
+только от номера записи и start, поэтому одни и те же вызовы дают
+одни и те же данные, а масштаб задаётся числом записей: те же
+фабрики наполняют и фикстуры тестов, и базы бенчмарков на 10^5 строк.
+
+bulk_create не вызывает сигналов, поэтому фабрики сами делают то, что
+сделали бы сигналы: обновляют счётчики комментариев, поисковый индекс
+и штампы кэша. Событий подписчикам новостей они не публикуют.
+"""
+from datetime import datetime, timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.db import connections, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from . import search
+from .cache import bump_list_version, bump_news_version
+from .models import Comment, News
+
+START = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+# Сколько новостей обновляется одним запросом после вставки комментариев.
+UPDATE_BATCH = 500
+
+
+def _insert(model, objects):
+    """
+    Вставляет записи и проставляет им первичные ключи.
+
+    Если база не возвращает ключи из bulk_create (SQLite), они
+    читаются одним запросом: записи одной транзакции получают
+    ключи по возрастанию в порядке вставки.
+    """
+    queryset = model.objects.all()
+    features = connections[queryset.db].features
+    last_pk = None
+    if not features.can_return_rows_from_bulk_insert:
+        last_pk = queryset.aggregate(last=Max('pk'))['last'] or 0
+    queryset.bulk_create(objects)
+    if last_pk is not None:
+        pks = queryset.filter(pk__gt=last_pk).order_by('pk').values_list(
+            'pk', flat=True
+        )
+        for obj, pk in zip(objects, pks):
+            obj.pk = pk
+    return objects
+
+
+def create_users(count, name='Пользователь {number}', offset=0,
+                 password=None):
+    """
+    Пользователи с именами name.format(number=…) от offset.
+
+    Пароль, если задан, хэшируется один раз на всех; иначе войти
+    можно только через force_login.
+    """
+    User = get_user_model()
+    hashed = make_password(password) if password else UNUSABLE_PASSWORD_PREFIX
+    with transaction.atomic():
+        return _insert(User, [
+            User(username=name.format(number=number), password=hashed)
+            for number in range(offset, offset + count)
+        ])
+
+
+def create_news(count, start=START, offset=0):
+    """Новости «Новость N», каждая на день старше предыдущей."""
+    day = start.date()
+    with transaction.atomic():
+        news = _insert(News, [
+            News(
+                title=f'Новость {number}',
+                text=f'Текст новости {number}.',
+                date=day - timedelta(days=index),
+            )
+            for index, number in enumerate(range(offset, offset + count))
+        ])
+        if news:
+            search.index_queryset(News.objects.filter(
+                pk__gte=news[0].pk, pk__lte=news[-1].pk
+            ))
+            bump_list_version()
+    return news
+
+
+def create_comments(news, authors, per_news, start=START,
+                    step=timedelta(minutes=1)):
+    """
+    По per_news комментариев к каждой новости, авторы идут по кругу.
+
+    Комментарии каждой новости созданы по порядку с шагом step
+    от start; счётчики comment_count новостей увеличиваются.
+    """
+    news_pks = [item.pk for item in news]
+    author_pks = [author.pk for author in authors]
+    objects = [
+        Comment(
+            news_id=news_pk,
+            author_id=author_pks[number % len(author_pks)],
+            text=f'Комментарий {number}',
+        )
+        for news_pk in news_pks
+        for number in range(per_news)
+    ]
+    if not objects:
+        return objects
+    with transaction.atomic():
+        _insert(Comment, objects)
+        created = Comment.objects.filter(
+            pk__gte=objects[0].pk, pk__lte=objects[-1].pk
+        )
+        # created при вставке заполняется текущим временем, поэтому
+        # время ставится отдельно: одним UPDATE на номер комментария.
+        numbered = created.annotate(
+            number=(F('pk') - objects[0].pk) % per_news
+        )
+        for number in range(per_news):
+            numbered.filter(number=number).update(
+                created=start + number * step
+            )
+        search.index_queryset(created)
+        for first in range(0, len(news_pks), UPDATE_BATCH):
+            News.objects.filter(
+                pk__in=news_pks[first:first + UPDATE_BATCH]
+            ).update(comment_count=F('comment_count') + per_news)
+        for pk in news_pks:
+            bump_news_version(pk)
+    for item in news:
+        item.comment_count += per_news
+    for index, comment in enumerate(objects):
+        comment.created = start + index % per_news * step
+    return objects
@@ -1,16 +1,14 @@
-from django.forms import ModelForm
+from django.forms import CharField, Form, ModelForm
 from django.core.exceptions import ValidationError
 
+from .metrics import FormMetricsMixin
 from .models import Comment
+from .moderation import BAD_WORDS, get_matcher  # noqa: F401
 
-BAD_WORDS = (
-    'редиска',
-    'негодяй',
-)
 WARNING = 'Не ругайтесь!'
 
 
-class CommentForm(ModelForm):
+class CommentForm(FormMetricsMixin, ModelForm):
 
     class Meta:
         model = Comment
@@ -19,8 +17,16 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if text in get_matcher():
+            raise ValidationError(WARNING, code='bad_words')
         return text
+
+    def save(self, commit=True):
+        """Прошедший проверку текст снимает отметку о нарушении."""
+        self.instance.is_flagged = False
+        return super().save(commit)
+
+
+class SearchForm(Form):
+    """Строка поиска."""
+    q = CharField(label='Поиск', max_length=200, required=False)
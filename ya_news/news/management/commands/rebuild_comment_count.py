@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from news.models import Comment, News
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчик комментариев у всех новостей.'
+
+    def handle(self, *args, **options):
+        counts = Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(total=Count('pk')).values('total')
+        with transaction.atomic():
+            updated = News.objects.update(
+                comment_count=Coalesce(Subquery(counts), 0)
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f'Счётчики пересчитаны у {updated} новостей.')
+        )
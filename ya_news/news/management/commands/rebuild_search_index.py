@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from news.search import fts_enabled, rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Строит поисковый индекс новостей и комментариев заново.'
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            self.stdout.write('База без FTS5, поиск работает без индекса.')
+            return
+        rebuild_index()
+        self.stdout.write(self.style.SUCCESS('Индекс поиска перестроен.'))
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.cache import bump_news_version
+from news.models import Comment
+from news.moderation import WordMatcher, get_matcher
+
+# Ограничение числа параметров в одном UPDATE ... WHERE id IN (...).
+UPDATE_BATCH_SIZE = 500
+
+_matcher = None
+
+
+def init_worker(words):
+    """Каждый процесс собирает автомат один раз."""
+    global _matcher
+    _matcher = WordMatcher(words)
+
+
+def check_batch(batch):
+    """Возвращает границы пачки и pk комментариев с запрещёнными словами."""
+    flagged = [pk for pk, text in batch if text in _matcher]
+    return batch[0][0], batch[-1][0], flagged
+
+
+def words_digest(words):
+    """Отпечаток списка слов: точка от другого списка не подходит."""
+    return hashlib.sha256('\n'.join(words).encode()).hexdigest()
+
+
+def read_batches(start_pk, chunk_size):
+    """Комментарии пачками по возрастанию pk, не загружая их все сразу."""
+    rows = Comment.objects.filter(pk__gt=start_pk).order_by('pk').values_list(
+        'pk', 'text'
+    ).iterator(chunk_size=chunk_size)
+    while True:
+        batch = list(islice(rows, chunk_size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Перепроверяет все комментарии по текущему списку запрещённых слов '
+        'и обновляет отметку is_flagged. Отмеченные комментарии скрыты '
+        'от читателей; чтобы закэшированные страницы сразу обновились, '
+        'кэш новостей должен быть общим с веб-сервером (CACHE_BACKEND).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Комментариев в одной пачке.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов проверки; 0 — проверять в этом процессе.',
+        )
+        parser.add_argument(
+            '--checkpoint', type=Path,
+            help=(
+                'Файл с последним обработанным pk для продолжения '
+                'прерванной работы; удаляется после полного прохода.'
+            ),
+        )
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Начать с начала, не читая контрольную точку.',
+        )
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint']
+        words = get_matcher().words
+        state = {
+            'last_pk': 0, 'processed': 0, 'flagged': 0,
+            'words': words_digest(words),
+        }
+        if checkpoint and checkpoint.exists() and not options['reset']:
+            saved = json.loads(checkpoint.read_text())
+            if saved.get('words') == state['words']:
+                state.update(saved)
+            else:
+                self.stdout.write(
+                    'Список слов изменился, проверка начинается сначала.'
+                )
+        batches = read_batches(state['last_pk'], options['chunk_size'])
+        started = time.perf_counter()
+        processed = 0
+        for first_pk, last_pk, flagged, size in self.check(
+                batches, words, options['workers']):
+            self.save(first_pk, last_pk, flagged)
+            processed += size
+            state['last_pk'] = last_pk
+            state['processed'] += size
+            state['flagged'] += len(flagged)
+            if checkpoint:
+                checkpoint.write_text(json.dumps(state))
+            if options['verbosity'] > 1:
+                self.stdout.write(f'pk до {last_pk}: {processed} проверено')
+        if checkpoint:
+            # Следующий запуск должен снова проверить все комментарии.
+            checkpoint.unlink(missing_ok=True)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено {processed} комментариев за {elapsed:.1f} с '
+            f'({processed / elapsed if elapsed else 0:.0f} в секунду), '
+            f'всего отмечено {state["flagged"]}.'
+        ))
+
+    def check(self, batches, words, workers):
+        """
+        Проверяет пачки, сохраняя их порядок.
+
+        В работе не больше двух пачек на процесс, так что память
+        не растёт с числом комментариев.
+        """
+        if not workers:
+            init_worker(words)
+            for batch in batches:
+                yield (*check_batch(batch), len(batch))
+            return
+        with ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=(words,)
+        ) as pool:
+            pending = deque()
+            for batch in batches:
+                pending.append((pool.submit(check_batch, batch), len(batch)))
+                if len(pending) >= workers * 2:
+                    future, size = pending.popleft()
+                    yield (*future.result(), size)
+            while pending:
+                future, size = pending.popleft()
+                yield (*future.result(), size)
+
+    def save(self, first_pk, last_pk, flagged):
+        """
+        Снимает отметки во всей пачке и ставит найденным нарушениям.
+
+        Страницы новостей, у которых отметка комментария изменилась,
+        сбрасываются в кэше.
+        """
+        with transaction.atomic():
+            in_batch = Comment.objects.filter(pk__range=(first_pk, last_pk))
+            was_flagged = set(
+                in_batch.filter(is_flagged=True).values_list('pk', flat=True)
+            )
+            changed = sorted(was_flagged.symmetric_difference(flagged))
+            news_ids = set()
+            for start in range(0, len(changed), UPDATE_BATCH_SIZE):
+                news_ids.update(Comment.objects.filter(
+                    pk__in=changed[start:start + UPDATE_BATCH_SIZE]
+                ).values_list('news_id', flat=True))
+            in_batch.filter(is_flagged=True).update(is_flagged=False)
+            for start in range(0, len(flagged), UPDATE_BATCH_SIZE):
+                Comment.objects.filter(
+                    pk__in=flagged[start:start + UPDATE_BATCH_SIZE]
+                ).update(is_flagged=True)
+            for news_id in news_ids:
+                bump_news_version(news_id)
@@ -0,0 +1,323 @@
+"""
+Метрики процесса в текстовом формате Prometheus (адрес /metrics).
+
+Счётчики и гистограммы живут в памяти процесса: при нескольких
+воркерах Prometheus опрашивает каждый, а суммирует уже он сам.
+Чтобы потоки WSGI-воркера не ждали друг друга, у каждого потока своя
+копия значений метрики: запись идёт без блокировки, а блокировка
+берётся только при первой записи потока и при выдаче /metrics,
+которая складывает копии всех потоков. Копия завершившегося потока
+переносится в общую копию метрики, поэтому пулы, пересоздающие
+потоки, не копят их в памяти. Метод запроса вне стандартных
+попадает в метки как other, чтобы клиенты не плодили меток.
+
+MetricsMiddleware стоит первым в MIDDLEWARE и замеряет время ответа
+и число SQL-запросов по имени URL. Попадания в кэш, записи
+комментариев и ошибки форм считают места, где они происходят.
+"""
+import asyncio
+import itertools
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db import connection
+from django.http import HttpResponse
+
+from .middleware import QueryRecorder, recording
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+HTTP_METHODS = frozenset((
+    'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE',
+    'CONNECT',
+))
+
+
+def escape(value):
+    return (
+        str(value).replace('\\', r'\\').replace('\n', r'\n')
+        .replace('"', r'\"')
+    )
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(
+        f'{name}="{escape(value)}"' for name, value in pairs
+    ) + '}'
+
+
+def format_number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Shard:
+    """Копия значений метрики, которая живёт, пока жив её поток."""
+    __slots__ = ('values', '__weakref__')
+
+    def __init__(self):
+        self.values = {}
+
+
+class Metric(ABC):
+    """Метрика с метками; значения хранятся по копии на поток."""
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._shards = {}
+        self._numbers = itertools.count()
+        # Значения завершившихся потоков.
+        self._base = {}
+        # Копия потока уходит при его завершении, и сборщик мусора может
+        # сделать это, пока поток держит блокировку.
+        self._lock = threading.RLock()
+
+    def _shard(self):
+        try:
+            return self._local.shard.values
+        except AttributeError:
+            shard = self._local.shard = Shard()
+            with self._lock:
+                number = next(self._numbers)
+                self._shards[number] = shard.values
+            weakref.finalize(shard, self._retire, number)
+            return shard.values
+
+    def _retire(self, number):
+        """Переносит копию завершившегося потока в общую."""
+        with self._lock:
+            values = self._shards.pop(number)
+            self._add(self._base, list(values.items()))
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labels)
+
+    @abstractmethod
+    def _add(self, totals, items):
+        """Добавляет к totals значения items и возвращает totals."""
+
+    def values(self):
+        """Сумма копий всех потоков; list() копирует словарь атомарно."""
+        with self._lock:
+            totals = self._add({}, list(self._base.items()))
+            shards = list(self._shards.values())
+        for shard in shards:
+            self._add(totals, list(shard.items()))
+        return totals
+
+    def render(self):
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+            *self.samples(),
+        ]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _add(self, totals, items):
+        for key, value in items:
+            totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def samples(self):
+        for key, value in sorted(self.values().items()):
+            yield (
+                f'{self.name}{format_labels(self.labels, key)} '
+                f'{format_number(value)}'
+            )
+
+
+class FuncCounter(Counter):
+    """
+    Счётчик, который ведёт сам источник, например lru_cache.
+
+    func возвращает словарь значений по кортежам меток и вызывается
+    при выдаче /metrics.
+    """
+
+    def __init__(self, name, documentation, labels, func):
+        super().__init__(name, documentation, labels)
+        self.func = func
+
+    def values(self):
+        return self.func()
+
+
+class Histogram(Metric):
+    """Гистограмма; корзины хранятся без накопления, копятся при выдаче."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=()):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        state = shard.get(key)
+        if state is None:
+            # Корзины, затем +Inf, сумма и число наблюдений.
+            state = shard[key] = [0] * (len(self.buckets) + 1) + [0, 0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def _add(self, totals, items):
+        for key, state in items:
+            total = totals.setdefault(key, [0] * len(state))
+            for index, value in enumerate(list(state)):
+                total[index] += value
+        return totals
+
+    def samples(self):
+        bounds = (*self.buckets, float('inf'))
+        for key, state in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                labels = format_labels(
+                    self.labels, key, (('le', format_number(bound)),)
+                )
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = format_labels(self.labels, key)
+            yield f'{self.name}_sum{labels} {format_number(state[-2])}'
+            yield f'{self.name}_count{labels} {state[-1]}'
+
+
+class Registry:
+    """Набор метрик процесса в порядке регистрации."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def render(self):
+        return '\n'.join(
+            line for metric in self.metrics for line in metric.render()
+        ) + '\n'
+
+
+registry = Registry()
+REQUESTS = registry.counter(
+    'http_requests_total', 'Ответы по имени URL, методу и коду.',
+    ('view', 'method', 'status'),
+)
+REQUEST_LATENCY = registry.histogram(
+    'http_request_duration_seconds', 'Время ответа по имени URL.',
+    ('view', 'method'), LATENCY_BUCKETS,
+)
+REQUEST_QUERIES = registry.histogram(
+    'http_request_db_queries', 'SQL-запросов на ответ по имени URL.',
+    ('view',), QUERY_BUCKETS,
+)
+CACHE_REQUESTS = registry.counter(
+    'cache_requests_total', 'Обращения к кэшам: попадания и промахи.',
+    ('cache', 'result'),
+)
+WRITES = registry.counter(
+    'news_comment_writes_total', 'Созданные, изменённые и удалённые '
+    'комментарии.', ('action',),
+)
+FORM_ERRORS = registry.counter(
+    'form_validation_errors_total', 'Ошибки проверки форм по полю и коду.',
+    ('form', 'field', 'code'),
+)
+
+
+def count_cache(cache, hit):
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def count_form_error(form, field, code):
+    FORM_ERRORS.inc(form=form, field=field, code=code or 'invalid')
+
+
+class FormMetricsMixin:
+    """Считает ошибки формы по полям; у ошибки без кода код invalid."""
+
+    def add_error(self, field, error):
+        errors = error
+        if not isinstance(errors, ValidationError):
+            errors = ValidationError(errors)
+        if hasattr(errors, 'error_dict'):
+            errors = errors.error_dict
+        else:
+            errors = {field or NON_FIELD_ERRORS: errors.error_list}
+        for name, error_list in errors.items():
+            for item in error_list:
+                count_form_error(type(self).__name__, name, item.code)
+        super().add_error(field, error)
+
+
+def metrics(request):
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
+
+
+class MetricsMiddleware:
+    """Время ответа, код и число SQL-запросов каждого запроса."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self.observe(request, response, started, recorder)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        async with recording(QueryRecorder()) as recorder:
+            response = await self.get_response(request)
+        self.observe(request, response, started, recorder)
+        return response
+
+    def observe(self, request, response, started, recorder):
+        match = request.resolver_match
+        # Неизвестные адреса не плодят меток.
+        view = match.view_name if match else 'unmatched'
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        REQUESTS.inc(view=view, method=method, status=response.status_code)
+        REQUEST_LATENCY.observe(
+            time.perf_counter() - started, view=view, method=method
+        )
+        REQUEST_QUERIES.observe(recorder.total, view=view)
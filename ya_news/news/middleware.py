@@ -0,0 +1,148 @@
+"""Контроль числа SQL-запросов на один HTTP-запрос."""
+import asyncio
+import logging
+import re
+from collections import Counter
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r'IN \(%s(?:, %s)*\)')
+TRANSACTION_CONTROL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO')
+# Счётчики текущего асинхронного запроса. Под ASGI синхронный код всех
+# запросов выполняется в одном потоке, и счётчики нескольких запросов
+# стоят на одном соединении одновременно.
+current_recorders = ContextVar('current_recorders', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос превысил бюджет SQL-запросов или выполнил N+1."""
+
+
+def normalize_sql(sql):
+    """Приводит запрос к форме, не зависящей от длины списков IN (...)."""
+    return IN_LIST.sub('IN (...)', sql)
+
+
+class QueryRecorder:
+    """Обёртка для connection.execute_wrapper, считающая формы запросов."""
+
+    def __init__(self):
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        active = current_recorders.get()
+        if (
+            (active is None or self in active)
+            and not sql.startswith(TRANSACTION_CONTROL)
+        ):
+            self.shapes[normalize_sql(sql)] += 1
+        return execute(sql, params, many, context)
+
+    @property
+    def total(self):
+        return sum(self.shapes.values())
+
+    def repeated(self, threshold):
+        """Формы запросов, выполненные не меньше threshold раз."""
+        return {
+            shape: count for shape, count in self.shapes.items()
+            if count >= threshold
+        }
+
+
+# Запросы к базе из асинхронного кода выполняются в потоке
+# sync_to_async со своим соединением: счётчик ставится на него.
+def add_wrapper(wrapper):
+    connection.execute_wrappers.append(wrapper)
+
+
+def remove_wrapper(wrapper):
+    connection.execute_wrappers.remove(wrapper)
+
+
+@asynccontextmanager
+async def recording(recorder):
+    """Ставит счётчик на запросы асинхронного запроса и только его."""
+    token = current_recorders.set((*(current_recorders.get() or ()), recorder))
+    await sync_to_async(add_wrapper)(recorder)
+    try:
+        yield recorder
+    finally:
+        await sync_to_async(remove_wrapper)(recorder)
+        current_recorders.reset(token)
+
+
+class QueryBudgetMiddleware:
+    """
+    Сравнивает число запросов с бюджетом из settings.QUERY_BUDGETS.
+
+    Режим задаётся settings.QUERY_BUDGET_MODE: 'warn' пишет предупреждение
+    в лог, 'raise' выбрасывает QueryBudgetExceeded (для тестов),
+    None отключает проверку. Бюджет None у имени URL исключает его
+    из проверки: так помечаются пакетные операции, где повторяющиеся
+    запросы ожидаемы.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django узнаёт асинхронный middleware.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        mode = getattr(settings, 'QUERY_BUDGET_MODE', None)
+        if mode is None:
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self.check(request, recorder, mode)
+        return response
+
+    async def __acall__(self, request):
+        mode = getattr(settings, 'QUERY_BUDGET_MODE', None)
+        if mode is None:
+            return await self.get_response(request)
+        recorder = QueryRecorder()
+        async with recording(recorder):
+            response = await self.get_response(request)
+        self.check(request, recorder, mode)
+        return response
+
+    def check(self, request, recorder, mode):
+        match = request.resolver_match
+        url_name = match.view_name if match else request.path
+        budgets = getattr(settings, 'QUERY_BUDGETS', {})
+        if url_name in budgets and budgets[url_name] is None:
+            return
+        budget = budgets.get(url_name)
+        repeated = recorder.repeated(
+            getattr(settings, 'QUERY_BUDGET_REPEAT_THRESHOLD', 3)
+        )
+        over_budget = budget is not None and recorder.total > budget
+        if not over_budget and not repeated:
+            return
+        report = {
+            'url_name': url_name,
+            'method': request.method,
+            'queries': recorder.total,
+            'budget': budget,
+            'repeated': repeated,
+        }
+        message = (
+            f'{request.method} {url_name}: {recorder.total} SQL-запросов '
+            f'при бюджете {budget}, повторяющихся форм: {len(repeated)}'
+        )
+        if mode == 'raise':
+            raise QueryBudgetExceeded(f'{message}\n{report}')
+        logger.warning(message, extra={'query_budget': report})
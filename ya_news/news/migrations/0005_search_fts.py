@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# Таблицы поиска описаны здесь, а не импортируются из news.search,
+# чтобы миграция не менялась вместе с кодом приложения.
+TOKENIZE = "tokenize='unicode61 remove_diacritics 2'"
+FOLD = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def has_fts5(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_fts(apps, schema_editor):
+    if not has_fts5(schema_editor.connection):
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE news_news_fts USING fts5(title, text, {TOKENIZE})'
+    )
+    # Совпадение в заголовке весит больше, чем в тексте.
+    schema_editor.execute(
+        "INSERT INTO news_news_fts (news_news_fts, rank) "
+        "VALUES ('rank', 'bm25(10.0, 1.0)')"
+    )
+    schema_editor.execute(
+        f'INSERT INTO news_news_fts (rowid, title, text) '
+        f'SELECT id, {FOLD.format("title")}, {FOLD.format("text")} '
+        f'FROM news_news'
+    )
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE news_comment_fts USING fts5(text, {TOKENIZE})'
+    )
+    schema_editor.execute(
+        f'INSERT INTO news_comment_fts (rowid, text) '
+        f'SELECT id, {FOLD.format("text")} FROM news_comment'
+    )
+
+
+def drop_fts(apps, schema_editor):
+    if has_fts5(schema_editor.connection):
+        schema_editor.execute('DROP TABLE IF EXISTS news_news_fts')
+        schema_editor.execute('DROP TABLE IF EXISTS news_comment_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_comment_is_flagged'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+
+# Индексы хранили текст с «ё», заменённой на «е», и выдача показывала
+# изменённый текст. Теперь в индексах исходный текст, а «ё» учитывает
+# запрос поиска.
+FOLD = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def has_fts5(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def refill(fold):
+    def operation(apps, schema_editor):
+        if not has_fts5(schema_editor.connection):
+            return
+        for table, source, columns in (
+            ('news_news_fts', 'news_news', ('title', 'text')),
+            ('news_comment_fts', 'news_comment', ('text',)),
+        ):
+            values = ', '.join(fold(column) for column in columns)
+            schema_editor.execute(f'DELETE FROM {table}')
+            schema_editor.execute(
+                f'INSERT INTO {table} (rowid, {", ".join(columns)}) '
+                f'SELECT id, {values} FROM {source}'
+            )
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_search_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(refill(str), refill(FOLD.format)),
+    ]
@@ -8,9 +8,13 @@ class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date', '-id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
@@ -18,6 +22,13 @@ class News(models.Model):
         return self.title
 
 
+class CommentQuerySet(models.QuerySet):
+
+    def visible(self):
+        """Комментарии без отметки модерации — те, что видят читатели."""
+        return self.filter(is_flagged=False)
+
+
 class Comment(models.Model):
     news = models.ForeignKey(
         News,
@@ -29,9 +40,24 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    # Комментарии с отметкой скрыты со страниц, из API, поиска и живых
+    # обновлений (CommentQuerySet.visible).
+    is_flagged = models.BooleanField(
+        'Нарушает правила',
+        default=False,
+        help_text='Выставляется командой remoderate_comments.',
+    )
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx',
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
@@ -0,0 +1,135 @@
+"""
+Проверка текста по списку запрещённых слов.
+
+Список один раз собирается в префиксное дерево, а дерево — в одно
+регулярное выражение: движок re проходит текст за один проход, и на
+каждой позиции спускается по дереву, а не перебирает все слова.
+Слово засчитывается, только если начинается на границе слова текста:
+«редиска» находит «редиски», но не срабатывает внутри других слов.
+Регистр и «ё» не различаются.
+"""
+import logging
+import os
+import re
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+BAD_WORDS = (
+    'редиска',
+    'негодяй',
+)
+WORD_START = r'(?<!\w)'
+
+
+def normalize(text):
+    return text.lower().replace('ё', 'е')
+
+
+def trie_pattern(node):
+    """Регулярное выражение для поддерева префиксного дерева."""
+    alternatives = [
+        re.escape(char) + trie_pattern(child)
+        for char, child in sorted(node.items()) if char
+    ]
+    if not alternatives:
+        return ''
+    word_ends = '' in node
+    if len(alternatives) == 1 and not word_ends:
+        return alternatives[0]
+    group = '(?:' + '|'.join(alternatives) + ')'
+    return group + '?' if word_ends else group
+
+
+class WordMatcher:
+    """Поиск любого слова из набора за один проход по тексту."""
+
+    def __init__(self, words):
+        self.words = tuple(
+            word for word in dict.fromkeys(map(normalize, words)) if word
+        )
+        trie = {}
+        for word in self.words:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        self._regex = (
+            re.compile(WORD_START + trie_pattern(trie)) if trie else None
+        )
+
+    def find(self, text):
+        """Первое найденное запрещённое слово или None."""
+        if self._regex is None:
+            return None
+        match = self._regex.search(normalize(text))
+        return match.group() if match else None
+
+    def __contains__(self, text):
+        return self.find(text) is not None
+
+
+def read_words(path):
+    """Слова из файла: по одному в строке, # — комментарий."""
+    with open(path, encoding='utf-8') as file:
+        return [
+            line.strip() for line in file
+            if line.strip() and not line.startswith('#')
+        ]
+
+
+_lock = threading.Lock()
+_matcher = None
+_source = None
+
+
+def file_source(path):
+    """Файл и время его изменения; None вместо времени, если он недоступен."""
+    try:
+        return path, os.stat(path).st_mtime_ns
+    except OSError as error:
+        if _source != (path, None):
+            logger.warning('Список слов %s недоступен: %s', path, error)
+        return path, None
+
+
+def load_words(source):
+    """Слова по source или None, если файл прочитать не удалось."""
+    if source is None:
+        return BAD_WORDS
+    path, mtime = source
+    if mtime is None:
+        return None
+    try:
+        return read_words(path)
+    except OSError as error:
+        logger.warning('Список слов %s недоступен: %s', path, error)
+        return None
+
+
+def get_matcher():
+    """
+    Автомат для текущего списка слов.
+
+    Список берётся из файла settings.BAD_WORDS_FILE, а без него — из
+    BAD_WORDS. Изменение файла замечается по времени модификации,
+    и автомат пересобирается без перезапуска процесса. Если файл
+    пропал или не читается, остаётся прежний автомат, а до первой
+    удачной загрузки — автомат по BAD_WORDS.
+    """
+    global _matcher, _source
+    path = getattr(settings, 'BAD_WORDS_FILE', None)
+    source = file_source(path) if path else None
+    if _matcher is not None and source == _source:
+        return _matcher
+    with _lock:
+        if _matcher is None or source != _source:
+            words = load_words(source)
+            if words is not None:
+                _matcher = WordMatcher(words)
+            elif _matcher is None:
+                _matcher = WordMatcher(BAD_WORDS)
+            _source = source
+    return _matcher
@@ -0,0 +1,67 @@
+"""Курсорная (keyset) пагинация по полю сортировки и первичному ключу."""
+from collections import namedtuple
+from datetime import date, datetime
+
+from django.db.models import DateTimeField, Q
+from django.http import Http404
+
+CURSOR_SEPARATOR = '_'
+# Наибольший первичный ключ, который база принимает в запросе (INTEGER
+# в SQLite и bigint в PostgreSQL).
+MAX_PK = 2 ** 63 - 1
+
+KeysetPage = namedtuple('KeysetPage', ('object_list', 'next_cursor'))
+
+
+def encode_cursor(obj, field):
+    """
+    Курсор указывает на последний объект страницы: значение поля и pk.
+
+    Объектом может быть и строка выборки .values() с полями field и id.
+    """
+    if isinstance(obj, dict):
+        value, pk = obj[field], obj['id']
+    else:
+        value, pk = getattr(obj, field), obj.pk
+    return f'{value.isoformat()}{CURSOR_SEPARATOR}{pk}'
+
+
+def decode_cursor(cursor, model, field):
+    """Разбирает курсор, на мусор в адресе отвечаем 404."""
+    parse = (
+        datetime.fromisoformat
+        if isinstance(model._meta.get_field(field), DateTimeField)
+        else date.fromisoformat
+    )
+    try:
+        value, pk = cursor.rsplit(CURSOR_SEPARATOR, 1)
+        value, pk = parse(value), int(pk)
+    except ValueError:
+        raise Http404('Некорректный курсор страницы.')
+    if not 0 < pk <= MAX_PK:
+        raise Http404('Некорректный курсор страницы.')
+    return value, pk
+
+
+def paginate(queryset, field, cursor, per_page, descending=False):
+    """
+    Возвращает страницу объектов, идущих после курсора.
+
+    Сортировка — по (field, pk), поэтому выборка любой страницы
+    обходится одним запросом по индексу без OFFSET.
+    """
+    direction = '-' if descending else ''
+    queryset = queryset.order_by(f'{direction}{field}', f'{direction}pk')
+    if cursor:
+        value, pk = decode_cursor(cursor, queryset.model, field)
+        lookup = 'lt' if descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{lookup}': value})
+            | Q(**{field: value, f'pk__{lookup}': pk})
+        )
+    object_list = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(object_list) > per_page:
+        object_list = object_list[:per_page]
+        next_cursor = encode_cursor(object_list[-1], field)
+    return KeysetPage(object_list, next_cursor)
@@ -0,0 +1,62 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.conf import settings
+from django.urls import reverse
+
+from conftest import PK
+from news.models import News
+
+pytestmark = pytest.mark.django_db
+
+API_LIST = reverse('news:api_list')
+API_DETAIL = reverse('news:api_detail', args=(PK,))
+API_COMMENTS = reverse('news:api_comments', args=(PK,))
+
+
+def test_api_news_list_pages(client, news_count):
+    """Лента API отдаётся страницами в порядке главной."""
+    data = client.get(API_LIST).json()
+    assert len(data['results']) == settings.NEWS_COUNT_ON_HOME_PAGE
+    dates = [item['date'] for item in data['results']]
+    assert dates == sorted(dates, reverse=True)
+    rest = client.get(API_LIST, {'after': data['next']}).json()
+    assert len(rest['results']) == 1
+    assert rest['next'] is None
+
+
+def test_api_fields_selection(client, news):
+    """Параметр fields ограничивает поля ответа."""
+    data = client.get(API_LIST, {'fields': 'id,title'}).json()
+    assert data['results'] == [{'id': news.id, 'title': news.title}]
+
+
+def test_api_unknown_field(client, news):
+    """Неизвестное поле даёт 400."""
+    response = client.get(API_LIST, {'fields': 'password'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_api_news_detail(client, news, comment):
+    """Новость отдаётся вместе с комментариями."""
+    data = client.get(API_DETAIL, {'comment_fields': 'text,author'}).json()
+    assert data['news']['title'] == news.title
+    assert data['comments'] == [
+        {'text': comment.text, 'author': comment.author.username}
+    ]
+
+
+def test_api_missing_news(client):
+    """Запрос несуществующей новости даёт 404."""
+    assert client.get(API_DETAIL).status_code == HTTPStatus.NOT_FOUND
+    assert client.get(API_COMMENTS).status_code == HTTPStatus.NOT_FOUND
+
+
+def test_api_comment_stream(client, news, comment_sorted_on_page):
+    """Комментарии отдаются потоком в порядке создания."""
+    response = client.get(API_COMMENTS, {'fields': 'id'})
+    assert response.streaming
+    data = json.loads(b''.join(response.streaming_content))
+    assert len(data) == len(comment_sorted_on_page)
+    assert News.objects.get().comment_set.count() == len(data)
@@ -0,0 +1,151 @@
+import json
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import AsyncClient
+from django.urls import include, path, reverse
+from pytest_django.asserts import assertRedirects
+
+from conftest import URL
+from news.forms import CommentForm
+from news.middleware import QueryBudgetExceeded
+from news.models import Comment
+from yanews.urls import auth_urls
+
+# Адреса те же, что и в синхронных тестах: news.async_urls подменяет
+# только представления.
+urlpatterns = [
+    path('', include('news.async_urls')),
+    path('auth/', include(auth_urls)),
+]
+
+pytestmark = [pytest.mark.django_db, pytest.mark.urls(__name__)]
+
+
+def run(request, *args, **kwargs):
+    """Выполняет запрос AsyncClient из синхронного теста."""
+    async def send():
+        return await request(*args, **kwargs)
+    return async_to_sync(send)()
+
+
+def get(client, url, **kwargs):
+    return run(client.get, url, **kwargs)
+
+
+@pytest.fixture
+def async_author_client(author):
+    client = AsyncClient()
+    client.force_login(author)
+    return client
+
+
+def test_news_list(news_count):
+    response = get(AsyncClient(), URL.home)
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.context['object_list']) == (
+        settings.NEWS_COUNT_ON_HOME_PAGE
+    )
+    assert response.context['next_cursor'] is not None
+
+
+def test_news_detail(async_author_client, comment):
+    response = get(async_author_client, URL.detail)
+    assert response.context['news'] == comment.news
+    assert list(response.context['comments']) == [comment]
+    assert isinstance(response.context['form'], CommentForm)
+
+
+def test_missing_news():
+    response = get(AsyncClient(), URL.detail)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_anonymous_page_cached(news, django_assert_num_queries):
+    """Повторный запрос анонима отдаётся из кэша без обращения к базе."""
+    client = AsyncClient()
+    first = get(client, URL.detail)
+    with django_assert_num_queries(0):
+        second = get(client, URL.detail)
+    assert second.content == first.content
+
+
+def test_not_modified(news):
+    client = AsyncClient()
+    response = get(client, URL.detail)
+    # Дополнительные аргументы AsyncClient в Django 3.2 — это заголовки.
+    response = get(client, URL.detail, **{
+        'If-None-Match': response['ETag'],
+        'If-Modified-Since': response['Last-Modified'],
+    })
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_comment_through_async_detail(async_author_client, news, form_data):
+    # Разбор multipart из AsyncClient в Django 3.2 не работает.
+    response = run(
+        async_author_client.post, URL.detail, data=urlencode(form_data),
+        content_type='application/x-www-form-urlencoded',
+    )
+    assertRedirects(
+        response, f'{URL.detail}#comments', fetch_redirect_response=False
+    )
+    assert Comment.objects.get().text == form_data['text']
+
+
+def test_method_not_allowed(news):
+    response = run(AsyncClient().put, URL.home)
+    assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
+
+
+def test_query_budget(settings, news):
+    """Запросы асинхронной страницы учитываются в бюджете."""
+    settings.QUERY_BUDGETS = {'news:home': 0}
+    with pytest.raises(QueryBudgetExceeded):
+        get(AsyncClient(), URL.home)
+
+
+def asgi_get(path, query=''):
+    """
+    GET настоящим ASGI-обработчиком Django.
+
+    В отличие от AsyncClient, он перебирает потоковый ответ в цикле
+    событий, как под uvicorn. Соединение теста, как и тестовый клиент,
+    не закрываем.
+    """
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path,
+        'query_string': query.encode(),
+        'headers': [(b'host', b'testserver')],
+    }
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    try:
+        async_to_sync(ASGIHandler())(scope, receive, send)
+    finally:
+        request_started.connect(close_old_connections)
+        request_finished.connect(close_old_connections)
+    body = b''.join(message.get('body', b'') for message in messages)
+    return messages[0]['status'], body
+
+
+def test_comment_stream_under_asgi(comment):
+    status, body = asgi_get(
+        reverse('news:api_comments', args=(comment.news_id,)), 'fields=text'
+    )
+    assert status == HTTPStatus.OK
+    assert json.loads(body) == [{'text': comment.text}]
@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from conftest import URL
+from news.auth import USER_KEY, get_cache
+
+pytestmark = pytest.mark.django_db
+
+
+def queries(client, url):
+    with CaptureQueriesContext(connection) as context:
+        client.get(url)
+    return [query['sql'] for query in context.captured_queries]
+
+
+def user_queries(sql_list):
+    return [sql for sql in sql_list if sql.startswith('SELECT "auth_user"')]
+
+
+def session_queries(sql_list):
+    return [
+        sql for sql in sql_list if sql.startswith('SELECT "django_session"')
+    ]
+
+
+def test_user_cached(author_client, author, news):
+    """Пользователь загружается из базы только при первом запросе."""
+    assert len(user_queries(queries(author_client, URL.detail))) == 1
+    assert user_queries(queries(author_client, URL.detail)) == []
+
+
+def test_user_change_resets_cache(author_client, author, news):
+    author_client.get(URL.detail)
+    author.username = 'Новое имя'
+    author.save()
+    response = author_client.get(URL.detail)
+    assert response.context['user'].username == 'Новое имя'
+
+
+def test_logout_resets_cache(author_client, author, news):
+    author_client.get(URL.detail)
+    key = USER_KEY.format(pk=author.pk)
+    assert get_cache().get(key) is not None
+    author_client.post(URL.logout)
+    assert get_cache().get(key) is None
+
+
+def test_user_cache_disabled(author_client, news, settings):
+    settings.USER_CACHE_TIMEOUT = 0
+    author_client.get(URL.detail)
+    assert len(user_queries(queries(author_client, URL.detail))) == 1
+
+
+@pytest.mark.parametrize('engine, session_reads', (
+    ('django.contrib.sessions.backends.db', 1),
+    ('django.contrib.sessions.backends.cached_db', 0),
+    ('django.contrib.sessions.backends.signed_cookies', 0),
+))
+def test_session_profiles(author, news, settings, engine, session_reads):
+    """Кэш и подписанные cookie избавляют от чтения сессии из базы."""
+    settings.SESSION_ENGINE = engine
+    client = Client()
+    client.force_login(author)
+    client.get(URL.detail)
+    sql_list = queries(client, URL.detail)
+    assert len(session_queries(sql_list)) == session_reads
+    assert user_queries(sql_list) == []
@@ -1,9 +1,18 @@
+import os
+import subprocess
+import sys
+from http import HTTPStatus
+
 from django.conf import settings
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
 
 import pytest
 
 from conftest import URL
 from news.forms import CommentForm
+from news.models import Comment
 
 pytestmark = pytest.mark.django_db
 
@@ -36,6 +45,45 @@ def test_news_sorted_on_main(client, news_count):
     assert all_dates == sorted_dates
 
 
+def test_news_next_page_on_main(client, news_count):
+    """Курсор главной страницы ведёт к оставшимся новостям."""
+    response = client.get(URL.home)
+    next_cursor = response.context['next_cursor']
+    assert next_cursor is not None
+    response = client.get(URL.home, {'after': next_cursor})
+    titles = [news.title for news in response.context['object_list']]
+    assert titles == [min(news_count, key=lambda news: news.date).title]
+    assert response.context['next_cursor'] is None
+
+
+def test_comments_paginated_on_detail(
+        client, settings, news, comment_sorted_on_page):
+    """Комментарии на странице новости выводятся по страницам."""
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 4
+    shown = []
+    cursor = ''
+    while cursor is not None:
+        response = client.get(URL.detail, {'after': cursor})
+        page = response.context['comments']
+        assert len(page) <= settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+        shown.extend(page)
+        cursor = response.context['next_cursor']
+    assert len(shown) == len(comment_sorted_on_page)
+    assert shown == list(Comment.objects.order_by('created', 'pk'))
+
+
+def test_comment_count_on_main(author_client, news, form_data):
+    """Счётчик комментариев на главной не загружает сами комментарии."""
+    author_client.post(URL.detail, data=form_data)
+    with CaptureQueriesContext(connection) as queries:
+        response = author_client.get(URL.home)
+    assert 'Комментариев: 1' in response.content.decode()
+    comment_table = Comment._meta.db_table
+    assert not any(
+        comment_table in query['sql'] for query in queries.captured_queries
+    )
+
+
 @pytest.mark.parametrize(
     ('client_type', 'forms'),
     [(pytest.lazy_fixture('client'), False),
@@ -48,3 +96,87 @@ def test_comment_form_access(client_type, forms, client, admin_client, news):
             response.context['form'], CommentForm
         )
     assert ('form' in response.context) is forms
+
+
+@pytest.mark.parametrize('url', (URL.home, URL.detail))
+def test_anonymous_page_cached(client, url, news, django_assert_num_queries):
+    """Повторный запрос анонима отдаётся из кэша без запросов к базе."""
+    first = client.get(url)
+    with django_assert_num_queries(0):
+        second = client.get(url)
+    assert second.content == first.content
+
+
+@pytest.mark.parametrize('url', (URL.home, URL.detail))
+def test_unused_query_params_share_page(
+        client, url, news, django_assert_num_queries):
+    """Посторонние параметры адреса не заводят новых записей в кэше."""
+    client.get(url)
+    with django_assert_num_queries(0):
+        client.get(url, {'x': 'random'})
+
+
+@pytest.mark.parametrize(('backend', 'starts'), (
+    ('django.core.cache.backends.locmem.LocMemCache', False),
+    ('django.core.cache.backends.memcached.PyMemcacheCache', True),
+))
+def test_multiple_workers_need_shared_cache(backend, starts):
+    """Несколько процессов с кэшем в памяти процесса не запускаются."""
+    result = subprocess.run(
+        [sys.executable, '-c', 'import yanews.settings'],
+        cwd=settings.BASE_DIR, capture_output=True, text=True,
+        env={**os.environ, 'WEB_CONCURRENCY': '2', 'CACHE_BACKEND': backend},
+    )
+    assert (result.returncode == 0) is starts
+    assert ('ImproperlyConfigured' in result.stderr) is not starts
+
+
+def test_cached_page_invalidated_by_comment(author_client, news, form_data):
+    """Новый комментарий сразу виден на закэшированных страницах."""
+    client = Client()
+    client.get(URL.home)
+    client.get(URL.detail)
+    author_client.post(URL.detail, data=form_data)
+    assert form_data['text'] in client.get(URL.detail).content.decode()
+    assert 'Комментариев: 1' in client.get(URL.home).content.decode()
+
+
+def test_cached_page_invalidated_by_news_edit(client, news):
+    """Изменение новости сразу видно на закэшированных страницах."""
+    client.get(URL.home)
+    client.get(URL.detail)
+    news.title = 'Новый заголовок'
+    news.save()
+    assert news.title in client.get(URL.home).content.decode()
+    assert news.title in client.get(URL.detail).content.decode()
+
+
+@pytest.mark.parametrize('url', (URL.home, URL.detail))
+def test_not_modified_by_etag(client, url, news):
+    """Клиент с актуальным ETag получает 304 без тела."""
+    etag = client.get(url)['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.content == b''
+
+
+def test_not_modified_since(client, news):
+    """Страница новости поддерживает If-Modified-Since."""
+    last_modified = client.get(URL.detail)['Last-Modified']
+    response = client.get(URL.detail, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_etag_changes_after_comment(author_client, news, form_data):
+    """После нового комментария старый ETag больше не подходит."""
+    client = Client()
+    etag = client.get(URL.detail)['ETag']
+    author_client.post(URL.detail, data=form_data)
+    response = client.get(URL.detail, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_etag_depends_on_user(client, admin_client, news):
+    """Страница пользователя и анонима не делит один ETag."""
+    anonymous_etag = client.get(URL.detail)['ETag']
+    assert admin_client.get(URL.detail)['ETag'] != anonymous_etag
@@ -0,0 +1,42 @@
+from unittest import mock
+
+import pytest
+from django.db import connection
+
+from news.db import check_connections
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.mark.skipif(connection.vendor != 'sqlite', reason='Прагмы SQLite.')
+def test_sqlite_pragmas(settings):
+    """Соединение открыто с прагмами из настроек."""
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA busy_timeout')
+        assert cursor.fetchone()[0] == settings.SQLITE_PRAGMAS['busy_timeout']
+        cursor.execute('PRAGMA synchronous')
+        # 1 — NORMAL.
+        assert cursor.fetchone()[0] == 1
+
+
+@pytest.mark.parametrize('usable, closed', ((True, False), (False, True)))
+def test_broken_persistent_connection_closed(usable, closed):
+    """Перед запросом закрывается только оборванное соединение."""
+    connection.ensure_connection()
+    connection.health_checked_at = 0
+    with mock.patch.dict(connection.settings_dict, CONN_MAX_AGE=60), \
+            mock.patch.object(connection, 'is_usable', return_value=usable), \
+            mock.patch.object(connection, 'close') as close:
+        check_connections(sender=None)
+    assert close.called == closed
+
+
+def test_recently_checked_connection_not_pinged():
+    """Между проверками запросы не платят за неё походом в базу."""
+    connection.ensure_connection()
+    connection.health_checked_at = 0
+    with mock.patch.dict(connection.settings_dict, CONN_MAX_AGE=60), \
+            mock.patch.object(connection, 'is_usable') as is_usable:
+        check_connections(sender=None)
+        check_connections(sender=None)
+    assert is_usable.call_count == 1
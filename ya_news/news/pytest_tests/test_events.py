@@ -0,0 +1,261 @@
+import asyncio
+import json
+from unittest import mock
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.urls import reverse
+
+from conftest import URL
+from news import events
+from news.models import Comment
+from news.sse import events_url, with_comment_events
+
+pytestmark = pytest.mark.django_db
+
+CHANNEL = 'news:1:comments'
+SUBSCRIBERS = 1000
+CLIENTS = 200
+
+
+@pytest.fixture
+def backend():
+    events.get_backend.cache_clear()
+    yield events.get_backend()
+    events.get_backend.cache_clear()
+
+
+@pytest.fixture
+def keep_connection():
+    """Как и тестовый клиент Django, не закрываем соединение теста."""
+    with mock.patch('news.sse.close_old_connections'):
+        yield
+
+
+def subscribe(backend, maxsize=10, last_id=None):
+    subscription = events.Subscription(lambda: None, maxsize)
+    return subscription, backend.subscribe(CHANNEL, subscription, last_id)
+
+
+def numbers(subscription):
+    return [event.data['number'] for event in subscription.drain()]
+
+
+def test_many_subscribers(backend):
+    """Каждый подписчик получает все события своего канала по порядку."""
+    subscriptions = [subscribe(backend)[0] for _ in range(SUBSCRIBERS)]
+    other = events.Subscription(lambda: None, 10)
+    backend.subscribe('news:2:comments', other)
+    for number in range(5):
+        backend.publish(CHANNEL, {'number': number})
+    for subscription in subscriptions:
+        assert numbers(subscription) == list(range(5))
+    assert other.drain() == []
+
+
+def test_buffer_is_bounded(backend):
+    """Отстающий подписчик не копит события и не мешает остальным."""
+    slow, _ = subscribe(backend, maxsize=3)
+    fast, _ = subscribe(backend, maxsize=3)
+    for number in range(10):
+        backend.publish(CHANNEL, {'number': number})
+        assert numbers(fast) == [number]
+    assert slow.overflowed
+    assert slow.drain() == []
+    assert not fast.overflowed
+
+
+def test_replay_after_reconnect(backend):
+    subscription, _ = subscribe(backend)
+    backend.publish(CHANNEL, {'number': 0})
+    last_id = subscription.drain()[-1].id
+    backend.unsubscribe(CHANNEL, subscription)
+    backend.publish(CHANNEL, {'number': 1})
+    _, missed = subscribe(backend, last_id=last_id)
+    assert [event.data for event in missed] == [{'number': 1}]
+
+
+def test_forgotten_events_reset(backend, monkeypatch):
+    monkeypatch.setattr(events, 'HISTORY_SIZE', 2)
+    subscription, _ = subscribe(backend)
+    for number in range(3):
+        backend.publish(CHANNEL, {'number': number})
+    first_id = subscription.drain()[0].id
+    backend.unsubscribe(CHANNEL, subscription)
+    backend.publish(CHANNEL, {'number': 3})
+    assert subscribe(backend, last_id=first_id)[1] is None
+
+
+@pytest.mark.parametrize('last_id', ('другой-1', 'мусор'))
+def test_unknown_last_id_resets(backend, last_id):
+    """Чужой id или мусор: пропущенное не восстановить."""
+    assert subscribe(backend, last_id=last_id)[1] is None
+
+
+def test_comment_changes_published(
+        author, author_client, news, form_data, backend,
+        django_capture_on_commit_callbacks):
+    subscription = events.Subscription(lambda: None, 10)
+    backend.subscribe(events.channel_name(news.pk), subscription)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(URL.detail, data=form_data)
+        comment = Comment.objects.get()
+        author_client.post(
+            reverse('news:edit', args=(comment.pk,)),
+            data={'text': 'Исправлено'},
+        )
+        author_client.delete(reverse('news:delete', args=(comment.pk,)))
+    created, updated, deleted = [
+        event.data for event in subscription.drain()
+    ]
+    assert created['type'] == events.CREATED
+    assert created['author'] == author.username
+    assert created['text'] == form_data['text']
+    assert updated == {
+        'type': events.UPDATED, 'id': comment.pk, 'text': 'Исправлено'
+    }
+    assert deleted == {'type': events.DELETED, 'id': comment.pk}
+
+
+def test_flagged_comment_published_as_deleted(
+        comment, backend, django_capture_on_commit_callbacks):
+    """Для подписчиков отмеченный модерацией комментарий удалён."""
+    subscription = events.Subscription(lambda: None, 10)
+    backend.subscribe(events.channel_name(comment.news_id), subscription)
+    with django_capture_on_commit_callbacks(execute=True):
+        comment.is_flagged = True
+        comment.save()
+    event, = subscription.drain()
+    assert event.data == {'type': events.DELETED, 'id': comment.pk}
+
+
+def test_no_event_before_commit(author_client, news, form_data, backend):
+    """Пока транзакция не зафиксирована, подписчики ничего не получают."""
+    subscription = events.Subscription(lambda: None, 10)
+    backend.subscribe(events.channel_name(news.pk), subscription)
+    author_client.post(URL.detail, data=form_data)
+    assert subscription.drain() == []
+
+
+class SseClient:
+    """Клиент потока: копит отправленное ему и отключается по команде."""
+
+    def __init__(self, path, method='GET', last_id=None):
+        headers = [(b'last-event-id', last_id.encode())] if last_id else []
+        self.scope = {
+            'type': 'http', 'method': method, 'path': path,
+            'headers': headers,
+        }
+        self.messages = []
+        self.disconnected = asyncio.Event()
+
+    async def receive(self):
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        self.messages.append(message)
+
+    @property
+    def status(self):
+        return self.messages[0]['status']
+
+    @property
+    def body(self):
+        return b''.join(message.get('body', b'') for message in self.messages)
+
+    def events(self):
+        return [
+            json.loads(line[len(b'data: '):])
+            for line in self.body.splitlines()
+            if line.startswith(b'data: ')
+        ]
+
+
+async def django_application(scope, receive, send):
+    raise AssertionError('Поток комментариев ушёл в Django.')
+
+
+application = with_comment_events(django_application)
+
+
+async def wait_for(condition, timeout=5):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(poll(), timeout)
+
+
+def run_clients(clients, action=None, until=None):
+    """Подключает клиентов, выполняет action и ждёт until у каждого."""
+    async def scenario():
+        tasks = [
+            asyncio.ensure_future(
+                application(client.scope, client.receive, client.send)
+            )
+            for client in clients
+        ]
+        await wait_for(lambda: all(client.messages for client in clients))
+        if action is not None:
+            action()
+        if until is not None:
+            await wait_for(lambda: all(until(client) for client in clients))
+        for client in clients:
+            client.disconnected.set()
+        await asyncio.wait_for(asyncio.gather(*tasks), 5)
+    async_to_sync(scenario)()
+
+
+def test_stream_to_many_clients(news, backend, keep_connection):
+    channel = events.channel_name(news.pk)
+    clients = [SseClient(events_url(news.pk)) for _ in range(CLIENTS)]
+    run_clients(
+        clients,
+        action=lambda: backend.publish(
+            channel, {'type': events.DELETED, 'id': 1}
+        ),
+        until=lambda client: client.events(),
+    )
+    for client in clients:
+        assert client.status == 200
+        assert client.events() == [{'type': events.DELETED, 'id': 1}]
+    assert backend.subscriber_count(channel) == 0
+
+
+def test_overflow_sends_reset(news, backend, settings, keep_connection):
+    settings.NEWS_EVENTS_BUFFER = 2
+    client = SseClient(events_url(news.pk))
+
+    def flood():
+        # Клиент не успевает прочитать ни одного события.
+        for number in range(5):
+            backend.publish(events.channel_name(news.pk), {'id': number})
+
+    run_clients(
+        [client], action=flood,
+        until=lambda client: b'event: reset' in client.body,
+    )
+    assert client.events() == [{}]
+
+
+def test_reconnect_with_unknown_id(news, backend, keep_connection):
+    client = SseClient(events_url(news.pk), last_id='другой-1')
+    run_clients([client], until=lambda client: b'reset' in client.body)
+    assert client.messages[-1].get('more_body') is None
+
+
+@pytest.mark.parametrize('path, method, status', (
+    ('/news/100/events/', 'GET', 404),
+    ('/news/1/events/', 'POST', 405),
+))
+def test_stream_errors(backend, keep_connection, news, path, method, status):
+    client = SseClient(path, method)
+    run_clients([client])
+    assert client.status == status
+
+
+def test_detail_page_links_stream(client, news, settings):
+    settings.ASYNC_VIEWS = True
+    response = client.get(URL.detail)
+    assert response.context['events_url'] == events_url(news.pk)
+    assert 'EventSource' in response.content.decode()
@@ -0,0 +1,71 @@
+from datetime import timedelta
+from math import ceil
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from news.cache import list_version
+from news.factories import (
+    START, create_comments, create_news, create_users
+)
+from news.models import Comment, News
+from news.search import search_news
+
+pytestmark = pytest.mark.django_db
+
+NEWS = 300
+PER_NEWS = 3
+USERS = 1000
+
+
+def test_datasets_are_deterministic():
+    """Фабрики дают одинаковые данные и ключи как в базе."""
+    users = create_users(2)
+    news = create_news(NEWS)
+    comments = create_comments(news, users, PER_NEWS)
+    assert [user.username for user in users] == [
+        'Пользователь 0', 'Пользователь 1'
+    ]
+    assert not users[0].has_usable_password()
+    assert news[1].date == START.date() - timedelta(days=1)
+    assert list(News.objects.order_by('pk').values_list(
+        'pk', 'title', 'date'
+    )) == [(item.pk, item.title, item.date) for item in news]
+    assert list(Comment.objects.order_by('pk').values_list(
+        'pk', 'news', 'author', 'created'
+    )) == [
+        (comment.pk, comment.news_id, comment.author_id, comment.created)
+        for comment in comments
+    ]
+    assert comments[PER_NEWS - 1].created == START + 2 * timedelta(minutes=1)
+
+
+def test_signal_side_effects():
+    """Счётчики, поиск и штамп ленты обновлены, как сигналами."""
+    version = list_version()
+    news = create_news(2)
+    create_comments(news[:1], create_users(1), PER_NEWS)
+    assert list_version() != version
+    assert News.objects.get(pk=news[0].pk).comment_count == PER_NEWS
+    assert news[0].comment_count == PER_NEWS
+    assert News.objects.get(pk=news[1].pk).comment_count == 0
+    assert len(search_news('комментарий').object_list) == 1
+    assert len(search_news('новость').object_list) == 2
+
+
+def test_rows_inserted_in_batches():
+    """Записи вставляются пачками по лимиту базы, а не по одной."""
+    with CaptureQueriesContext(connection) as captured:
+        users = create_users(USERS)
+    fields = [
+        field for field in get_user_model()._meta.concrete_fields
+        if not field.primary_key
+    ]
+    batch = connection.ops.bulk_batch_size(fields, users)
+    inserts = [
+        query for query in captured if query['sql'].startswith('INSERT')
+    ]
+    assert len(inserts) == ceil(USERS / batch)
+    assert get_user_model().objects.count() == USERS
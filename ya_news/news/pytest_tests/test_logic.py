@@ -1,11 +1,19 @@
+import json
+import os
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.management import call_command
+from django.urls import reverse
 from pytest_django.asserts import assertFormError, assertRedirects
 
 from conftest import URL
 from news.forms import BAD_WORDS, WARNING
-from news.models import Comment
+from news.management.commands.remoderate_comments import words_digest
+from news.models import Comment, News
+from news.moderation import get_matcher
+from news.search import search_news
 
 pytestmark = pytest.mark.django_db
 
@@ -21,6 +29,8 @@ def test_user_can_create_comment(author_client, author, news, form_data):
     assert new_comment.text == form_data['text']
     assert new_comment.author == author
     assert new_comment.news == news
+    news.refresh_from_db()
+    assert news.comment_count == comment_count + 1
 
 
 def test_anonymous_user_cant_create_comment(client, news, form_data):
@@ -81,3 +91,172 @@ def test_other_user_cant_delete_comment(admin_client, form_data, comment):
     after_comment_count = Comment.objects.count()
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert after_comment_count == before_comment_count
+
+
+def test_comment_count_after_delete(author_client, news, form_data):
+    """Удаление комментария уменьшает счётчик у новости."""
+    author_client.post(URL.detail, data=form_data)
+    author_client.delete(URL.delete)
+    news.refresh_from_db()
+    assert news.comment_count == 0
+
+
+def test_rebuild_comment_count(news, comment):
+    """Команда пересчитывает рассинхронизированный счётчик."""
+    News.objects.filter(pk=news.pk).update(comment_count=100)
+    call_command('rebuild_comment_count', stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == Comment.objects.filter(news=news).count()
+
+
+def test_create_comment_queries(
+        author_client, news, form_data, django_assert_num_queries):
+    """
+    Создание комментария не загружает новость.
+
+    Сессия, пользователь, точка сохранения, обновление счётчика,
+    вставка комментария, запись в индекс поиска, освобождение точки
+    сохранения.
+    """
+    with django_assert_num_queries(7):
+        author_client.post(URL.detail, data=form_data)
+
+
+def test_edit_comment_queries(
+        author_client, comment, form_data, django_assert_num_queries):
+    """
+    Редактирование комментария загружает его один раз.
+
+    Сессия, пользователь, комментарий, обновление комментария
+    и замена его версии в индексе поиска.
+    """
+    with django_assert_num_queries(6):
+        author_client.post(URL.edit, data=form_data)
+
+
+def test_delete_comment_queries(
+        author_client, comment, django_assert_num_queries):
+    """
+    Удаление комментария загружает его один раз.
+
+    Сессия, пользователь, комментарий, точка сохранения, удаление,
+    удаление из индекса поиска, обновление счётчика, освобождение
+    точки сохранения.
+    """
+    with django_assert_num_queries(8):
+        author_client.delete(URL.delete)
+
+
+def test_comment_to_missing_news(author_client, form_data):
+    """Комментарий к несуществующей новости даёт 404."""
+    comment_count = Comment.objects.count()
+    response = author_client.post(URL.detail, data=form_data)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert Comment.objects.count() == comment_count
+
+
+def test_invalid_comment_keeps_thread(author_client, comment):
+    """При ошибке в форме комментарии новости остаются на странице."""
+    response = author_client.post(
+        URL.detail, data={'text': f'{BAD_WORDS[0]} и тд.'}
+    )
+    assert list(response.context['comments']) == [comment]
+
+
+@pytest.mark.parametrize('workers', (0, 2))
+def test_remoderate_comments(author, news, settings, tmp_path, workers):
+    """Команда отмечает старые комментарии по новому списку слов."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('капуст\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=text)
+        for text in ('Капуста!', 'Морковь', 'капустный суп', 'Свёкла')
+    )
+    Comment.objects.filter(text='Морковь').update(is_flagged=True)
+    checkpoint = tmp_path / 'checkpoint.json'
+    call_command(
+        'remoderate_comments', chunk_size=3, workers=workers,
+        checkpoint=checkpoint, stdout=StringIO(),
+    )
+    flagged = Comment.objects.filter(is_flagged=True)
+    assert sorted(flagged.values_list('text', flat=True)) == [
+        'Капуста!', 'капустный суп'
+    ]
+    assert not checkpoint.exists()
+
+
+def test_remoderate_comments_new_words(author, news, settings, tmp_path):
+    """Повторный запуск с другим списком слов проверяет всё заново."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('капуст\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=text)
+        for text in ('Капуста!', 'Морковь')
+    )
+    checkpoint = tmp_path / 'checkpoint.json'
+    options = {'workers': 0, 'checkpoint': checkpoint, 'stdout': StringIO()}
+    call_command('remoderate_comments', **options)
+    words_file.write_text('морков\n', encoding='utf-8')
+    stat = words_file.stat()
+    os.utime(words_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    call_command('remoderate_comments', **options)
+    assert list(
+        Comment.objects.filter(is_flagged=True).values_list('text', flat=True)
+    ) == ['Морковь']
+
+
+def test_remoderate_comments_restarts_for_other_words(
+        author, news, tmp_path):
+    """Точка, записанная с другим списком слов, не продолжается."""
+    Comment.objects.create(news=news, author=author, text=BAD_WORDS[0])
+    checkpoint = tmp_path / 'checkpoint.json'
+    checkpoint.write_text(json.dumps({'last_pk': 10 ** 6, 'words': 'old'}))
+    call_command(
+        'remoderate_comments', workers=0, checkpoint=checkpoint,
+        stdout=StringIO(),
+    )
+    assert Comment.objects.filter(is_flagged=True).count() == 1
+
+
+def test_remoderate_comments_resumes(author, news, tmp_path):
+    """С контрольной точки проверяются только новые комментарии."""
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=BAD_WORDS[0])
+        for _ in range(2)
+    )
+    old_pk = Comment.objects.order_by('pk').values_list('pk', flat=True)[0]
+    checkpoint = tmp_path / 'checkpoint.json'
+    checkpoint.write_text(json.dumps({
+        'last_pk': old_pk, 'words': words_digest(get_matcher().words),
+    }))
+    call_command(
+        'remoderate_comments', workers=0, checkpoint=checkpoint,
+        stdout=StringIO(),
+    )
+    assert list(
+        Comment.objects.filter(is_flagged=True).values_list('pk', flat=True)
+    ) == [old_pk + 1]
+
+
+def test_flagged_comments_hidden(client, author, news, settings, tmp_path):
+    """Отмеченные комментарии пропадают со страницы, из API и поиска."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('капуст\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    for text in ('Капуста!', 'Морковь'):
+        Comment.objects.create(news=news, author=author, text=text)
+    assert 'Капуста!' in client.get(URL.detail).content.decode()
+    call_command('remoderate_comments', workers=0, stdout=StringIO())
+    # Страница из кэша сброшена командой.
+    content = client.get(URL.detail).content.decode()
+    assert 'Капуста!' not in content
+    assert 'Морковь' in content
+    api = client.get(reverse('news:api_detail', args=(news.pk,))).json()
+    assert [row['text'] for row in api['comments']] == ['Морковь']
+    response = client.get(reverse('news:api_comments', args=(news.pk,)))
+    stream = json.loads(b''.join(response.streaming_content))
+    assert [row['text'] for row in stream] == ['Морковь']
+    assert search_news('капуста').object_list == []
+    assert len(search_news('морковь').object_list) == 1
@@ -0,0 +1,111 @@
+import threading
+
+import pytest
+
+from conftest import URL
+from news.forms import BAD_WORDS
+from news.metrics import (
+    CACHE_REQUESTS, CONTENT_TYPE, FORM_ERRORS, REQUEST_LATENCY,
+    REQUEST_QUERIES, REQUESTS, WRITES, Counter, Histogram
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def test_endpoint_renders_metrics(client, news):
+    client.get(URL.detail)
+    response = client.get('/metrics')
+    assert response['Content-Type'] == CONTENT_TYPE
+    content = response.content.decode()
+    assert '# TYPE http_request_duration_seconds histogram' in content
+    assert (
+        'http_request_duration_seconds_bucket{view="news:detail",'
+        'method="GET",le="+Inf"}'
+    ) in content
+    assert 'http_request_db_queries_count{view="news:detail"}' in content
+
+
+def test_request_observed(client, news):
+    key = ('news:detail', 'GET', '200')
+    before = REQUESTS.values().get(key, 0)
+    queries = REQUEST_QUERIES.values().get(('news:detail',))
+    client.get(URL.detail)
+    assert REQUESTS.values()[key] == before + 1
+    assert REQUEST_LATENCY.values()[('news:detail', 'GET')][-1] >= 1
+    after = REQUEST_QUERIES.values()[('news:detail',)]
+    # Без кэша страница новости читает базу.
+    assert after[-2] > (queries[-2] if queries else 0)
+
+
+def test_page_cache_counted(client, news):
+    hits = CACHE_REQUESTS.values().get(('page', 'hit'), 0)
+    misses = CACHE_REQUESTS.values().get(('page', 'miss'), 0)
+    client.get(URL.detail)
+    client.get(URL.detail)
+    assert CACHE_REQUESTS.values()[('page', 'miss')] == misses + 1
+    assert CACHE_REQUESTS.values()[('page', 'hit')] == hits + 1
+
+
+def test_unknown_method_labelled_other(client, news):
+    before = REQUEST_LATENCY.values().get(('news:detail', 'other'))
+    client.generic('BREW', URL.detail)
+    after = REQUEST_LATENCY.values()[('news:detail', 'other')]
+    assert after[-1] == (before[-1] if before else 0) + 1
+    assert not any(key[1] == 'BREW' for key in REQUESTS.values())
+
+
+def test_comment_writes_counted(author_client, news, form_data):
+    before = WRITES.values().get(('created',), 0)
+    author_client.post(URL.detail, data=form_data)
+    assert WRITES.values()[('created',)] == before + 1
+
+
+def test_bad_words_counted(author_client, news):
+    key = ('CommentForm', 'text', 'bad_words')
+    before = FORM_ERRORS.values().get(key, 0)
+    author_client.post(URL.detail, data={'text': f'{BAD_WORDS[0]} и тд.'})
+    assert FORM_ERRORS.values()[key] == before + 1
+
+
+def test_thread_shards_summed():
+    counter = Counter('test_total', 'Проверка.', ('kind',))
+    histogram = Histogram('test_seconds', 'Проверка.', (), (1, 2))
+
+    def work():
+        for value in range(100):
+            counter.inc(kind='a')
+            histogram.observe(value % 3)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.values() == {('a',): 400}
+    assert list(histogram.samples()) == [
+        'test_seconds_bucket{le="1"} 268',
+        'test_seconds_bucket{le="2"} 400',
+        'test_seconds_bucket{le="+Inf"} 400',
+        'test_seconds_sum 396',
+        'test_seconds_count 400',
+    ]
+
+
+def test_finished_thread_shards_merged():
+    counter = Counter('test_total', 'Проверка.', ('kind',))
+    histogram = Histogram('test_seconds', 'Проверка.', (), (1,))
+
+    def work():
+        counter.inc(kind='a')
+        histogram.observe(0.5)
+
+    for _ in range(10):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    # Копии завершившихся потоков перенесены в общую.
+    assert not counter._shards
+    assert not histogram._shards
+    counter.inc(kind='a')
+    assert counter.values() == {('a',): 11}
+    assert histogram.values() == {(): [10, 0, 5.0, 10]}
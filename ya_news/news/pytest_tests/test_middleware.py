@@ -0,0 +1,55 @@
+import logging
+
+import pytest
+from django.db import connection
+
+from conftest import URL
+from news.middleware import (
+    QueryBudgetExceeded, QueryRecorder, current_recorders
+)
+from news.models import News
+
+pytestmark = pytest.mark.django_db
+
+
+def test_over_budget_request_fails(client, settings, news):
+    """Превышение бюджета запросов роняет запрос в тестах."""
+    settings.QUERY_BUDGETS = {'news:home': 0}
+    with pytest.raises(QueryBudgetExceeded):
+        client.get(URL.home)
+
+
+def test_over_budget_request_logged(client, settings, caplog, news):
+    """В режиме разработки превышение бюджета только логируется."""
+    settings.QUERY_BUDGET_MODE = 'warn'
+    settings.QUERY_BUDGETS = {'news:home': 0}
+    with caplog.at_level(logging.WARNING, logger='news.middleware'):
+        client.get(URL.home)
+    record, = caplog.records
+    assert record.query_budget['url_name'] == 'news:home'
+    assert record.query_budget['queries'] > 0
+
+
+def test_recorder_detects_n_plus_one(news):
+    """Одинаковые запросы с разными параметрами считаются N+1."""
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        for pk in range(3):
+            News.objects.filter(pk=pk).first()
+        list(News.objects.filter(pk__in=range(5)))
+        list(News.objects.filter(pk__in=range(2)))
+    assert recorder.total == 5
+    assert sorted(recorder.repeated(3).values()) == [3]
+    assert sorted(recorder.repeated(2).values()) == [2, 3]
+
+
+def test_recorder_ignores_other_requests(news):
+    """Под ASGI счётчик не считает запросы другого запроса."""
+    recorder = QueryRecorder()
+    token = current_recorders.set((QueryRecorder(),))
+    try:
+        with connection.execute_wrapper(recorder):
+            News.objects.first()
+    finally:
+        current_recorders.reset(token)
+    assert recorder.total == 0
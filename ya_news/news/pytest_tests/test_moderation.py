@@ -0,0 +1,57 @@
+import os
+
+import pytest
+
+from news.moderation import WordMatcher, get_matcher
+
+
+@pytest.mark.parametrize(
+    'text, found',
+    (
+        ('Ты РЕДИСКА!', 'редиска'),
+        ('негодяйка', 'негодяй'),
+        ('ещё одна «ёлка»', 'елка'),
+        ('безнегодяйный', None),
+        ('Сельдерей вырос', None),
+        ('хорошая редиса', None),
+    ),
+)
+def test_matcher_finds_words(text, found):
+    """Слова ищутся без учёта регистра и «ё» от начала слова текста."""
+    matcher = WordMatcher(('Редиска', 'негодяй', 'ёлка', 'дерев'))
+    assert matcher.find(text) == found
+
+
+def test_matcher_overlapping_words():
+    """Слова, являющиеся суффиксами друг друга, находятся все."""
+    matcher = WordMatcher(('кот', 'окот', 'то'))
+    assert matcher.find('о то') == 'то'
+    assert matcher.find('окот') == 'окот'
+    assert 'скот' not in matcher
+
+
+def test_matcher_reloads_file(tmp_path, settings):
+    """Изменение файла со словами подхватывается без перезапуска."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('# список\nбяка\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    assert 'вот бяка' in get_matcher()
+    assert 'вот бука' not in get_matcher()
+    words_file.write_text('бука\n', encoding='utf-8')
+    stat = words_file.stat()
+    os.utime(words_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert 'вот бука' in get_matcher()
+    assert 'вот бяка' not in get_matcher()
+
+
+def test_missing_file_keeps_matcher(tmp_path, settings, caplog):
+    """Пропавший файл не роняет проверку: остаётся прежний список."""
+    words_file = tmp_path / 'bad_words.txt'
+    words_file.write_text('бяка\n', encoding='utf-8')
+    settings.BAD_WORDS_FILE = str(words_file)
+    assert 'вот бяка' in get_matcher()
+    words_file.unlink()
+    assert 'вот бяка' in get_matcher()
+    assert 'недоступен' in caplog.text
+    settings.BAD_WORDS_FILE = str(tmp_path / 'missing.txt')
+    assert 'вот бяка' in get_matcher()
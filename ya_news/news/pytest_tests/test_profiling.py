@@ -0,0 +1,66 @@
+import pstats
+import re
+
+import pytest
+from django.template import Context, Template
+
+from conftest import URL
+from news.models import News
+from news.profiling import record_timings
+
+pytestmark = pytest.mark.django_db
+
+METRIC = re.compile(r'(\w+);dur=([\d.]+)')
+
+
+def server_timing(response):
+    return {
+        name: float(duration)
+        for name, duration in METRIC.findall(response['Server-Timing'])
+    }
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.PROFILING = True
+    settings.PROFILING_SAMPLE_RATE = 0
+    settings.PROFILING_DIR = tmp_path
+    return settings
+
+
+def test_server_timing_phases(
+        profiling, author_client, news, comment_sorted_on_page):
+    response = author_client.get(URL.detail)
+    timing = server_timing(response)
+    assert set(timing) == {'db', 'tpl', 'view', 'mw', 'total'}
+    assert timing['db'] > 0
+    assert timing['tpl'] > 0
+    assert sum(timing.values()) - timing['total'] == pytest.approx(
+        timing['total'], abs=0.5
+    )
+    assert 'SQL"' in response['Server-Timing']
+
+
+def test_disabled_by_default(client, news):
+    assert 'Server-Timing' not in client.get(URL.detail)
+
+
+def test_sampled_request_profiled(profiling, client, news, tmp_path):
+    profiling.PROFILING_SAMPLE_RATE = 1
+    client.get(URL.detail)
+    dump, = tmp_path.glob('*-news-detail-*.prof')
+    stats = pstats.Stats(str(dump))
+    assert any(
+        function == 'get' for _, _, function in stats.stats
+    )
+
+
+def test_record_timings_outside_requests(news):
+    """Запросы к базе из шаблона считаются в db, а не в tpl."""
+    template = Template('{% for item in news %}{{ item.title }}{% endfor %}')
+    with record_timings() as timings:
+        template.render(Context({'news': News.objects.all()}))
+    assert timings.queries == 1
+    assert timings.durations['db'] > 0
+    assert timings.durations['tpl'] > 0
+    assert sum(timings.durations.values()) == pytest.approx(timings.total)
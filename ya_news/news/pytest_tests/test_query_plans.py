@@ -0,0 +1,48 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from conftest import URL
+
+pytestmark = pytest.mark.django_db
+
+# SQLite до 3.36 пишет «SCAN TABLE x» и «SCAN TABLE x AS y», новые —
+# «SCAN x».
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+def full_scans(captured_queries):
+    """Возвращает запросы, план которых содержит полный обход таблицы."""
+    scans = []
+    with connection.cursor() as cursor:
+        for query in captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+            for row in cursor.fetchall():
+                if FULL_SCAN.match(row[-1]):
+                    scans.append((query['sql'], row[-1]))
+    return scans
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='План запроса SQLite.'
+)
+@pytest.mark.parametrize(
+    'url, params',
+    (
+        (URL.home, {}),
+        (URL.home, {'after': '2022-01-01_5'}),
+        (URL.detail, {}),
+        (URL.detail, {'after': '2022-01-01T00:00:00+00:00_5'}),
+        (URL.edit, {}),
+        (URL.delete, {}),
+    ),
+)
+def test_views_use_indexes(author_client, url, params, comment):
+    """Запросы страниц новостей не обходят таблицы целиком."""
+    with CaptureQueriesContext(connection) as queries:
+        author_client.get(url, params)
+    assert full_scans(queries.captured_queries) == []
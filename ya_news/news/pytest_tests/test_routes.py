@@ -1,6 +1,7 @@
 from http import HTTPStatus
 
 import pytest
+from django.urls import reverse
 from pytest_django.asserts import assertRedirects
 from pytest_lazyfixture import lazy_fixture
 
@@ -38,3 +39,21 @@ def test_redirects(client, url, comment):
     expected_url = f'{URL.login}?next={url}'
     response = client.get(url)
     assertRedirects(response, expected_url)
+
+
+@pytest.mark.parametrize('url', (URL.home, URL.detail))
+def test_invalid_cursor(client, url, news):
+    """Некорректный курсор страницы даёт 404."""
+    response = client.get(url, {'after': 'not-a-cursor'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.parametrize(
+    'url', (URL.home, URL.detail, reverse('news:api_list'))
+)
+def test_cursor_pk_out_of_range(client, url, news):
+    """Курсор с pk вне диапазона базы даёт 404, а не ошибку сервера."""
+    response = client.get(
+        url, {'after': '2020-01-01T00:00:00_99999999999999999999'}
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
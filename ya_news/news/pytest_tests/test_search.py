@@ -0,0 +1,110 @@
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from news.models import Comment, News
+from news.search import query_terms, search_news
+
+pytestmark = pytest.mark.django_db
+
+URL_SEARCH = reverse('news:search')
+
+
+def found(query, **kwargs):
+    return [news.pk for news in search_news(query, **kwargs).object_list]
+
+
+@pytest.fixture
+def tree_news():
+    return News.objects.create(
+        title='Зелёная ёлка на площади',
+        text='Установили <b>ёлку</b> и гирлянды.',
+    )
+
+
+def test_query_terms():
+    assert query_terms('Ёлками, ЁЛКИ и ель!') == ['елк', 'ель']
+
+
+@pytest.mark.parametrize('query', ('ёлки', 'елками', 'зеленые гирлянды'))
+def test_word_forms(tree_news, query):
+    """Находятся другие формы слов, «ё» не отличается от «е»."""
+    assert found(query) == [tree_news.pk]
+
+
+def test_comment_match(news, author):
+    """Новость находится по тексту комментария, сниппет из него."""
+    Comment.objects.create(news=news, author=author, text='Отличная горка!')
+    result, = search_news('горки').object_list
+    assert result.pk == news.pk
+    assert '<mark>горка</mark>' in result.snippet
+
+
+def test_highlight_is_escaped(client, tree_news):
+    response = client.get(URL_SEARCH, {'q': 'ёлку'})
+    result, = response.context['page'].object_list
+    assert '<mark>' in result.title_html
+    assert '&lt;b&gt;<mark>ёлку</mark>&lt;/b&gt;' in result.snippet
+
+
+@pytest.mark.parametrize('query', ('зелёная ёлка', 'зеленая елка'))
+def test_highlight_keeps_yo(tree_news, news, author, query):
+    """Выдача показывает «ё» как в тексте, с «ё» и без в запросе."""
+    Comment.objects.create(
+        news=news, author=author, text='Зеленая ёлка во дворе.'
+    )
+    results = {item.pk: item for item in search_news(query).object_list}
+    assert results[tree_news.pk].title_html == (
+        '<mark>Зелёная</mark> <mark>ёлка</mark> на площади'
+    )
+    assert '<mark>Зеленая</mark> <mark>ёлка</mark>' in (
+        results[news.pk].snippet
+    )
+
+
+def test_index_follows_changes(news, author):
+    comment = Comment.objects.create(news=news, author=author, text='Каток')
+    comment.text = 'Горка'
+    comment.save()
+    assert found('каток') == []
+    assert found('горка') == [news.pk]
+    news.delete()
+    assert found('горка') == []
+
+
+def test_ranking_and_pages(tree_news):
+    """Совпадение в заголовке выше, страницы листаются."""
+    in_text = News.objects.create(title='Праздник', text='Ёлка готова.')
+    first = search_news('ёлка', per_page=1)
+    assert [news.pk for news in first.object_list] == [tree_news.pk]
+    assert first.has_next
+    second = search_news('ёлка', page=2, per_page=1)
+    assert [news.pk for news in second.object_list] == [in_text.pk]
+    assert not second.has_next
+
+
+@pytest.mark.parametrize('page', ('abc', '0', '1000'))
+def test_invalid_page(client, page):
+    response = client.get(URL_SEARCH, {'q': 'ёлка', 'page': page})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_rebuild_index():
+    """Новости, созданные в обход сигналов, находятся после перестройки."""
+    news_list = News.objects.bulk_create(
+        News(title=f'Новость {number}', text='Текст') for number in range(3)
+    )
+    assert found('новость') == []
+    call_command('rebuild_search_index', stdout=StringIO())
+    assert len(found('новость', per_page=100)) == len(news_list)
+
+
+def test_fallback_without_fts(news, author):
+    Comment.objects.create(news=news, author=author, text='каток')
+    with mock.patch('news.search.fts_enabled', return_value=False):
+        assert found('каток') == [news.pk]
+        assert found('заметки') == [news.pk]
@@ -0,0 +1,297 @@
+"""
+Полнотекстовый поиск по новостям и комментариям.
+
+На SQLite с FTS5 новости и комментарии хранятся в виртуальных таблицах
+news_news_fts и news_comment_fts, которые создаёт миграция
+и синхронизируют сигналы. Выдача — новости, у которых совпал заголовок,
+текст или один из комментариев. На базах без FTS5 поиск идёт через
+icontains, без ранжирования.
+
+Русские слова в запросе сводятся к основе и ищутся по префиксу.
+Индекс хранит текст как есть, чтобы выдача показывала его без
+изменений, а «ё» и «е» не различает запрос: основа ищется и с «е»,
+и с «ё» на месте каждой «е» по очереди — «ё» в слове бывает одна.
+"""
+import re
+import sqlite3
+from collections import namedtuple
+from functools import lru_cache
+
+from django.db import connections
+from django.db.models import Exists, OuterRef, Q
+from django.http import Http404
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .models import Comment, News
+from .moderation import normalize
+
+NEWS_TABLE = 'news_news_fts'
+COMMENT_TABLE = 'news_comment_fts'
+# Какие поля модели попадают в её таблицу индекса.
+INDEXED = {
+    News: (NEWS_TABLE, ('title', 'text')),
+    Comment: (COMMENT_TABLE, ('text',)),
+}
+RESULTS_PER_PAGE = 20
+# Глубже ранжированную выдачу не листаем: OFFSET на больших выборках
+# дорог, а такие страницы никто не читает.
+MAX_PAGE = 50
+MAX_TERMS = 8
+SNIPPET_WORDS = 16
+MIN_STEM_LENGTH = 3
+# Однобуквенные слова («и», «в») не ищем: по префиксу под них подходит
+# огромная часть индекса.
+MIN_TERM_LENGTH = 2
+# Окончания русских слов, от длинных к коротким.
+ENDINGS = sorted(
+    (
+        'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими',
+        'ией', 'иях', 'иям', 'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое',
+        'ее', 'ые', 'ие', 'ов', 'ев', 'ам', 'ям', 'ах', 'ях', 'ом', 'ем',
+        'ую', 'юю', 'ия', 'ть', 'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю',
+        'ь', 'й',
+    ),
+    key=len,
+    reverse=True,
+)
+CYRILLIC = re.compile('[а-я]')
+WORD = re.compile(r'\w+')
+# Границы совпадений в сниппетах. Текст экранируется целиком,
+# и только потом маркеры заменяются на теги <mark>.
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+SearchPage = namedtuple('SearchPage', ('object_list', 'number', 'has_next'))
+
+
+@lru_cache(maxsize=None)
+def sqlite_has_fts5():
+    """Собран ли SQLite, с которым работает Django, с FTS5."""
+    connection = sqlite3.connect(':memory:')
+    try:
+        return bool(connection.execute(
+            "SELECT sqlite_compileoption_used('ENABLE_FTS5')"
+        ).fetchone()[0])
+    finally:
+        connection.close()
+
+
+def fts_enabled(using='default'):
+    return connections[using].vendor == 'sqlite' and sqlite_has_fts5()
+
+
+def yo_variants(term):
+    """Основа с «е» и с «ё» на месте каждой её «е» по очереди."""
+    return [term] + [
+        term[:index] + 'ё' + term[index + 1:]
+        for index, char in enumerate(term) if char == 'е'
+    ]
+
+
+def stem(word):
+    """Отрезает у русского слова окончание, оставляя основу."""
+    if not CYRILLIC.search(word):
+        return word
+    for ending in ENDINGS:
+        if (
+            word.endswith(ending)
+            and len(word) - len(ending) >= MIN_STEM_LENGTH
+        ):
+            return word[:-len(ending)]
+    return word
+
+
+def query_terms(query):
+    """Основы слов запроса без повторов, не больше MAX_TERMS."""
+    terms = []
+    for word in WORD.findall(normalize(query)):
+        term = stem(word)
+        if len(term) >= MIN_TERM_LENGTH and term not in terms:
+            terms.append(term)
+    return terms[:MAX_TERMS]
+
+
+def match_expression(terms):
+    """
+    Запрос FTS5: все основы по префиксу.
+
+    Основы состоят только из букв и цифр, поэтому кавычки в них
+    не встречаются и синтаксис запроса сломать не могут.
+    """
+    return ' AND '.join(
+        '(' + ' OR '.join(f'"{variant}"*' for variant in yo_variants(term))
+        + ')'
+        for term in terms
+    )
+
+
+def highlight(text):
+    """Экранирует сниппет и размечает совпадения тегами <mark>."""
+    return mark_safe(
+        escape(text)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_END, '</mark>')
+    )
+
+
+def parse_page(value):
+    """Номер страницы из адреса, на мусор отвечаем 404."""
+    if value is None:
+        return 1
+    try:
+        number = int(value)
+    except ValueError:
+        raise Http404('Некорректный номер страницы.')
+    if not 1 <= number <= MAX_PAGE:
+        raise Http404('Некорректный номер страницы.')
+    return number
+
+
+# Совпадения в новостях и в комментариях ранжируются вместе: от каждой
+# новости остаётся лучшее совпадение со своим сниппетом (SQLite берёт
+# остальные колонки из строки, на которой достигнут MIN).
+SEARCH_SQL = f'''
+SELECT news.id, news.title, news.date, news.comment_count,
+       hits.title_html, hits.snippet
+FROM (
+    SELECT news_id, MIN(score) AS score, title_html, snippet
+    FROM (
+        SELECT rowid AS news_id, rank AS score,
+               highlight({NEWS_TABLE}, 0, %s, %s) AS title_html,
+               snippet({NEWS_TABLE}, 1, %s, %s, '…', %s) AS snippet
+        FROM {NEWS_TABLE}
+        WHERE {NEWS_TABLE} MATCH %s
+        UNION ALL
+        SELECT comment.news_id, {COMMENT_TABLE}.rank, NULL,
+               snippet({COMMENT_TABLE}, 0, %s, %s, '…', %s)
+        FROM {COMMENT_TABLE}
+        JOIN news_comment AS comment
+            ON comment.id = {COMMENT_TABLE}.rowid
+        WHERE {COMMENT_TABLE} MATCH %s AND NOT comment.is_flagged
+    )
+    GROUP BY news_id
+) AS hits
+JOIN news_news AS news ON news.id = hits.news_id
+ORDER BY hits.score, news.id DESC
+LIMIT %s OFFSET %s
+'''
+
+
+def search_news(query, page=1, per_page=RESULTS_PER_PAGE):
+    """
+    Страница новостей, подходящих под запрос.
+
+    У новостей выдачи есть атрибуты title_html и snippet с размеченными
+    совпадениями; если совпал комментарий, сниппет взят из него.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return SearchPage([], page, False)
+    offset = (page - 1) * per_page
+    if fts_enabled():
+        match = match_expression(terms)
+        news_list = list(News.objects.raw(SEARCH_SQL, (
+            MATCH_START, MATCH_END, MATCH_START, MATCH_END, SNIPPET_WORDS,
+            match,
+            MATCH_START, MATCH_END, SNIPPET_WORDS,
+            match,
+            per_page + 1, offset,
+        )))
+        for news in news_list:
+            news.title_html = highlight(news.title_html or news.title)
+            news.snippet = highlight(news.snippet)
+    else:
+        queryset = News.objects.order_by('-date', '-id')
+        for term in terms:
+            condition = Q()
+            for variant in yo_variants(term):
+                condition |= (
+                    Q(title__icontains=variant)
+                    | Q(text__icontains=variant)
+                    | Exists(Comment.objects.visible().filter(
+                        news=OuterRef('pk'), text__icontains=variant
+                    ))
+                )
+            queryset = queryset.filter(condition)
+        news_list = list(queryset[offset:offset + per_page + 1])
+        for news in news_list:
+            news.title_html = escape(news.title)
+            news.snippet = escape(Truncator(news.text).words(SNIPPET_WORDS))
+    return SearchPage(
+        news_list[:per_page], page, len(news_list) > per_page
+    )
+
+
+def index_news(news, using='default', created=False):
+    """Записывает новость в индекс, заменяя прежнюю версию."""
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        if not created:
+            cursor.execute(
+                f'DELETE FROM {NEWS_TABLE} WHERE rowid = %s', (news.pk,)
+            )
+        cursor.execute(
+            f'INSERT INTO {NEWS_TABLE} (rowid, title, text) '
+            f'VALUES (%s, %s, %s)',
+            (news.pk, news.title, news.text),
+        )
+
+
+def index_comment(comment, using='default', created=False):
+    """Записывает комментарий в индекс, заменяя прежнюю версию."""
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        if not created:
+            cursor.execute(
+                f'DELETE FROM {COMMENT_TABLE} WHERE rowid = %s',
+                (comment.pk,),
+            )
+        cursor.execute(
+            f'INSERT INTO {COMMENT_TABLE} (rowid, text) VALUES (%s, %s)',
+            (comment.pk, comment.text),
+        )
+
+
+def unindex(table, pk, using='default'):
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', (pk,))
+
+
+def _insert_select(cursor, queryset):
+    table, fields = INDEXED[queryset.model]
+    sql, params = queryset.order_by().values_list(
+        'id', *fields
+    ).query.sql_with_params()
+    columns = ', '.join(fields)
+    cursor.execute(f'INSERT INTO {table} (rowid, {columns}) {sql}', params)
+
+
+def index_queryset(queryset):
+    """
+    Добавляет в индекс новости или комментарии выборки одним INSERT … SELECT.
+
+    Нужна для записей, которые не вызывают сигналов, как bulk_create.
+    Записей выборки в индексе ещё быть не должно.
+    """
+    if not fts_enabled(queryset.db):
+        return
+    with connections[queryset.db].cursor() as cursor:
+        _insert_select(cursor, queryset)
+
+
+def rebuild_index(using='default'):
+    """Строит индексы новостей и комментариев заново."""
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        for model, (table, _) in INDEXED.items():
+            cursor.execute(f'DELETE FROM {table}')
+            _insert_select(cursor, model.objects.using(using))
+            cursor.execute(
+                f"INSERT INTO {table} ({table}) VALUES ('optimize')"
+            )
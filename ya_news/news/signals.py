@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import auth, events, metrics, search
+from .cache import bump_news_version
+from .models import Comment, News
+
+
+@receiver((post_save, post_delete), sender=News)
+def news_changed(sender, instance, **kwargs):
+    """Изменение новости сбрасывает её страницу и ленту."""
+    bump_news_version(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    """Изменение комментария сбрасывает страницу его новости и ленту."""
+    bump_news_version(instance.news_id)
+
+
+@receiver(post_save, sender=News)
+def news_saved(sender, instance, created, using, **kwargs):
+    """Сохранённая новость заменяет свою версию в поисковом индексе."""
+    search.index_news(instance, using, created)
+
+
+@receiver(post_delete, sender=News)
+def news_deleted(sender, instance, using, **kwargs):
+    search.unindex(search.NEWS_TABLE, instance.pk, using)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, using, **kwargs):
+    search.index_comment(instance, using, created)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, using, **kwargs):
+    search.unindex(search.COMMENT_TABLE, instance.pk, using)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved_event(sender, instance, created, **kwargs):
+    """
+    Подписчики новости узнают о комментарии после фиксации.
+
+    Комментарий с отметкой модерации для них удалён.
+    """
+    if instance.is_flagged:
+        kind = events.DELETED
+    else:
+        kind = events.CREATED if created else events.UPDATED
+    events.publish_comment(instance, kind)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted_event(sender, instance, **kwargs):
+    events.publish_comment(instance, events.DELETED)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved_metric(sender, instance, created, **kwargs):
+    metrics.WRITES.inc(action='created' if created else 'updated')
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted_metric(sender, instance, **kwargs):
+    metrics.WRITES.inc(action='deleted')
+
+
+@receiver((post_save, post_delete), sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    """Изменённый пользователь больше не берётся из кэша."""
+    auth.forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def user_left(sender, user, **kwargs):
+    if user is not None:
+        auth.forget_user(user.pk)
@@ -0,0 +1,147 @@
+"""
+Поток новых, изменённых и удалённых комментариев новости (SSE).
+
+Ответ с потоком в Django 3.2 отдаётся синхронным итератором прямо
+в цикле событий, а об отключении клиента представление не узнаёт.
+Поэтому поток обслуживает отдельное ASGI-приложение, которое
+yanews.asgi ставит перед Django: соединение ждёт событий в цикле
+событий и не занимает поток.
+
+Клиент получает события comment с данными из news.events.comment_data.
+Событие reset означает, что часть изменений потеряна (переполнен
+буфер или переподключение после долгого перерыва) и страницу надо
+перезагрузить.
+"""
+import asyncio
+import json
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from . import events
+from .models import News
+
+EVENTS_PATH = re.compile(r'^/news/(?P<pk>\d+)/events/$')
+RETRY_MS = 3000
+RESET = b'event: reset\ndata: {}\n\n'
+PING = b': ping\n\n'
+
+
+def events_url(news_id):
+    return f'/news/{news_id}/events/'
+
+
+def format_event(event):
+    data = json.dumps(event.data, ensure_ascii=False)
+    return f'id: {event.id}\nevent: comment\ndata: {data}\n\n'.encode()
+
+
+def news_exists(pk):
+    try:
+        return News.objects.filter(pk=pk).exists()
+    finally:
+        # Django закрывает соединения в конце запроса, здесь — сами.
+        close_old_connections()
+
+
+async def send_plain(send, status, text):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+    })
+    await send({'type': 'http.response.body', 'body': text.encode()})
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream(send, subscription, ready, disconnect):
+    """Отправляет события подписки, пока клиент на связи."""
+    while not disconnect.done():
+        ready.clear()
+        pending = subscription.drain()
+        if subscription.overflowed:
+            await send({'type': 'http.response.body', 'body': RESET})
+            return
+        if pending:
+            await send({
+                'type': 'http.response.body',
+                'body': b''.join(format_event(event) for event in pending),
+                'more_body': True,
+            })
+            continue
+        waiter = asyncio.ensure_future(ready.wait())
+        done, _ = await asyncio.wait(
+            (waiter, disconnect),
+            timeout=settings.NEWS_EVENTS_HEARTBEAT,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        waiter.cancel()
+        if not done:
+            # Пустой комментарий не даёт прокси закрыть соединение.
+            await send({
+                'type': 'http.response.body', 'body': PING, 'more_body': True,
+            })
+
+
+async def comment_events(scope, receive, send, news_id):
+    if scope['method'] != 'GET':
+        return await send_plain(send, 405, 'Метод не разрешён.')
+    if not await sync_to_async(news_exists)(news_id):
+        return await send_plain(send, 404, 'Новость не найдена.')
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+    subscription = events.Subscription(
+        lambda: loop.call_soon_threadsafe(ready.set),
+        settings.NEWS_EVENTS_BUFFER,
+    )
+    headers = dict(scope['headers'])
+    last_id = headers.get(b'last-event-id')
+    backend = events.get_backend()
+    channel = events.channel_name(news_id)
+    missed = backend.subscribe(
+        channel, subscription, last_id and last_id.decode('latin-1')
+    )
+    disconnect = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        if missed is None:
+            await send({'type': 'http.response.body', 'body': RESET})
+            return
+        await send({
+            'type': 'http.response.body',
+            'body': f'retry: {RETRY_MS}\n\n'.encode() + b''.join(
+                format_event(event) for event in missed
+            ),
+            'more_body': True,
+        })
+        await stream(send, subscription, ready, disconnect)
+    finally:
+        backend.unsubscribe(channel, subscription)
+        disconnect.cancel()
+
+
+def with_comment_events(application):
+    """Оборачивает ASGI-приложение Django потоком комментариев."""
+    async def router(scope, receive, send):
+        if scope['type'] == 'http':
+            match = EVENTS_PATH.match(scope['path'])
+            if match:
+                return await comment_events(
+                    scope, receive, send, int(match['pk'])
+                )
+        return await application(scope, receive, send)
+    return router
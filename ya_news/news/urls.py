@@ -1,16 +1,28 @@
 from django.urls import path
 
-from news import views
+from news import api, views
 
 app_name = 'news'
 
 urlpatterns = [
     path('', views.NewsList.as_view(), name='home'),
     path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('api/news/', api.NewsListApi.as_view(), name='api_list'),
+    path(
+        'api/news/<int:pk>/',
+        api.NewsDetailApi.as_view(),
+        name='api_detail'
+    ),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.CommentStreamApi.as_view(),
+        name='api_comments'
+    ),
 ]
@@ -1,49 +1,178 @@
+import hashlib
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404, HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
 from django.views import generic
+from django.views.decorators.http import condition
 
-from .forms import CommentForm
+from . import cache
+from .forms import CommentForm, SearchForm
 from .models import Comment, News
+from .pagination import paginate
+from .search import parse_page, search_news
+from .sse import events_url
+
+
+def page_etag(request, version):
+    """Валидатор ETag: адрес с курсором, штамп версии и пользователь."""
+    key = f'{request.get_full_path()}:{version}:{request.user.pk}'
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def news_list_etag(request, *args, **kwargs):
+    return page_etag(request, cache.list_version())
+
+
+def news_etag(request, pk):
+    return page_etag(request, cache.news_version(pk))
 
 
-class NewsList(generic.ListView):
+def news_last_modified(request, pk):
+    return cache.news_last_modified(pk)
+
+
+class AnonymousCacheMixin:
+    """
+    Отдаёт анонимным пользователям готовую страницу из кэша.
+
+    Страница не зависит от пользователя, поэтому кэшируется целиком
+    под штампом версии, который возвращает cache_version_func(**kwargs)
+    представления. Ключ строится из kwargs адреса и только тех
+    параметров строки запроса, что влияют на страницу: посторонние
+    параметры не должны заводить новые записи и вытеснять настоящие.
+    """
+    cache_version_func = None
+    cache_query_params = ('after',)
+
+    def get_page_key(self):
+        """Ключ страницы в кэше; у авторизованных страницы не кэшируются."""
+        if self.request.user.is_authenticated:
+            return None
+        if self.cache_version_func is None:
+            raise ImproperlyConfigured(
+                f'{type(self).__name__} не задаёт cache_version_func.'
+            )
+        query = urlencode([
+            (name, self.request.GET[name])
+            for name in self.cache_query_params
+            if name in self.request.GET
+        ])
+        page = urlencode(sorted(self.kwargs.items()))
+        return cache.page_key(
+            f'{type(self).__name__}:{page}?{query}',
+            self.cache_version_func(**self.kwargs),
+        )
+
+    def get(self, request, *args, **kwargs):
+        key = self.get_page_key()
+        if key is None:
+            return super().get(request, *args, **kwargs)
+        content = cache.get_page(key)
+        if content is not None:
+            return HttpResponse(content)
+        response = super().get(request, *args, **kwargs)
+        response.add_post_render_callback(
+            lambda response: cache.set_page(key, response.content)
+        )
+        return response
+
+
+@method_decorator(condition(etag_func=news_list_etag), name='get')
+class NewsList(AnonymousCacheMixin, generic.ListView):
     """Список новостей."""
     model = News
+    cache_version_func = staticmethod(cache.list_version)
     template_name = 'news/home.html'
 
     def get_queryset(self):
         """
-        Выводим только несколько последних новостей.
+        Выводим страницу новостей после курсора ?after=.
 
-        Их количество определяется в настройках проекта.
+        Размер страницы определяется в настройках проекта.
+        Число комментариев берётся из поля comment_count,
+        сами комментарии не загружаются.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        self.page = paginate(
+            self.model.objects.all(),
+            'date',
+            self.request.GET.get('after'),
+            settings.NEWS_COUNT_ON_HOME_PAGE,
+            descending=True,
+        )
+        return self.page.object_list
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.page.next_cursor
+        return context
+
+
+class NewsSearch(generic.TemplateView):
+    """Поиск по новостям и комментариям к ним."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = SearchForm(self.request.GET)
+        query = form.cleaned_data['q'] if form.is_valid() else ''
+        context['form'] = form
+        context['query'] = query
+        context['page'] = search_news(
+            query, parse_page(self.request.GET.get('page'))
+        )
+        return context
+
+
+class CommentPageMixin:
+    """Добавляет в контекст страницу комментариев к новости self.object."""
+
+    def get_context_data(self, **kwargs):
+        """Комментарии выводим постранично, начиная с самых старых."""
+        context = super().get_context_data(**kwargs)
+        page = paginate(
+            self.object.comment_set.visible().select_related('author'),
+            'created',
+            self.request.GET.get('after'),
+            settings.COMMENTS_COUNT_ON_DETAIL_PAGE,
+        )
+        context['comments'] = page.object_list
+        context['next_cursor'] = page.next_cursor
+        return context
 
 
-class NewsDetail(generic.DetailView):
+@method_decorator(
+    condition(etag_func=news_etag, last_modified_func=news_last_modified),
+    name='get',
+)
+class NewsDetail(AnonymousCacheMixin, CommentPageMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
+    cache_version_func = staticmethod(cache.news_version)
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
+        # Поток комментариев есть только под ASGI (yanews.asgi).
+        if settings.ASYNC_VIEWS:
+            context['events_url'] = events_url(self.object.pk)
         return context
 
 
 class NewsComment(
         LoginRequiredMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -51,20 +180,33 @@ class NewsComment(
     form_class = CommentForm
     template_name = 'news/detail.html'
 
-    def post(self, request, *args, **kwargs):
-        self.object = self.get_object()
-        return super().post(request, *args, **kwargs)
-
     def form_valid(self, form):
+        """
+        Сохраняем комментарий, не загружая новость.
+
+        Существование новости проверяет обновление её счётчика
+        комментариев: если новости нет, обновлять нечего.
+        """
         comment = form.save(commit=False)
-        comment.news = self.object
+        comment.news_id = self.kwargs['pk']
         comment.author = self.request.user
-        comment.save()
+        with transaction.atomic():
+            if not self.model.objects.filter(pk=comment.news_id).update(
+                comment_count=F('comment_count') + 1
+            ):
+                raise Http404('Новость не найдена.')
+            comment.save()
         return super().form_valid(form)
 
+    def form_invalid(self, form):
+        """Новость нужна только для повторного вывода формы с ошибками."""
+        self.object = self.get_object()
+        return super().form_invalid(form)
+
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.kwargs['pk']}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -83,14 +225,21 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Используем уже загруженный комментарий и его news_id."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
-        """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        """
+        Пользователь может работать только со своими комментариями.
+
+        Заголовок новости выводится на страницах редактирования
+        и удаления, поэтому загружаем её тем же запросом.
+        """
+        return self.model.objects.select_related('news').filter(
+            author=self.request.user
+        )
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -102,3 +251,15 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+    def delete(self, request, *args, **kwargs):
+        """Удаляем комментарий и уменьшаем счётчик у новости."""
+        self.object = self.get_object()
+        success_url = self.get_success_url()
+        with transaction.atomic():
+            deleted, _ = self.object.delete()
+            if deleted:
+                News.objects.filter(
+                    pk=self.object.news_id, comment_count__gt=0
+                ).update(comment_count=F('comment_count') - 1)
+        return HttpResponseRedirect(success_url)
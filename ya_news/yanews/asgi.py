@@ -5,6 +5,29 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+
+Запуск под uvicorn из каталога ya_news; число процессов uvicorn
+берёт из WEB_CONCURRENCY, а кэш новостей при нескольких процессах
+должен быть общим (см. CACHE_BACKEND в настройках):
+
+    export CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+    export CACHE_LOCATION=127.0.0.1:11211 WEB_CONCURRENCY=4
+    uvicorn yanews.asgi:application --timeout-keep-alive 5
+
+Под ASGI включены асинхронные страницы (news.async_urls): медленный
+клиент держит только соединение в цикле событий, а не поток. Работа
+с базой в Django 3.2 синхронная и идёт в одном потоке на процесс,
+поэтому число процессов (WEB_CONCURRENCY) подбирается по числу ядер.
+
+Потоковые ответы (API комментариев) Django 3.2 перебирает
+в цикле событий, где база недоступна, поэтому под ASGI они
+собираются в памяти до отправки; поток с постоянной памятью есть
+только под WSGI.
+
+Поток комментариев /news/<pk>/events/ обслуживает news.sse в обход
+Django. С несколькими процессами событие доходит только до клиентов
+процесса, где сохранён комментарий, пока NEWS_EVENTS_BACKEND
+не заменён бэкендом с общей шиной.
 """
 
 import os
@@ -12,5 +35,10 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+os.environ.setdefault('ASYNC_VIEWS', '1')
+
+django_application = get_asgi_application()
+
+from news.sse import with_comment_events  # noqa: E402
 
-application = get_asgi_application()
+application = with_comment_events(django_application)
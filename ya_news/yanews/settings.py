@@ -1,5 +1,7 @@
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -21,6 +23,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'news.metrics.MetricsMiddleware',
+    'news.profiling.ProfilingMiddleware',
+    'news.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -50,13 +55,119 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Асинхронные варианты страниц для чтения (news.async_urls).
+# Включаются в yanews.asgi, под WSGI от них проку нет.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS') == '1'
+
+
+# Профиль базы данных задаётся окружением: DB_ENGINE=sqlite
+# (по умолчанию) или DB_ENGINE=postgresql.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+# Постоянные соединения перед запросом проверяются на живость (news.db).
+DB_HEALTH_CHECKS = os.getenv('DB_HEALTH_CHECKS', '1') == '1'
+# Не чаще раза в столько секунд на соединение.
+DB_HEALTH_CHECK_INTERVAL = int(os.getenv('DB_HEALTH_CHECK_INTERVAL', '30'))
+# Прагмы SQLite для конкурентной работы, выставляются при открытии
+# каждого соединения (news.db). SQLITE_TUNING=0 их отключает.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 2**20,
+} if os.getenv('SQLITE_TUNING', '1') == '1' else {}
+
+if DB_ENGINE == 'postgresql':
+    # За PgBouncer в режиме транзакций серверные курсоры не работают.
+    DB_POOLER = os.getenv('DB_POOLER')
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'yanews'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER == 'pgbouncer',
+            'OPTIONS': {'connect_timeout': 5},
+        }
     }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0')),
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'Неизвестный DB_ENGINE: {DB_ENGINE}.')
+
+# Кэш default хранит штампы версий для ETag и Last-Modified, страницы
+# анонимов (news.cache) и сессии cached_db. Штампы меняются в том
+# процессе, где записали комментарий, поэтому при нескольких процессах
+# веб-сервера кэш должен быть общим, например
+# CACHE_BACKEND=django.core.cache.backends.memcached.PyMemcacheCache
+# и CACHE_LOCATION=127.0.0.1:11211.
+CACHE_BACKEND = os.getenv(
+    'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+)
+# Число процессов веб-сервера; эту переменную читают gunicorn и uvicorn.
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+if WEB_CONCURRENCY > 1 and CACHE_BACKEND.endswith('.LocMemCache'):
+    raise ImproperlyConfigured(
+        'При WEB_CONCURRENCY > 1 кэш новостей должен быть общим для '
+        'процессов: задайте CACHE_BACKEND и CACHE_LOCATION.'
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+    # Кэш пользователей для request.user (news.auth), свой в каждом
+    # процессе.
+    'users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'users',
+    },
+}
+
+# Хранилище сессий: db, cached_db (сессия читается из кэша default,
+# база — на случай промаха) или signed_cookies (сессия в подписанной
+# cookie, без базы). cached_db с LocMemCache подходит только для одного
+# процесса: выход в одном процессе не сбросит сессию в кэше другого.
+SESSION_PROFILE = os.getenv('SESSION_PROFILE', 'db')
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
 }
+if SESSION_PROFILE not in SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        f'Неизвестный SESSION_PROFILE: {SESSION_PROFILE}.'
+    )
+SESSION_ENGINE = SESSION_ENGINES[SESSION_PROFILE]
+
+AUTHENTICATION_BACKENDS = [
+    'news.auth.CachedModelBackend',
+    # Сессии, созданные до кэша пользователей.
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_ALIAS = 'users'
+# USER_CACHE_TIMEOUT=0 отключает кэш пользователей.
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', '60'))
+
+# Кэш страниц новостей для анонимных пользователей и штампов версий;
+# должен быть общим для всех процессов, см. CACHE_BACKEND.
+NEWS_CACHE_ALIAS = 'default'
+NEWS_CACHE_TIMEOUT = 60 * 5
+
+# Живые обновления комментариев (news.events, news.sse): бэкенд
+# рассылки, буфер событий на соединение и период пустых сообщений.
+NEWS_EVENTS_BACKEND = 'news.events.LocalBackend'
+NEWS_EVENTS_BUFFER = 100
+NEWS_EVENTS_HEARTBEAT = 15
 
 
 AUTH_PASSWORD_VALIDATORS = []
@@ -79,4 +190,27 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
+# Файл со списком запрещённых в комментариях слов, по слову в строке.
+# Без него используется news.moderation.BAD_WORDS.
+BAD_WORDS_FILE = os.getenv('BAD_WORDS_FILE')
+
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 50
+
+# Разбивка времени запросов в заголовке Server-Timing и профили cProfile
+# доли запросов (news.profiling).
+PROFILING = os.getenv('PROFILING') == '1'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_DIR = os.getenv('PROFILING_DIR', BASE_DIR / 'profiles')
+
+# Бюджет SQL-запросов на один HTTP-запрос по имени URL.
+QUERY_BUDGET_MODE = 'warn' if DEBUG else None
+QUERY_BUDGET_REPEAT_THRESHOLD = 3
+QUERY_BUDGETS = {
+    'news:home': 3,
+    'news:detail': 5,
+    'news:edit': 6,
+    'news:delete': 6,
+    'news:search': 3,
+}
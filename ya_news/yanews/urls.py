@@ -1,12 +1,19 @@
+from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth import views as auth_views
 from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path
 from django.views.generic import CreateView
 
+from news.metrics import metrics
+
 urlpatterns = [
-    path('', include('news.urls')),
+    path(
+        '',
+        include('news.async_urls' if settings.ASYNC_VIEWS else 'news.urls')
+    ),
     path('admin/', admin.site.urls),
+    path('metrics', metrics, name='metrics'),
 ]
 
 auth_urls = ([
@@ -0,0 +1,49 @@
+"""
+Скорость массового импорта заметок.
+
+Генерирует JSON Lines с заметками на лету, импортирует их во временную
+базу и выводит время и прирост пикового потребления памяти.
+Запуск из каталога ya_note:
+
+    python -m benchmarks.bulk_import [число заметок]
+"""
+import json
+import resource
+import sys
+import time
+
+from benchmarks.utils import setup_django, test_database
+
+DEFAULT_COUNT = 100_000
+
+
+def generate_lines(count):
+    for number in range(count):
+        row = {'title': f'Заметка номер {number % 1000}', 'text': 'Текст.'}
+        if number % 10 == 0:
+            row['slug'] = f'explicit-{number}'
+        yield json.dumps(row, ensure_ascii=False) + '\n'
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT
+    setup_django()
+    from django.contrib.auth import get_user_model
+
+    from notes.bulk import import_notes, read_rows
+
+    with test_database():
+        author = get_user_model().objects.create(username='Автор')
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        started = time.perf_counter()
+        rows = read_rows(generate_lines(count), 'jsonl')
+        result = import_notes(author, rows)
+        elapsed = time.perf_counter() - started
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f'создано {result.created} из {count}, ошибок {result.failed}')
+    print(f'время: {elapsed:.1f} с, {result.created / elapsed:.0f} в секунду')
+    print(f'прирост пиковой памяти: {(rss_after - rss_before) / 1024:.1f} МБ')
+
+
+if __name__ == '__main__':
+    main()
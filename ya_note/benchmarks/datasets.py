@@ -0,0 +1,48 @@
+"""
+Скорость фабрик notes.factories на больших наборах данных.
+
+Во временной базе создаются пользователи и заметки, разложенные
+между ними по кругу; для каждой модели выводятся число записей,
+число SQL-запросов и время. Запуск из каталога ya_note:
+
+    python -m benchmarks.datasets [число заметок]
+"""
+import sys
+import time
+
+from benchmarks.utils import setup_django, test_database
+
+DEFAULT_NOTES = 100_000
+USERS = 1000
+
+
+def measure(title, action):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    started = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        rows = action()
+    elapsed = time.perf_counter() - started
+    print(
+        f'{title}: записей {len(rows)}, запросов {len(queries)}, '
+        f'время {elapsed:.2f} с'
+    )
+    return rows
+
+
+def main():
+    notes = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NOTES
+    setup_django()
+    from django.test.utils import setup_test_environment
+
+    from notes.factories import create_notes, create_users
+
+    setup_test_environment()
+    with test_database():
+        users = measure('пользователи', lambda: create_users(USERS))
+        measure('заметки', lambda: create_notes(notes, users))
+
+
+if __name__ == '__main__':
+    main()
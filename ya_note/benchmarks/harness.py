@@ -0,0 +1,193 @@
+"""
+Замеры страниц по именам маршрутов и сравнение с сохранённым замером.
+
+Каждый маршрут пространства имён приложения запрашивается каждым
+клиентом: сначала без учёта прогрева, затем requests раз подряд
+для задержек. Число SQL-запросов и пиковая память считаются
+отдельными запросами, чтобы учёт не искажал задержки. Итог —
+словарь, который сохраняется в JSON и сравнивается с базовым
+замером: регрессией считается рост задержки или памяти больше чем
+на threshold и любой рост числа запросов.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+# Путь маршрута: kwargs для reverse() и параметры строки запроса
+# строятся по засеянным данным.
+Route = namedtuple('Route', ('kwargs', 'query'), defaults=(None, None))
+
+DEFAULT_REQUESTS = 50
+WARMUP = 3
+DEFAULT_THRESHOLD = 0.2
+LATENCY_KEYS = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+def parse_args(description, default_scale):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        '--scale', type=int, default=default_scale,
+        help='размер засеянных данных',
+    )
+    parser.add_argument(
+        '--requests', type=int, default=DEFAULT_REQUESTS,
+        help='запросов на замер задержек',
+    )
+    parser.add_argument(
+        '--route', action='append',
+        help='замерить только этот маршрут (можно несколько раз)',
+    )
+    parser.add_argument('--save', help='куда записать итог в JSON')
+    parser.add_argument('--baseline', help='JSON замера для сравнения')
+    parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD,
+        help='допустимый рост задержки и памяти, доля',
+    )
+    return parser.parse_args()
+
+
+def check_routes(namespace, urlconf, routes):
+    """Каждому маршруту приложения нужно описание, и наоборот."""
+    from django.urls import get_resolver
+
+    names = {
+        f'{namespace}:{pattern.name}'
+        for pattern in get_resolver(urlconf).url_patterns
+        if pattern.name
+    }
+    missing, unknown = names - set(routes), set(routes) - names
+    if missing or unknown:
+        raise SystemExit(
+            f'Маршруты без описания: {sorted(missing)}, '
+            f'описания без маршрута: {sorted(unknown)}.'
+        )
+
+
+def request(client, url):
+    response = client.get(url)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def measure(client, url, requests):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(WARMUP):
+        response = request(client, url)
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        request(client, url)
+        latencies.append((time.perf_counter() - started) * 1000)
+    with CaptureQueriesContext(connection) as queries:
+        request(client, url)
+    # Журнал запросов очищается в начале следующего запроса.
+    query_count = len(queries)
+    tracemalloc.start()
+    request(client, url)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'status': response.status_code,
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'queries': query_count,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run(routes, clients, args):
+    """Замеряет маршруты routes всеми клиентами clients."""
+    import django
+    from django.urls import reverse
+    from django.utils.http import urlencode
+
+    selected = args.route or sorted(routes)
+    results = {}
+    for name in selected:
+        route = routes[name]
+        url = reverse(name, kwargs=route.kwargs)
+        if route.query:
+            url += '?' + urlencode(route.query)
+        for client_name, client in clients.items():
+            results[f'{name} {client_name}'] = measure(
+                client, url, args.requests
+            )
+    return {
+        'meta': {
+            'scale': args.scale,
+            'requests': args.requests,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'results': results,
+    }
+
+
+def regressions(report, baseline, threshold):
+    """Строки сравнения, где замер хуже базового."""
+    found = []
+    for key, result in report['results'].items():
+        base = baseline['results'].get(key)
+        if base is None:
+            continue
+        for metric in (*LATENCY_KEYS, 'peak_kib'):
+            if result[metric] > base[metric] * (1 + threshold):
+                found.append(
+                    f'{key}: {metric} {base[metric]} → {result[metric]}'
+                )
+        if result['queries'] > base['queries']:
+            found.append(
+                f'{key}: queries {base["queries"]} → {result["queries"]}'
+            )
+        if result['status'] != base['status']:
+            found.append(
+                f'{key}: status {base["status"]} → {result["status"]}'
+            )
+    return found
+
+
+def print_report(report):
+    print(
+        f'{"маршрут":<32}{"код":>5}{"p50, мс":>9}{"p95, мс":>9}'
+        f'{"p99, мс":>9}{"запросов":>10}{"память, КиБ":>13}'
+    )
+    for key, result in report['results'].items():
+        print(
+            f'{key:<32}{result["status"]:>5}{result["p50_ms"]:>9.2f}'
+            f'{result["p95_ms"]:>9.2f}{result["p99_ms"]:>9.2f}'
+            f'{result["queries"]:>10}{result["peak_kib"]:>13.1f}'
+        )
+
+
+def finish(report, args):
+    """Печатает итог, сохраняет его и сравнивает с базовым замером."""
+    print_report(report)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+    if not args.baseline:
+        return
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+    if baseline['meta'] != report['meta']:
+        print(f'\nБазовый замер снят в других условиях: {baseline["meta"]}')
+    found = regressions(report, baseline, args.threshold)
+    if found:
+        print(f'\nРегрессии (порог {args.threshold:.0%}):')
+        print('\n'.join(found))
+        sys.exit(1)
+    print('\nРегрессий нет.')
@@ -0,0 +1,79 @@
+"""
+Список заметок у пользователя с большим числом заметок.
+
+Импортирует заметки одного автора во временную базу и замеряет
+первую и последнюю страницу списка: число SQL-запросов, время
+и пиковую память на запрос. Для сравнения замеряется загрузка
+всех заметок автора целиком, как список работал без страниц.
+Запуск из каталога ya_note:
+
+    python -m benchmarks.notes_list [число заметок]
+"""
+import json
+import sys
+import time
+import tracemalloc
+
+from benchmarks.utils import setup_django, test_database
+
+DEFAULT_COUNT = 50_000
+TEXT = 'Длинный текст заметки. ' * 50
+
+
+def generate_lines(count):
+    for number in range(count):
+        yield json.dumps(
+            {'title': f'Заметка {number}', 'text': TEXT},
+            ensure_ascii=False,
+        ) + '\n'
+
+
+def measure(action):
+    """Время, пиковая память и число запросов одного вызова."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    with CaptureQueriesContext(connection) as queries:
+        action()
+    elapsed = (time.perf_counter() - started) * 1000
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return (
+        f'запросов: {len(queries.captured_queries)}, '
+        f'время: {elapsed:.1f} мс, пик памяти: {peak:.1f} МБ'
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT
+    setup_django()
+    from django.contrib.auth import get_user_model
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+    from django.urls import reverse
+
+    from notes.bulk import import_notes, read_rows
+    from notes.models import Note
+
+    setup_test_environment()
+    with test_database():
+        author = get_user_model().objects.create(username='Автор')
+        import_notes(author, read_rows(generate_lines(count), 'jsonl'))
+        client = Client()
+        client.force_login(author)
+        url = reverse('notes:list')
+        last_id = Note.objects.filter(author=author).latest('id').id
+        client.get(url)
+        print('первая страница:', measure(lambda: client.get(url)))
+        print('последняя страница:', measure(
+            lambda: client.get(url, {'after': last_id - 10})
+        ))
+        print('все заметки целиком:', measure(
+            lambda: list(Note.objects.filter(author=author))
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Задержки, SQL-запросы и память каждого маршрута notes.urls.
+
+Во временную базу фабриками notes.factories засеваются scale заметок
+нескольких авторов, затем каждый маршрут запрашивается анонимом
+и автором (см. benchmarks.harness). Все маршруты замеряются
+GET-запросами: формы создания, правки, удаления и импорта
+открываются, но не отправляются, чтобы данные не менялись между
+запросами. Запуск из каталога ya_note:
+
+    python -m benchmarks.routes [--scale N] [--save итог.json]
+        [--baseline база.json] [--threshold 0.2]
+
+С --baseline код возврата 1 означает регрессию.
+"""
+from benchmarks.harness import Route, check_routes, finish, parse_args, run
+from benchmarks.utils import setup_django, test_database
+
+DEFAULT_SCALE = 10_000
+USERS = 10
+
+
+def seed(scale):
+    """Маршруты с аргументами по засеянным данным и автор заметки."""
+    from notes.factories import create_notes, create_users
+
+    users = create_users(USERS)
+    note = create_notes(scale, users)[0]
+    routes = {
+        'notes:home': Route(),
+        'notes:add': Route(),
+        'notes:edit': Route({'slug': note.slug}),
+        'notes:detail': Route({'slug': note.slug}),
+        'notes:delete': Route({'slug': note.slug}),
+        'notes:list': Route(),
+        'notes:success': Route(),
+        'notes:search': Route(query={'q': 'заметка'}),
+        'notes:import': Route(),
+        'notes:export': Route(query={'format': 'jsonl'}),
+    }
+    return routes, users[0]
+
+
+def main():
+    args = parse_args(__doc__.split('\n')[1], DEFAULT_SCALE)
+    setup_django()
+    from django.conf import settings
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment(debug=False)
+    settings.QUERY_BUDGET_MODE = None
+    with test_database():
+        routes, author = seed(args.scale)
+        check_routes('notes', 'notes.urls', routes)
+        author_client = Client()
+        author_client.force_login(author)
+        report = run(
+            routes, {'anonymous': Client(), 'author': author_client}, args
+        )
+    finish(report, args)
+
+
+if __name__ == '__main__':
+    main()
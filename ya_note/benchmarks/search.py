@@ -0,0 +1,70 @@
+"""
+Скорость поиска по заметкам на большой базе.
+
+Импортирует заметки нескольких авторов во временную базу и замеряет
+поиск одного автора по частому и по редкому слову.
+Запуск из каталога ya_note:
+
+    python -m benchmarks.search [число заметок]
+"""
+import json
+import sys
+import time
+
+from benchmarks.utils import setup_django, test_database
+
+DEFAULT_COUNT = 1_000_000
+AUTHORS = 100
+WORDS = (
+    'ёлка', 'игрушки', 'подарок', 'праздник', 'снег', 'мандарины',
+    'гирлянда', 'каникулы', 'коньки', 'шарф',
+)
+QUERIES = ('ёлки', 'праздники снегом', 'редкий')
+REPEAT = 20
+
+
+def generate_lines(count):
+    for number in range(count):
+        words = [WORDS[(number * step) % len(WORDS)] for step in (1, 3, 7)]
+        if number % 10_000 == 0:
+            words.append('редкий')
+        yield json.dumps(
+            {'title': f'Заметка {number}', 'text': ' '.join(words)},
+            ensure_ascii=False,
+        ) + '\n'
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT
+    setup_django()
+    from django.contrib.auth import get_user_model
+
+    from notes.bulk import import_notes, read_rows
+    from notes.search import search_notes
+
+    with test_database():
+        User = get_user_model()
+        authors = [
+            User.objects.create(username=f'Автор {number}')
+            for number in range(AUTHORS)
+        ]
+        per_author = count // AUTHORS
+        started = time.perf_counter()
+        for author in authors:
+            import_notes(
+                author, read_rows(generate_lines(per_author), 'jsonl')
+            )
+        print(f'импорт {count} заметок: {time.perf_counter() - started:.1f} с')
+        for query in QUERIES:
+            started = time.perf_counter()
+            for _ in range(REPEAT):
+                page = search_notes(authors[0], query)
+            elapsed = (time.perf_counter() - started) / REPEAT * 1000
+            print(
+                f'«{query}»: {elapsed:.1f} мс на страницу, '
+                f'найдено на странице {len(page.object_list)}'
+            )
+
+
+if __name__ == '__main__':
+    main()
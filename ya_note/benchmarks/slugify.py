@@ -0,0 +1,58 @@
+"""
+Стоимость транслитерации заголовков заметок.
+
+Сравнивает pytils.translit.slugify и notes.slugs.slugify с кэшем на
+корпусе русских заголовков, где часть заголовков повторяется, как при
+массовом импорте. Запуск из каталога ya_note:
+
+    python -m benchmarks.slugify
+"""
+import random
+import time
+
+from pytils.translit import slugify as translit_slugify
+
+from notes.slugs import slugify, slugify_cache_stats
+
+SEED = 2023
+WORDS = (
+    'заметка', 'список', 'покупок', 'встреча', 'план', 'отпуск', 'идеи',
+    'проекта', 'книги', 'прочитать', 'рецепт', 'пирога', 'задачи',
+    'неделю', 'созвон', 'с', 'командой', 'ремонт', 'квартиры', 'итоги',
+    'года', 'фильмы', 'подарки', 'на', 'день', 'рождения', 'ёлка',
+)
+DISTINCT_TITLES = 2000
+CALLS = 20000
+
+
+def make_corpus(rnd):
+    titles = [
+        ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 6)))
+        for _ in range(DISTINCT_TITLES)
+    ]
+    return [rnd.choice(titles) for _ in range(CALLS)]
+
+
+def measure(function, corpus):
+    """Среднее время одного вызова, мкс."""
+    start = time.perf_counter()
+    for title in corpus:
+        function(title)
+    return (time.perf_counter() - start) / len(corpus) * 10 ** 6
+
+
+def main():
+    corpus = make_corpus(random.Random(SEED))
+    plain = measure(translit_slugify, corpus)
+    slugify.cache_clear()
+    cold = measure(slugify, corpus)
+    warm = measure(slugify, corpus)
+    print(f'вызовов: {CALLS}, разных заголовков: {DISTINCT_TITLES}')
+    print(f'pytils:              {plain:8.2f} мкс')
+    print(f'с кэшем, 1-й проход: {cold:8.2f} мкс')
+    print(f'с кэшем, 2-й проход: {warm:8.2f} мкс')
+    print(f'счётчики кэша: {slugify_cache_stats()}')
+
+
+if __name__ == '__main__':
+    main()
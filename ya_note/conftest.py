@@ -0,0 +1,14 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def query_budget(settings):
+    """Превышение бюджета SQL-запросов роняет тест."""
+    settings.QUERY_BUDGET_MODE = 'raise'
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кэш не переживает тест, в отличие от базы."""
+    cache.clear()
@@ -0,0 +1,16 @@
+"""
+Маршруты notes под ASGI: список заметок заменён асинхронным.
+
+Остальные адреса берутся из notes.urls; Django проверяет шаблоны
+по порядку, поэтому асинхронный вариант стоит первым.
+"""
+from django.urls import path
+
+from notes import async_views, urls
+
+app_name = 'notes'
+
+urlpatterns = [
+    path('notes/', async_views.notes_list, name='list'),
+    *urls.urlpatterns,
+]
@@ -0,0 +1,52 @@
+"""
+Асинхронный список заметок для запуска под ASGI.
+
+Django 3.2 работает с ORM только синхронно, поэтому проверка входа,
+валидатор и страница заметок готовятся за один переход в sync_to_async
+тем же NotesList, что и в синхронном варианте. Шаблон отрисовывается
+в отдельном потоке пула: в цикле событий он задерживал бы остальные
+запросы, а в потоке, где Django под ASGI выполняет синхронный код всех
+запросов, — их работу с базой.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+from .views import NotesList, notes_etag
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def prepare_list(request):
+    """
+    Синхронная часть страницы: вход, ETag и заметки из кэша или базы.
+
+    Возвращает готовый ответ (перенаправление на вход или 304) либо
+    контекст для шаблона, а также ETag страницы.
+    """
+    view = NotesList()
+    view.setup(request)
+    if not request.user.is_authenticated:
+        return view.handle_no_permission(), None, None
+    etag = quote_etag(notes_etag(request))
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return response, None, etag
+    view.object_list = view.get_queryset()
+    return None, view.get_context_data(), etag
+
+
+async def notes_list(request):
+    """Список заметок пользователя."""
+    if request.method not in SAFE_METHODS:
+        return HttpResponseNotAllowed(SAFE_METHODS)
+    response, context, etag = await sync_to_async(prepare_list)(request)
+    if response is None:
+        response = await sync_to_async(render, thread_sensitive=False)(
+            request, NotesList.template_name, context
+        )
+    if etag is not None:
+        response.headers.setdefault('ETag', etag)
+    return response
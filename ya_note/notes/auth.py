@@ -0,0 +1,40 @@
+"""
+Пользователь для request.user из кэша процесса.
+
+Без кэша каждый запрос авторизованного пользователя загружает его
+из базы. Запись сбрасывается сигналами при сохранении и удалении
+пользователя и при выходе; в других процессах она живёт не дольше
+settings.USER_CACHE_TIMEOUT секунд.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+
+from .metrics import count_cache
+
+USER_KEY = 'auth:user:{pk}'
+
+
+def get_cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def forget_user(pk):
+    get_cache().delete(USER_KEY.format(pk=pk))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который сначала ищет пользователя в кэше."""
+
+    def get_user(self, user_id):
+        timeout = settings.USER_CACHE_TIMEOUT
+        if not timeout:
+            return super().get_user(user_id)
+        key = USER_KEY.format(pk=user_id)
+        user = get_cache().get(key)
+        count_cache('user', user is not None)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                get_cache().set(key, user, timeout)
+        return user
@@ -0,0 +1,209 @@
+"""
+Массовый импорт и экспорт заметок.
+
+Строки читаются потоком и проверяются полями NoteForm пачками.
+Занятые slug один раз читаются из базы в память, конфликты в пачке
+разрешаются без запросов, а сами заметки вставляются bulk_create
+и одним запросом добавляются в индекс поиска. Импорт идёт одной
+транзакцией, и недочитанный файл не оставляет в базе ни одной заметки.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .cache import bump_notes_version
+from .forms import WARNING, NoteForm
+from .metrics import WRITES, count_form_error
+from .models import Note
+from .search import index_queryset
+from .slugs import DEFAULT_SLUG, next_free_slug, slugify
+
+FIELDS = ('title', 'text', 'slug')
+FORMATS = ('jsonl', 'csv')
+IMPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_SIZE = 2000
+# Сколько ошибок строк хранить в отчёте об импорте.
+MAX_REPORTED_ERRORS = 100
+# slug вставленной пачки передаются в IN частями: SQLite до 3.32
+# принимает не больше 999 параметров в запросе.
+SLUG_QUERY_CHUNK = 500
+# Кодировка файлов импорта: utf-8-sig пропускает BOM, который пишет
+# в начало CSV, например, Excel.
+IMPORT_ENCODING = 'utf-8-sig'
+
+
+class ImportResult:
+    """Итог импорта: число созданных заметок и ошибки по номерам строк."""
+
+    def __init__(self):
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, errors))
+
+
+def read_rows(lines, file_format):
+    """
+    Строки файла как пары (номер строки, словарь полей).
+
+    Вместо словаря строки, которую не удалось разобрать, отдаётся
+    текст ошибки.
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            yield number, f'Некорректный JSON: {error}'
+            continue
+        if not isinstance(row, dict):
+            row = 'Строка должна быть JSON-объектом.'
+        yield number, row
+
+
+def clean_row(row):
+    """
+    Проверяет строку полями NoteForm и возвращает (данные, ошибки).
+
+    Поля формы не зависят от экземпляра, поэтому форма на каждую строку
+    не создаётся: её построение в разы дороже самой проверки.
+    """
+    data, errors = {}, {}
+    for name, field in NoteForm.base_fields.items():
+        try:
+            data[name] = field.clean(row.get(name))
+        except ValidationError as error:
+            errors[name] = [
+                {'message': message, 'code': code or ''}
+                for message, code in zip(
+                    error.messages,
+                    (item.code for item in error.error_list),
+                )
+            ]
+    return data, errors
+
+
+def slug_conflict(slug):
+    """Ошибка строки с занятым slug, в формате ошибок clean_row()."""
+    count_form_error('NoteForm', 'slug', 'slug_conflict')
+    return {'slug': [{'message': slug + WARNING, 'code': 'slug_conflict'}]}
+
+
+@transaction.atomic
+def import_notes(author, rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Создаёт заметки автора из строк read_rows().
+
+    Ошибка чтения файла, например не UTF-8 в середине, отменяет
+    и уже вставленные пачки.
+    """
+    result = ImportResult()
+    max_length = Note._meta.get_field('slug').max_length
+    taken = set(Note.objects.values_list('slug', flat=True).iterator())
+    # Для каждой основы номер, с которого искать свободный суффикс:
+    # меньшие номера уже заняты, и перебирать их заново не нужно.
+    generated = {}
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return result
+        pending = []
+        for line, row in batch:
+            if isinstance(row, str):
+                result.add_error(line, {'__all__': [row]})
+                continue
+            data, errors = clean_row(row)
+            if errors:
+                result.add_error(line, errors)
+                continue
+            note = Note(author=author, **data)
+            explicit_slug = bool(note.slug)
+            if not explicit_slug:
+                base = slugify(note.title)[:max_length] or DEFAULT_SLUG
+                note.slug = next_free_slug(
+                    base, taken, max_length, start=generated.get(base, 2)
+                )
+                if note.slug != base:
+                    number = int(note.slug.rsplit('-', 1)[1])
+                    generated[base] = number + 1
+            elif note.slug in taken:
+                result.add_error(line, slug_conflict(note.slug))
+                continue
+            taken.add(note.slug)
+            pending.append((line, note, explicit_slug))
+        result.created += save_batch(pending, result)
+
+
+def save_batch(pending, result):
+    """
+    Вставляет пачку одним bulk_create.
+
+    Если конкурентная запись успела занять чей-то slug, пачка
+    сохраняется по одной заметке: подобранные slug модель подберёт
+    заново, а заданные явно становятся ошибками строк.
+    """
+    if not pending:
+        return 0
+    notes = [note for _, note, _ in pending]
+    try:
+        with transaction.atomic():
+            Note.objects.bulk_create(notes)
+            # bulk_create не вызывает сигналов: индекс поиска дополняем,
+            # а версию заметок автора меняем сами.
+            slugs = [note.slug for note in notes]
+            for start in range(0, len(slugs), SLUG_QUERY_CHUNK):
+                index_queryset(Note.objects.filter(
+                    slug__in=slugs[start:start + SLUG_QUERY_CHUNK]
+                ))
+            bump_notes_version(notes[0].author_id)
+        WRITES.inc(len(pending), action='created')
+        return len(pending)
+    except IntegrityError:
+        pass
+    created = 0
+    for line, note, explicit_slug in pending:
+        if not explicit_slug:
+            note.slug = ''
+        try:
+            note.save()
+        except IntegrityError:
+            result.add_error(line, slug_conflict(note.slug))
+        else:
+            created += 1
+    return created
+
+
+class Echo:
+    """Псевдофайл для csv.writer: возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_notes(author, file_format):
+    """Заметки автора построчно в формате JSON Lines или CSV."""
+    rows = Note.objects.filter(author=author).order_by('id').values_list(
+        *FIELDS
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    if file_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(FIELDS)
+        for row in rows:
+            yield writer.writerow(row)
+        return
+    for row in rows:
+        yield json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + '\n'
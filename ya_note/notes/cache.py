@@ -0,0 +1,123 @@
+"""
+Штампы версий заметок пользователя и кэш его заметок.
+
+Штамп меняется сигналами при сохранении и удалении заметок автора,
+по нему строятся валидаторы ETag страниц заметок. Он же входит в ключи
+кэша страниц списка и отдельных заметок: после изменения заметки
+старые записи больше не читаются и просто вытесняются по таймауту.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .metrics import count_cache
+
+NOTES_VERSION_KEY = 'notes:user:{user_id}:version'
+NOTES_PAGE_KEY = 'notes:user:{user_id}:{version}:page:{after}'
+NOTE_KEY = 'notes:user:{user_id}:{version}:note:{slug}'
+STATS_KEY = 'notes:stats:{kind}:{outcome}'
+CACHE_KINDS = ('page', 'note')
+
+
+def get_cache():
+    return caches[settings.NOTES_CACHE_ALIAS]
+
+
+def notes_version(user_id):
+    """
+    Возвращает штамп версии заметок пользователя.
+
+    Начальное значение берётся из времени, чтобы после вытеснения
+    штампа из кэша не вернуться к уже использованной версии.
+    """
+    cache = get_cache()
+    key = NOTES_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_notes_version(user_id):
+    """
+    Меняет штамп версии заметок пользователя.
+
+    Штамп меняется сразу и ещё раз после фиксации транзакции: иначе
+    конкурентный запрос мог бы успеть закэшировать старые данные
+    под уже новым штампом.
+    """
+    key = NOTES_VERSION_KEY.format(user_id=user_id)
+
+    def bump():
+        cache = get_cache()
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, time.time_ns(), timeout=None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def count(kind, outcome):
+    cache = get_cache()
+    key = STATS_KEY.format(kind=kind, outcome=outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+
+
+def cached(kind, key, load):
+    """Значение из кэша, а при промахе — результат load()."""
+    cache = get_cache()
+    value = cache.get(key)
+    count_cache(kind, value is not None)
+    if value is not None:
+        count(kind, 'hits')
+        return value
+    count(kind, 'misses')
+    value = load()
+    cache.set(key, value, settings.NOTES_CACHE_TIMEOUT)
+    return value
+
+
+def notes_page(user_id, after, load):
+    """Страница списка заметок пользователя после id after."""
+    key = NOTES_PAGE_KEY.format(
+        user_id=user_id, version=notes_version(user_id), after=after
+    )
+    return cached('page', key, load)
+
+
+def note(user_id, slug, load):
+    """Заметка пользователя по slug."""
+    key = NOTE_KEY.format(
+        user_id=user_id, version=notes_version(user_id), slug=slug
+    )
+    return cached('note', key, load)
+
+
+def cache_stats():
+    """Попадания и промахи кэша заметок по видам записей."""
+    keys = {
+        (kind, outcome): STATS_KEY.format(kind=kind, outcome=outcome)
+        for kind in CACHE_KINDS
+        for outcome in ('hits', 'misses')
+    }
+    values = get_cache().get_many(keys.values())
+    stats = {}
+    for kind in CACHE_KINDS:
+        hits = values.get(keys[kind, 'hits'], 0)
+        misses = values.get(keys[kind, 'misses'], 0)
+        total = hits + misses
+        stats[kind] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+        }
+    return stats
@@ -0,0 +1,57 @@
+"""
+Настройка соединений с базой.
+
+Прагмы SQLite из settings.SQLITE_PRAGMAS выставляются при открытии
+каждого соединения. Постоянные соединения (CONN_MAX_AGE) перед
+HTTP-запросом проверяются на живость: Django 3.2 этого не делает,
+и оборванное соединение обнаружилось бы только ошибкой запроса.
+Проверка — лишний запрос к базе, поэтому соединение проверяется не
+чаще раза в settings.DB_HEALTH_CHECK_INTERVAL секунд, и запросы,
+которые обходятся кэшем, в промежутках её не ждут.
+"""
+import time
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """
+    Выставляет прагмы SQLite новому соединению.
+
+    Прагмы выполняются на соединении драйвера, мимо обёртки Django,
+    чтобы не попадать в учёт SQL-запросов.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def mark_checked(sender, connection, **kwargs):
+    """Только что открытое соединение проверять не нужно."""
+    connection.health_checked_at = time.monotonic()
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    """Закрывает оборванные постоянные соединения перед запросом."""
+    if not settings.DB_HEALTH_CHECKS:
+        return
+    now = time.monotonic()
+    for connection in connections.all():
+        if (
+            connection.connection is None
+            or not connection.settings_dict['CONN_MAX_AGE']
+            or now - getattr(connection, 'health_checked_at', 0)
+            < settings.DB_HEALTH_CHECK_INTERVAL
+        ):
+            continue
+        connection.health_checked_at = now
+        if not connection.is_usable():
+            connection.close()
@@ -0,0 +1,90 @@
+"""
+Детерминированные наборы данных для тестов и бенчмарков.
+
+Каждая фабрика вставляет записи одной модели одним bulk_create
+(на SQLite Django сам режет его на пачки по лимиту параметров)
+и возвращает их с первичными ключами. Имена, тексты и slug зависят
+только от номера записи, поэтому одни и те же вызовы дают одни и те
+же данные, а масштаб задаётся числом записей: те же фабрики наполняют
+и фикстуры тестов, и базы бенчмарков на 10^5 строк.
+
+bulk_create не вызывает сигналов, поэтому фабрики сами дополняют
+поисковый индекс и меняют штампы кэша, как это сделали бы сигналы.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.db import connections, transaction
+from django.db.models import Max
+
+from .cache import bump_notes_version
+from .models import Note
+from .search import index_queryset
+
+
+def _insert(model, objects):
+    """
+    Вставляет записи и проставляет им первичные ключи.
+
+    Если база не возвращает ключи из bulk_create (SQLite), они
+    читаются одним запросом: записи одной транзакции получают
+    ключи по возрастанию в порядке вставки.
+    """
+    queryset = model.objects.all()
+    features = connections[queryset.db].features
+    last_pk = None
+    if not features.can_return_rows_from_bulk_insert:
+        last_pk = queryset.aggregate(last=Max('pk'))['last'] or 0
+    queryset.bulk_create(objects)
+    if last_pk is not None:
+        pks = queryset.filter(pk__gt=last_pk).order_by('pk').values_list(
+            'pk', flat=True
+        )
+        for obj, pk in zip(objects, pks):
+            obj.pk = pk
+    return objects
+
+
+def create_users(count, name='Пользователь {number}', offset=0,
+                 password=None):
+    """
+    Пользователи с именами name.format(number=…) от offset.
+
+    Пароль, если задан, хэшируется один раз на всех; иначе войти
+    можно только через force_login.
+    """
+    User = get_user_model()
+    hashed = make_password(password) if password else UNUSABLE_PASSWORD_PREFIX
+    with transaction.atomic():
+        return _insert(User, [
+            User(username=name.format(number=number), password=hashed)
+            for number in range(offset, offset + count)
+        ])
+
+
+def create_notes(count, authors, offset=0, slug='note-{number}'):
+    """
+    Заметки «Заметка N» со slug по шаблону, авторы идут по кругу.
+
+    При повторных вызовах offset или шаблон slug должны быть другими:
+    slug заметок уникальны.
+    """
+    author_pks = [author.pk for author in authors]
+    notes = [
+        Note(
+            title=f'Заметка {number}',
+            text=f'Текст заметки {number}.',
+            slug=slug.format(number=number),
+            author_id=author_pks[number % len(author_pks)],
+        )
+        for number in range(offset, offset + count)
+    ]
+    if not notes:
+        return notes
+    with transaction.atomic():
+        _insert(Note, notes)
+        index_queryset(Note.objects.filter(
+            pk__gte=notes[0].pk, pk__lte=notes[-1].pk
+        ))
+        for author_pk in set(author_pks[:count]):
+            bump_notes_version(author_pk)
+    return notes
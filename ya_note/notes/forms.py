@@ -1,29 +1,51 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
 
+from .metrics import FormMetricsMixin
 from .models import Note
 
 WARNING = ' - такой slug уже существует, придумайте уникальное значение!'
 
 
-class NoteForm(forms.ModelForm):
+class NoteForm(FormMetricsMixin, forms.ModelForm):
     """Форма для создания или обновления заметки."""
 
     class Meta:
         model = Note
         fields = ('title', 'text', 'slug')
 
-    def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
-        return slug
+    def validate_unique(self):
+        """
+        Уникальность slug не проверяем отдельным запросом.
+
+        Её проверяет ограничение базы при сохранении: так нет лишнего
+        запроса и гонки между проверкой и записью. Конфликт явно
+        заданного slug превращается в ошибку формы во view, а пустой
+        slug модель подбирает сама.
+        """
+        exclude = {*self._get_validation_exclusions(), 'slug'}
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self._update_errors(error)
+
+
+class NoteImportForm(forms.Form):
+    """Форма загрузки файла с заметками."""
+    file = forms.FileField(
+        label='Файл',
+        help_text=(
+            'JSON Lines: по объекту {"title", "text", "slug"} в строке, '
+            'или CSV с колонками title, text, slug. Пустой slug будет '
+            'подобран по заголовку.'
+        ),
+    )
+    format = forms.ChoiceField(
+        label='Формат',
+        choices=(('jsonl', 'JSON Lines'), ('csv', 'CSV')),
+    )
+
+
+class SearchForm(forms.Form):
+    """Строка поиска."""
+    q = forms.CharField(label='Поиск', max_length=200, required=False)
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.bulk import FORMATS, export_notes
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки пользователя в JSON Lines или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Автор заметок.')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--output', type=Path,
+            help='Файл для выгрузки; по умолчанию — стандартный вывод.',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.'
+            )
+        chunks = export_notes(author, options['format'])
+        if options['output'] is None:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with options['output'].open('w', encoding='utf-8', newline='') as file:
+            file.writelines(chunks)
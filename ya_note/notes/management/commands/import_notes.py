@@ -0,0 +1,50 @@
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.bulk import (
+    FORMATS, IMPORT_BATCH_SIZE, IMPORT_ENCODING, import_notes, read_rows
+)
+
+
+class Command(BaseCommand):
+    help = 'Импортирует заметки пользователя из файла JSON Lines или CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Автор заметок.')
+        parser.add_argument('path', type=Path, help='Файл с заметками.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию — по расширению.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+            help='Заметок в одной пачке вставки.',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден.'
+            )
+        path = options['path']
+        file_format = options['format'] or (
+            'csv' if path.suffix.lower() == '.csv' else 'jsonl'
+        )
+        started = time.perf_counter()
+        with path.open(encoding=IMPORT_ENCODING, newline='') as lines:
+            result = import_notes(
+                author, read_rows(lines, file_format), options['batch_size']
+            )
+        elapsed = time.perf_counter() - started
+        for line, errors in result.errors:
+            self.stderr.write(f'Строка {line}: {errors}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано заметок: {result.created}, ошибок: {result.failed}, '
+            f'за {elapsed:.1f} с.'
+        ))
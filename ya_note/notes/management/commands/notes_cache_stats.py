@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from notes.cache import cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Выводит попадания и промахи кэша заметок.'
+
+    def handle(self, *args, **options):
+        for kind, stats in cache_stats().items():
+            self.stdout.write(
+                f'{kind}: попаданий {stats["hits"]}, '
+                f'промахов {stats["misses"]}, '
+                f'доля попаданий {stats["hit_rate"]:.1%}'
+            )
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+# Таблица поиска описана здесь, а не импортируется из notes.search,
+# чтобы миграция не менялась вместе с кодом приложения.
+FTS_TABLE = 'notes_note_fts'
+FOLD = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def has_fts5(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_fts(apps, schema_editor):
+    if not has_fts5(schema_editor.connection):
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+        f"author, title, text, tokenize='unicode61 remove_diacritics 2')"
+    )
+    # Автор только фильтрует выдачу, в ранжировании он не участвует,
+    # совпадение в заголовке весит больше, чем в тексте.
+    schema_editor.execute(
+        f'INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) '
+        f"VALUES ('rank', 'bm25(0.0, 10.0, 1.0)')"
+    )
+    schema_editor.execute(
+        f'INSERT INTO {FTS_TABLE} (rowid, author, title, text) '
+        f'SELECT id, author_id, {FOLD.format("title")}, '
+        f'{FOLD.format("text")} FROM notes_note'
+    )
+
+
+def drop_fts(apps, schema_editor):
+    if has_fts5(schema_editor.connection):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,41 @@
+from django.db import migrations
+
+# Индекс хранил текст с «ё», заменённой на «е», и выдача показывала
+# изменённый текст. Теперь в индексе исходный текст, а «ё» учитывает
+# запрос поиска.
+FTS_TABLE = 'notes_note_fts'
+FOLD = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def has_fts5(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def refill(title, text):
+    def operation(apps, schema_editor):
+        if not has_fts5(schema_editor.connection):
+            return
+        schema_editor.execute(f'DELETE FROM {FTS_TABLE}')
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, author, title, text) '
+            f'SELECT id, author_id, {title}, {text} FROM notes_note'
+        )
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0003_note_fts'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            refill('title', 'text'),
+            refill(FOLD.format('title'), FOLD.format('text')),
+        ),
+    ]
@@ -1,7 +1,13 @@
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
-from pytils.translit import slugify
+from .slugs import (
+    DEFAULT_SLUG, is_slug_conflict, next_free_slug, slug_prefix, slugify
+)
+
+# Сколько раз пробуем записать заметку со свободным slug, прежде чем
+# сдаться, если конкурентные запросы раз за разом занимают его раньше.
+SLUG_ATTEMPTS = 10
 
 
 class Note(models.Model):
@@ -28,11 +34,38 @@ class Note(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Сохраняет заметку, подбирая slug по заголовку, если он не задан.
+
+        Уникальность проверяет сама база: в обычном случае это одна
+        запись без предварительного запроса. При конфликте одним
+        запросом читаем занятые варианты и пробуем следующий свободный
+        с суффиксом -2, -3…
+        Явно заданный slug не меняется: конфликт выбрасывает IntegrityError.
+        """
+        if self.slug:
+            with transaction.atomic():
+                return super().save(*args, **kwargs)
+        max_length = self._meta.get_field('slug').max_length
+        base = slugify(self.title)[:max_length] or DEFAULT_SLUG
+        self.slug = base
+        for attempt in range(1, SLUG_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError as error:
+                if not is_slug_conflict(error) or attempt == SLUG_ATTEMPTS:
+                    raise
+            taken = set(Note.objects.filter(
+                slug__startswith=slug_prefix(base, max_length)
+            ).values_list('slug', flat=True))
+            self.slug = next_free_slug(base, taken, max_length)
@@ -0,0 +1,181 @@
+"""
+Разбивка времени запроса по фазам и профили выборочных запросов.
+
+ProfilingMiddleware включается настройкой PROFILING (переменная
+окружения PROFILING=1) и стоит первым в MIDDLEWARE. Время запроса
+делится на непересекающиеся фазы: db — SQL-запросы, tpl — отрисовка
+шаблонов, view — код представления, mw — всё остальное, то есть
+middleware. Запрос к базе из шаблона считается в db. Разбивка уходит
+в заголовок Server-Timing, который показывают инструменты
+разработчика браузера.
+
+Django сообщает об отрисовке шаблона сигналом template_rendered только
+в тестах, поэтому время шаблонов считает обёртка Template.render,
+которая ставится при первом замере. У ответов без TemplateResponse
+нет точки, где заканчивается представление: ответная часть
+внутренних middleware для них попадает во view.
+
+Доля запросов PROFILING_SAMPLE_RATE выполняется под cProfile, профиль
+сохраняется в PROFILING_DIR для pstats. Вне запросов те же фазы
+считает контекстный менеджер record_timings().
+"""
+import cProfile
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.base import Template
+
+PHASES = ('db', 'tpl', 'view', 'mw')
+current_timings = ContextVar('current_timings', default=None)
+# cProfile не умеет профилировать два запроса сразу.
+profiler_lock = threading.Lock()
+
+
+class Timings:
+    """
+    Время по фазам.
+
+    Фазы вложены друг в друга стеком, время идёт фазе на его вершине.
+    Объект же служит обёрткой для connection.execute_wrapper.
+    """
+
+    def __init__(self, phase):
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        self.total = None
+        self._stack = [phase]
+        self._started = self._mark = time.perf_counter()
+
+    def _switch(self):
+        now = time.perf_counter()
+        self.durations[self._stack[-1]] += now - self._mark
+        self._mark = now
+
+    @contextmanager
+    def phase(self, name):
+        self._switch()
+        self._stack.append(name)
+        try:
+            yield
+        finally:
+            self._switch()
+            self._stack.pop()
+
+    def set_base(self, name):
+        """Меняет фазу, в которую возвращается время вне вложенных."""
+        self._switch()
+        self._stack[0] = name
+
+    def stop(self):
+        self._switch()
+        self.total = self._mark - self._started
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        with self.phase('db'):
+            return execute(sql, params, many, context)
+
+    def server_timing(self):
+        metrics = [
+            f'{name};dur={self.durations[name] * 1000:.1f}'
+            for name in PHASES
+        ]
+        metrics[0] += f';desc="{self.queries} SQL"'
+        metrics.append(f'total;dur={self.total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+def instrument_templates():
+    """Оборачивает Template.render замером фазы tpl, один раз."""
+    render = Template.render
+    if getattr(render, 'timed', False):
+        return
+
+    @wraps(render)
+    def timed_render(self, context):
+        timings = current_timings.get()
+        if timings is None:
+            return render(self, context)
+        with timings.phase('tpl'):
+            return render(self, context)
+
+    timed_render.timed = True
+    Template.render = timed_render
+
+
+@contextmanager
+def record_timings(phase='view'):
+    """Считает фазы блока; по выходу заполнен и total."""
+    instrument_templates()
+    timings = Timings(phase)
+    token = current_timings.set(timings)
+    try:
+        with connection.execute_wrapper(timings):
+            yield timings
+    finally:
+        current_timings.reset(token)
+        timings.stop()
+
+
+class ProfilingMiddleware:
+    """Заголовок Server-Timing и профили cProfile выборочных запросов."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profiler = None
+        if (
+            random.random() < settings.PROFILING_SAMPLE_RATE
+            and profiler_lock.acquire(blocking=False)
+        ):
+            profiler = cProfile.Profile()
+        try:
+            with record_timings('mw') as timings:
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+            if profiler is not None:
+                self.dump(request, profiler)
+        finally:
+            if profiler is not None:
+                profiler_lock.release()
+        response['Server-Timing'] = timings.server_timing()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = current_timings.get()
+        if timings is not None:
+            timings.set_base('view')
+
+    def process_template_response(self, request, response):
+        # Представление вернуло ответ, дальше его отрисует Django.
+        timings = current_timings.get()
+        if timings is not None:
+            timings.set_base('mw')
+        return response
+
+    def dump(self, request, profiler):
+        match = request.resolver_match
+        name = match.view_name.replace(':', '-') if match else 'unknown'
+        directory = Path(settings.PROFILING_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(directory / (
+            f'{time.strftime("%Y%m%d-%H%M%S")}-{name}-'
+            f'{uuid.uuid4().hex[:8]}.prof'
+        ))
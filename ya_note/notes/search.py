@@ -0,0 +1,248 @@
+"""
+Полнотекстовый поиск по заметкам.
+
+На SQLite с FTS5 заметки хранятся в виртуальной таблице notes_note_fts,
+которую создаёт миграция и синхронизируют сигналы. Колонка author
+содержит id автора: фильтр по ней FTS5 выполняет по тому же индексу,
+что и поиск слов, не просматривая чужие заметки. На базах без FTS5
+поиск идёт через icontains, без ранжирования.
+
+Русские слова в запросе сводятся к основе и ищутся по префиксу.
+Индекс хранит текст как есть, чтобы выдача показывала его без
+изменений, а «ё» и «е» не различает запрос: основа ищется и с «е»,
+и с «ё» на месте каждой «е» по очереди — «ё» в слове бывает одна.
+"""
+import re
+import sqlite3
+from collections import namedtuple
+from functools import lru_cache
+
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
+
+from .models import Note
+
+FTS_TABLE = 'notes_note_fts'
+RESULTS_PER_PAGE = 20
+# Глубже ранжированную выдачу не листаем: OFFSET на больших выборках
+# дорог, а такие страницы никто не читает.
+MAX_PAGE = 50
+MAX_TERMS = 8
+SNIPPET_WORDS = 16
+MIN_STEM_LENGTH = 3
+# Однобуквенные слова («и», «в») не ищем: по префиксу под них подходит
+# огромная часть индекса.
+MIN_TERM_LENGTH = 2
+# Окончания русских слов, от длинных к коротким.
+ENDINGS = sorted(
+    (
+        'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими',
+        'ией', 'иях', 'иям', 'ой', 'ей', 'ий', 'ый', 'ая', 'яя', 'ое',
+        'ее', 'ые', 'ие', 'ов', 'ев', 'ам', 'ям', 'ах', 'ях', 'ом', 'ем',
+        'ую', 'юю', 'ия', 'ть', 'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю',
+        'ь', 'й',
+    ),
+    key=len,
+    reverse=True,
+)
+CYRILLIC = re.compile('[а-я]')
+WORD = re.compile(r'\w+')
+# Границы совпадений в сниппетах. Текст экранируется целиком,
+# и только потом маркеры заменяются на теги <mark>.
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+SearchPage = namedtuple('SearchPage', ('object_list', 'number', 'has_next'))
+
+
+@lru_cache(maxsize=None)
+def sqlite_has_fts5():
+    """Собран ли SQLite, с которым работает Django, с FTS5."""
+    connection = sqlite3.connect(':memory:')
+    try:
+        return bool(connection.execute(
+            "SELECT sqlite_compileoption_used('ENABLE_FTS5')"
+        ).fetchone()[0])
+    finally:
+        connection.close()
+
+
+def fts_enabled(using='default'):
+    return connections[using].vendor == 'sqlite' and sqlite_has_fts5()
+
+
+def fold_yo(text):
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def yo_variants(term):
+    """Основа с «е» и с «ё» на месте каждой её «е» по очереди."""
+    return [term] + [
+        term[:index] + 'ё' + term[index + 1:]
+        for index, char in enumerate(term) if char == 'е'
+    ]
+
+
+def stem(word):
+    """Отрезает у русского слова окончание, оставляя основу."""
+    if not CYRILLIC.search(word):
+        return word
+    for ending in ENDINGS:
+        if (
+            word.endswith(ending)
+            and len(word) - len(ending) >= MIN_STEM_LENGTH
+        ):
+            return word[:-len(ending)]
+    return word
+
+
+def query_terms(query):
+    """Основы слов запроса без повторов, не больше MAX_TERMS."""
+    terms = []
+    for word in WORD.findall(fold_yo(query.lower())):
+        term = stem(word)
+        if len(term) >= MIN_TERM_LENGTH and term not in terms:
+            terms.append(term)
+    return terms[:MAX_TERMS]
+
+
+def match_expression(author_id, terms):
+    """
+    Запрос FTS5: все основы по префиксу в заголовке или тексте автора.
+
+    Основы состоят только из букв и цифр, поэтому кавычки в них
+    не встречаются и синтаксис запроса сломать не могут.
+    """
+    words = ' AND '.join(
+        '(' + ' OR '.join(f'"{variant}"*' for variant in yo_variants(term))
+        + ')'
+        for term in terms
+    )
+    return f'author:"{author_id}" AND {{title text}}:({words})'
+
+
+def highlight(text):
+    """Экранирует сниппет и размечает совпадения тегами <mark>."""
+    return mark_safe(
+        escape(text)
+        .replace(MATCH_START, '<mark>')
+        .replace(MATCH_END, '</mark>')
+    )
+
+
+def parse_page(value):
+    """Номер страницы из адреса, на мусор отвечаем 404."""
+    if value is None:
+        return 1
+    try:
+        number = int(value)
+    except ValueError:
+        raise Http404('Некорректный номер страницы.')
+    if not 1 <= number <= MAX_PAGE:
+        raise Http404('Некорректный номер страницы.')
+    return number
+
+
+def search_notes(author, query, page=1, per_page=RESULTS_PER_PAGE):
+    """
+    Страница заметок автора, подходящих под запрос.
+
+    У заметок выдачи есть атрибуты title_html и snippet с размеченными
+    совпадениями.
+    """
+    terms = query_terms(query)
+    if not terms:
+        return SearchPage([], page, False)
+    offset = (page - 1) * per_page
+    if fts_enabled():
+        notes = list(Note.objects.raw(
+            f'SELECT note.id, note.title, note.slug, '
+            f'highlight({FTS_TABLE}, 1, %s, %s) AS title_html, '
+            f"snippet({FTS_TABLE}, 2, %s, %s, '…', %s) AS snippet "
+            f'FROM {FTS_TABLE} '
+            f'JOIN notes_note AS note ON note.id = {FTS_TABLE}.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY {FTS_TABLE}.rank LIMIT %s OFFSET %s',
+            (
+                MATCH_START, MATCH_END, MATCH_START, MATCH_END,
+                SNIPPET_WORDS, match_expression(author.pk, terms),
+                per_page + 1, offset,
+            ),
+        ))
+        for note in notes:
+            note.title_html = highlight(note.title_html)
+            note.snippet = highlight(note.snippet)
+    else:
+        queryset = Note.objects.filter(author=author).order_by('-id')
+        for term in terms:
+            condition = Q()
+            for variant in yo_variants(term):
+                condition |= (
+                    Q(title__icontains=variant) | Q(text__icontains=variant)
+                )
+            queryset = queryset.filter(condition)
+        notes = list(queryset[offset:offset + per_page + 1])
+        for note in notes:
+            note.title_html = escape(note.title)
+            note.snippet = escape(
+                Truncator(note.text).words(SNIPPET_WORDS)
+            )
+    return SearchPage(notes[:per_page], page, len(notes) > per_page)
+
+
+def index_note(note, using='default', created=False):
+    """Записывает заметку в индекс, заменяя прежнюю версию."""
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        if not created:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (note.pk,)
+            )
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, author, title, text) '
+            f'VALUES (%s, %s, %s, %s)',
+            (note.pk, note.author_id, note.title, note.text),
+        )
+
+
+def unindex_note(pk, using='default'):
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', (pk,))
+
+
+def index_queryset(queryset):
+    """
+    Добавляет в индекс заметки выборки одним INSERT … SELECT.
+
+    Нужна для записей, которые не вызывают сигналов, как bulk_create.
+    Заметок выборки в индексе ещё быть не должно.
+    """
+    if not fts_enabled(queryset.db):
+        return
+    sql, params = queryset.order_by().values_list(
+        'id', 'author_id', 'title', 'text'
+    ).query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, author, title, text) {sql}',
+            params,
+        )
+
+
+def rebuild_index(using='default'):
+    """Строит индекс заново по всем заметкам."""
+    if not fts_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    index_queryset(Note.objects.using(using).all())
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+        )
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_out
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import auth, metrics
+from .cache import bump_notes_version
+from .models import Note
+from .search import index_note, unindex_note
+
+
+@receiver((post_save, post_delete), sender=Note)
+def note_changed(sender, instance, **kwargs):
+    """Изменение заметки меняет версию заметок её автора."""
+    bump_notes_version(instance.author_id)
+
+
+@receiver(post_save, sender=Note)
+def note_saved(sender, instance, created, using, **kwargs):
+    """Сохранённая заметка заменяет свою версию в поисковом индексе."""
+    index_note(instance, using, created)
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted(sender, instance, using, **kwargs):
+    unindex_note(instance.pk, using)
+
+
+@receiver(post_save, sender=Note)
+def note_saved_metric(sender, instance, created, **kwargs):
+    metrics.WRITES.inc(action='created' if created else 'updated')
+
+
+@receiver(post_delete, sender=Note)
+def note_deleted_metric(sender, instance, **kwargs):
+    metrics.WRITES.inc(action='deleted')
+
+
+@receiver((post_save, post_delete), sender=settings.AUTH_USER_MODEL)
+def user_changed(sender, instance, **kwargs):
+    """Изменённый пользователь больше не берётся из кэша."""
+    auth.forget_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def user_left(sender, user, **kwargs):
+    if user is not None:
+        auth.forget_user(user.pk)
@@ -0,0 +1,76 @@
+"""Построение и выбор свободного slug для заметки."""
+from functools import lru_cache
+
+from pytils.translit import slugify as translit_slugify
+
+from .metrics import FuncCounter, registry
+
+# Без заголовка, из которого получился бы slug, заметка получает этот.
+DEFAULT_SLUG = 'note'
+# Сколько последних заголовков помнит кэш транслитерации.
+SLUGIFY_CACHE_SIZE = 4096
+# Длина самого длинного суффикса вида -123, под который
+# укорачивается основа slug.
+MAX_SUFFIX_LENGTH = 8
+
+
+@lru_cache(maxsize=SLUGIFY_CACHE_SIZE)
+def slugify(title):
+    """
+    Транслитерация pytils с кэшем.
+
+    Транслитерация заметно дороже поиска в словаре, а одинаковые
+    заголовки повторяются, особенно при массовом импорте.
+    """
+    return translit_slugify(title)
+
+
+def slugify_cache_stats():
+    """Попадания и промахи кэша транслитерации для мониторинга."""
+    info = slugify.cache_info()
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'max_size': info.maxsize,
+    }
+
+
+def slugify_cache_requests():
+    stats = slugify_cache_stats()
+    return {('hit',): stats['hits'], ('miss',): stats['misses']}
+
+
+SLUGIFY_CACHE_REQUESTS = registry.register(FuncCounter(
+    'notes_slugify_cache_requests_total',
+    'Обращения к кэшу транслитерации slug: попадания и промахи.',
+    ('result',), slugify_cache_requests,
+))
+
+
+def is_slug_conflict(error):
+    """Ошибка IntegrityError вызвана нарушением уникальности slug."""
+    return 'slug' in str(error)
+
+
+def slug_prefix(base, max_length):
+    """Общее начало всех вариантов base с суффиксами."""
+    return base[:max_length - MAX_SUFFIX_LENGTH]
+
+
+def next_free_slug(base, taken, max_length, start=2):
+    """
+    Первый свободный из вариантов base, base-2, base-3…
+
+    start — номер, с которого проверяются суффиксы, если известно,
+    что меньшие уже заняты.
+    """
+    if base not in taken:
+        return base
+    number = start
+    while True:
+        suffix = f'-{number}'
+        candidate = base[:max_length - len(suffix)] + suffix
+        if candidate not in taken:
+            return candidate
+        number += 1
@@ -0,0 +1,134 @@
+from http import HTTPStatus
+
+from asgiref.sync import async_to_sync
+from django.core.asgi import ASGIHandler
+from django.core.signals import request_finished, request_started
+from django.db import close_old_connections
+from django.test import AsyncClient, Client, TestCase, override_settings
+from django.urls import include, path, reverse
+
+from notes.factories import create_users
+from notes.middleware import QueryBudgetExceeded
+from notes.models import Note
+from yanote.urls import auth_urls
+
+from .constants import URL
+
+# Адреса те же, что и в синхронных тестах: notes.async_urls подменяет
+# только представления.
+urlpatterns = [
+    path('', include('notes.async_urls')),
+    path('auth/', include(auth_urls)),
+]
+
+
+def asgi_get(path, query='', cookies=None):
+    """
+    GET настоящим ASGI-обработчиком Django.
+
+    В отличие от AsyncClient, он перебирает потоковый ответ в цикле
+    событий, как под uvicorn. Соединение теста, как и тестовый клиент,
+    не закрываем.
+    """
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    headers = [(b'host', b'testserver')]
+    if cookies:
+        headers.append((b'cookie', cookies.output(
+            attrs=(), header='', sep='; '
+        ).strip().encode()))
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path,
+        'query_string': query.encode(), 'headers': headers,
+    }
+    request_started.disconnect(close_old_connections)
+    request_finished.disconnect(close_old_connections)
+    try:
+        async_to_sync(ASGIHandler())(scope, receive, send)
+    finally:
+        request_started.connect(close_old_connections)
+        request_finished.connect(close_old_connections)
+    body = b''.join(message.get('body', b'') for message in messages)
+    return messages[0]['status'], body
+
+
+@override_settings(ROOT_URLCONF=__name__, NOTES_COUNT_ON_LIST_PAGE=2)
+class TestAsyncNotesList(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, = create_users(1)
+        cls.notes = [
+            Note.objects.create(
+                title=f'Заметка {index}', text='Текст', author=cls.author
+            )
+            for index in range(3)
+        ]
+
+    def setUp(self):
+        self.async_client.force_login(self.author)
+
+    async def test_pages(self):
+        response = await self.async_client.get(URL.list)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(
+            list(response.context['object_list']), self.notes[:2]
+        )
+        cursor = response.context['next_cursor']
+        # Параметры адреса AsyncClient в Django 3.2 теряет, их передаём
+        # в самом адресе.
+        response = await self.async_client.get(f'{URL.list}?after={cursor}')
+        self.assertEqual(
+            list(response.context['object_list']), self.notes[2:]
+        )
+
+    async def test_not_modified(self):
+        etag = (await self.async_client.get(URL.list))['ETag']
+        # Дополнительные аргументы AsyncClient в Django 3.2 — это заголовки.
+        response = await self.async_client.get(
+            URL.list, **{'If-None-Match': etag}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    async def test_anonymous_redirected(self):
+        response = await AsyncClient().get(URL.list)
+        self.assertRedirects(
+            response, f'{URL.login}?next={URL.list}',
+            fetch_redirect_response=False,
+        )
+
+    async def test_invalid_cursor(self):
+        response = await self.async_client.get(f'{URL.list}?after=abc')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    async def test_query_budget(self):
+        """Запросы асинхронной страницы учитываются в бюджете."""
+        with self.settings(QUERY_BUDGETS={'notes:list': 0}):
+            with self.assertRaises(QueryBudgetExceeded):
+                await self.async_client.get(URL.list)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestAsgiExport(TestCase):
+
+    def test_export_under_asgi(self):
+        author, = create_users(1)
+        note = Note.objects.create(
+            title='Заметка', text='Текст', author=author
+        )
+        client = Client()
+        client.force_login(author)
+        status, body = asgi_get(
+            reverse('notes:export'), 'format=csv', client.cookies
+        )
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertEqual(
+            body.decode().splitlines(),
+            ['title,text,slug', f'Заметка,Текст,{note.slug}'],
+        )
@@ -0,0 +1,48 @@
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from notes.factories import create_users
+
+from .constants import URL
+
+
+class TestCachedAuth(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, = create_users(1)
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def queries(self, table):
+        with CaptureQueriesContext(connection) as context:
+            self.author_client.get(URL.list)
+        return [
+            query for query in context.captured_queries
+            if query['sql'].startswith(f'SELECT "{table}"')
+        ]
+
+    def test_user_cached(self):
+        """Пользователь загружается из базы только при первом запросе."""
+        self.assertEqual(len(self.queries('auth_user')), 1)
+        self.assertEqual(self.queries('auth_user'), [])
+
+    def test_user_change_resets_cache(self):
+        self.author_client.get(URL.list)
+        self.author.username = 'Новое имя'
+        self.author.save()
+        response = self.author_client.get(URL.list)
+        self.assertEqual(response.context['user'].username, 'Новое имя')
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'
+    )
+    def test_signed_cookie_sessions(self):
+        """С сессией в cookie запрос обходится без чтения сессии."""
+        client = Client()
+        client.force_login(self.author)
+        self.author_client = client
+        self.assertEqual(self.queries('django_session'), [])
@@ -1,7 +1,13 @@
+import io
+from http import HTTPStatus
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+from notes.bulk import import_notes, read_rows
+from notes.cache import NOTES_VERSION_KEY, cache_stats, get_cache
+from notes.factories import create_users
 from notes.forms import NoteForm
 from notes.models import Note
 
@@ -89,3 +95,169 @@ class TestNoteModel(TestCase):
                 self.assertIn('object_list', response.context)
                 notes = response.context['object_list']
                 self.assertEqual(self.note in notes, notes_has_note)
+
+
+@override_settings(NOTES_COUNT_ON_LIST_PAGE=2)
+class TestNotesListPages(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, = create_users(1)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.notes = [
+            Note.objects.create(
+                title=f'Заметка {index}', text='Текст', author=cls.author
+            )
+            for index in range(3)
+        ]
+
+    def test_pages(self):
+        """Заметки листаются по курсору в порядке создания."""
+        response = self.author_client.get(URL.list)
+        self.assertEqual(
+            list(response.context['object_list']), self.notes[:2]
+        )
+        cursor = response.context['next_cursor']
+        response = self.author_client.get(URL.list, {'after': cursor})
+        self.assertEqual(
+            list(response.context['object_list']), self.notes[2:]
+        )
+        self.assertIsNone(response.context['next_cursor'])
+
+    def test_text_not_loaded(self):
+        """Тексты заметок для списка не загружаются."""
+        response = self.author_client.get(URL.list)
+        for note in response.context['object_list']:
+            self.assertIn('text', note.get_deferred_fields())
+
+    def test_invalid_cursor(self):
+        response = self.author_client.get(URL.list, {'after': 'abc'})
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_cursor_out_of_range(self):
+        """Курсор вне диапазона id базы даёт 404, а не ошибку сервера."""
+        for after in ('100000000000000000000', '-1'):
+            with self.subTest(after=after):
+                response = self.author_client.get(
+                    URL.list, {'after': after}
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_FOUND
+                )
+
+
+class TestConditionalGet(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, = create_users(1)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='note-slug',
+            author=cls.author,
+        )
+
+    def test_not_modified(self):
+        """Клиент с актуальным ETag получает 304 без тела."""
+        for url in (URL.list, URL.detail):
+            with self.subTest(url=url):
+                etag = self.author_client.get(url)['ETag']
+                response = self.author_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.NOT_MODIFIED
+                )
+                self.assertEqual(response.content, b'')
+
+    def test_etag_changes_after_edit(self):
+        """После изменения заметки старый ETag больше не подходит."""
+        etag = self.author_client.get(URL.list)['ETag']
+        self.note.title = 'Новый заголовок'
+        self.note.save()
+        response = self.author_client.get(URL.list, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class TestNotesCache(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, = create_users(1)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='note-slug',
+            author=cls.author,
+        )
+
+    def warm_up(self):
+        for url in (URL.list, URL.detail):
+            self.author_client.get(url)
+
+    def titles(self):
+        response = self.author_client.get(URL.list)
+        return [note.title for note in response.context['object_list']]
+
+    def test_repeated_reads_from_cache(self):
+        """Повторные страницы обходятся без запросов заметок."""
+        self.warm_up()
+        for url in (URL.list, URL.detail):
+            with self.subTest(url=url):
+                # Только сессия: пользователь тоже берётся из кэша.
+                with self.assertNumQueries(1):
+                    self.author_client.get(url)
+        stats = cache_stats()
+        self.assertEqual(stats['page'], {
+            'hits': 1, 'misses': 1, 'hit_rate': 0.5
+        })
+        self.assertEqual(stats['note']['hits'], 1)
+
+    def test_writes_read_from_database(self):
+        """
+        Изменение не опирается на кэш: удалённая заметка не воскресает.
+
+        Удаление в другом процессе с кэшем в памяти выглядит здесь как
+        возврат прежнего штампа версии.
+        """
+        self.warm_up()
+        key = NOTES_VERSION_KEY.format(user_id=self.author.pk)
+        stamp = get_cache().get(key)
+        Note.objects.filter(pk=self.note.pk).delete()
+        get_cache().set(key, stamp, timeout=None)
+        response = self.author_client.post(URL.edit, data={
+            'title': 'Новый заголовок', 'text': 'Новый текст',
+            'slug': 'note-slug',
+        })
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertFalse(Note.objects.exists())
+
+    def test_no_stale_read_after_edit(self):
+        self.warm_up()
+        self.author_client.post(URL.edit, data={
+            'title': 'Новый заголовок', 'text': 'Новый текст',
+            'slug': 'note-slug',
+        })
+        response = self.author_client.get(URL.detail)
+        self.assertEqual(response.context['note'].text, 'Новый текст')
+        self.assertEqual(self.titles(), ['Новый заголовок'])
+
+    def test_no_stale_read_after_delete(self):
+        self.warm_up()
+        self.author_client.post(URL.delete)
+        response = self.author_client.get(URL.detail)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(self.titles(), [])
+
+    def test_no_stale_read_after_changes_outside_views(self):
+        """Изменения через ORM и массовый импорт тоже сбрасывают кэш."""
+        self.warm_up()
+        self.note.title = 'Изменён'
+        self.note.save()
+        self.assertEqual(self.titles(), ['Изменён'])
+        import_notes(self.author, read_rows(
+            io.StringIO('{"title": "Импорт", "text": "Текст"}\n'), 'jsonl'
+        ))
+        self.assertEqual(self.titles(), ['Изменён', 'Импорт'])
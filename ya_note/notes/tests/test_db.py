@@ -0,0 +1,45 @@
+from unittest import mock, skipIf
+
+from django.db import connection
+from django.test import TestCase
+
+from notes.db import check_connections
+
+
+@skipIf(connection.vendor != 'sqlite', 'Прагмы SQLite.')
+class TestSqlitePragmas(TestCase):
+
+    def test_pragmas(self):
+        """Соединение с тестовой базой в файле открыто в режиме WAL."""
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+
+class TestConnectionHealthCheck(TestCase):
+
+    def test_only_broken_connection_closed(self):
+        connection.ensure_connection()
+        for usable, closed in ((True, False), (False, True)):
+            with self.subTest(usable=usable):
+                connection.health_checked_at = 0
+                with mock.patch.dict(
+                    connection.settings_dict, CONN_MAX_AGE=60
+                ), mock.patch.object(
+                    connection, 'is_usable', return_value=usable
+                ), mock.patch.object(connection, 'close') as close:
+                    check_connections(sender=None)
+                self.assertEqual(close.called, closed)
+
+    def test_recently_checked_connection_not_pinged(self):
+        """Между проверками запросы не платят за неё походом в базу."""
+        connection.ensure_connection()
+        connection.health_checked_at = 0
+        with mock.patch.dict(
+            connection.settings_dict, CONN_MAX_AGE=60
+        ), mock.patch.object(connection, 'is_usable') as is_usable:
+            check_connections(sender=None)
+            check_connections(sender=None)
+        self.assertEqual(is_usable.call_count, 1)
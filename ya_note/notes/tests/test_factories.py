@@ -0,0 +1,71 @@
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from notes.factories import create_notes, create_users
+from notes.models import Note
+from notes.search import search_notes
+
+from .constants import URL
+
+
+class TestFactories(TestCase):
+    NOTES = 300
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = create_users(3)
+        cls.notes = create_notes(cls.NOTES, cls.users)
+
+    def test_datasets_are_deterministic(self):
+        """Фабрики дают одинаковые данные и ключи как в базе."""
+        self.assertEqual(
+            [user.username for user in self.users],
+            ['Пользователь 0', 'Пользователь 1', 'Пользователь 2'],
+        )
+        self.assertFalse(self.users[0].has_usable_password())
+        self.assertEqual(
+            list(Note.objects.order_by('pk').values_list(
+                'pk', 'title', 'slug', 'author'
+            )),
+            [
+                (note.pk, note.title, note.slug, note.author_id)
+                for note in self.notes
+            ],
+        )
+        self.assertEqual(self.notes[4].slug, 'note-4')
+        self.assertEqual(self.notes[4].author_id, self.users[1].pk)
+
+    def test_search_and_cache_updated(self):
+        """Заметки находятся поиском и видны в уже открытом списке."""
+        reader = create_users(1, 'Читатель {number}')[0]
+        client = Client()
+        client.force_login(reader)
+        client.get(URL.list)
+        create_notes(1, [reader], offset=self.NOTES)
+        response = client.get(URL.list)
+        self.assertEqual(
+            [note.slug for note in response.context['object_list']],
+            [f'note-{self.NOTES}'],
+        )
+        self.assertEqual(
+            len(search_notes(
+                self.users[0], 'заметка', per_page=self.NOTES
+            ).object_list),
+            len(self.notes[::3]),
+        )
+
+    def test_rows_inserted_in_batches(self):
+        """Записи вставляются пачками по лимиту базы, а не по одной."""
+        with CaptureQueriesContext(connection) as captured:
+            notes = create_notes(self.NOTES, self.users, slug='more-{number}')
+        fields = [
+            field for field in Note._meta.concrete_fields
+            if not field.primary_key
+        ]
+        batch = connection.ops.bulk_batch_size(fields, notes)
+        inserts = [
+            query for query in captured
+            if query['sql'].startswith('INSERT INTO "notes_note"')
+        ]
+        self.assertEqual(len(inserts), -(-self.NOTES // batch))
@@ -1,17 +1,26 @@
+import json
 from http import HTTPStatus
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread
 
-from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from pytils.translit import slugify
 
+from notes.bulk import IMPORT_BATCH_SIZE
+from notes.factories import create_users
 from notes.forms import WARNING
 from notes.models import Note
+from notes.slugs import slugify as cached_slugify, slugify_cache_stats
 
 from .constants import URL
 
-User = get_user_model()
-
 
 class TestCommentCreation(TestCase):
     COMMENT_TITLE = 'Текст заголовка'
@@ -19,8 +28,7 @@ class TestCommentCreation(TestCase):
 
     @classmethod
     def setUpTestData(cls):
-        cls.author = User.objects.create(username='Первый автор')
-        cls.second_author = User.objects.create(username='Второй автор')
+        cls.author, cls.second_author = create_users(2, 'Автор {number}')
         cls.author_client = Client()
         cls.author_client.force_login(cls.author)
         cls.auth_author = Client()
@@ -97,10 +105,9 @@ class TestCommentEditDelete(TestCase):
 
     @classmethod
     def setUpTestData(cls):
-        cls.author = User.objects.create(username='Лев Толстой')
+        cls.author, cls.reader = create_users(2)
         cls.author_client = Client()
         cls.author_client.force_login(cls.author)
-        cls.reader = User.objects.create(username='Читатель')
         cls.reader_client = Client()
         cls.reader_client.force_login(cls.reader)
         cls.form_data = {
@@ -157,3 +164,189 @@ class TestCommentEditDelete(TestCase):
         self.assertEqual(self.note_author.slug, self.COMMENT_SLUG)
         self.assertEqual(self.note_author.title, self.COMMENT_TITLE)
         self.assertEqual(self.note_author.text, self.COMMENT_TEXT)
+
+
+class TestSlugAllocation(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, = create_users(1)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def test_same_title_gets_suffix(self):
+        """Заметки с одинаковым заголовком получают slug с суффиксами."""
+        for _ in range(3):
+            self.author_client.post(
+                URL.add, data={'title': 'Заголовок', 'text': 'Текст'}
+            )
+        base = slugify('Заголовок')
+        self.assertEqual(
+            sorted(Note.objects.values_list('slug', flat=True)),
+            [base, f'{base}-2', f'{base}-3'],
+        )
+
+    def test_slugify_cache(self):
+        """Повторная транслитерация заголовка берётся из кэша."""
+        title = 'Заголовок для кэша'
+        cached_slugify(title)
+        hits = slugify_cache_stats()['hits']
+        self.assertEqual(cached_slugify(title), slugify(title))
+        self.assertEqual(slugify_cache_stats()['hits'], hits + 1)
+
+    def test_create_is_single_insert(self):
+        """Создание заметки без конфликта — одна запись без проверок."""
+        with CaptureQueriesContext(connection) as queries:
+            self.author_client.post(
+                URL.add, data={'title': 'Заголовок', 'text': 'Текст'}
+            )
+        statements = [
+            query['sql'].split()[0] for query in queries.captured_queries
+            if '"notes_note"' in query['sql']
+        ]
+        self.assertEqual(statements, ['INSERT'])
+
+
+class TestConcurrentSlugAllocation(TransactionTestCase):
+    THREADS = 8
+    NOTES_PER_THREAD = 5
+
+    def test_concurrent_creates_do_not_collide(self):
+        """Параллельное создание заметок с одним заголовком не падает."""
+        author, = create_users(1)
+        errors = []
+
+        def create_notes():
+            try:
+                for _ in range(self.NOTES_PER_THREAD):
+                    Note.objects.create(
+                        title='Заголовок', text='Текст', author=author
+                    )
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [
+            Thread(target=create_notes) for _ in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(
+            len(set(slugs)), self.THREADS * self.NOTES_PER_THREAD
+        )
+
+
+class TestBulkImportExport(TestCase):
+    IMPORT_URL = reverse('notes:import')
+    EXPORT_URL = reverse('notes:export')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, = create_users(1, 'Автор')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        Note.objects.create(
+            title='Заголовок', text='Текст', slug='taken', author=cls.author
+        )
+
+    def upload(self, content, file_format):
+        return self.author_client.post(self.IMPORT_URL, data={
+            'file': SimpleUploadedFile(
+                f'notes.{file_format}', content.encode()
+            ),
+            'format': file_format,
+        })
+
+    def test_import_jsonl(self):
+        """Импорт JSON Lines подбирает slug и отклоняет занятые."""
+        lines = [
+            {'title': 'Заголовок', 'text': 'Один'},
+            {'title': 'Заголовок', 'text': 'Два'},
+            {'title': 'Свой', 'text': 'Три', 'slug': 'own'},
+            {'title': 'Занятый', 'text': 'Четыре', 'slug': 'taken'},
+            {'title': 'Без текста'},
+        ]
+        response = self.upload(
+            '\n'.join(json.dumps(line) for line in lines) + '\nне json',
+            'jsonl',
+        )
+        result = response.context['result']
+        self.assertEqual(result.created, 3)
+        self.assertEqual([line for line, _ in result.errors], [4, 5, 6])
+        self.assertEqual(
+            result.errors[0][1]['slug'][0]['code'], 'slug_conflict'
+        )
+        base = slugify('Заголовок')
+        self.assertEqual(
+            set(Note.objects.values_list('slug', flat=True)),
+            {'taken', base, f'{base}-2', 'own'},
+        )
+
+    def test_import_csv(self):
+        """Импорт CSV создаёт заметки автора."""
+        response = self.upload(
+            'title,text,slug\nЗаметка,"Текст, с запятой",\n', 'csv'
+        )
+        self.assertEqual(response.context['result'].created, 1)
+        note = Note.objects.get(title='Заметка')
+        self.assertEqual(note.text, 'Текст, с запятой')
+        self.assertEqual(note.author, self.author)
+
+    def test_import_csv_with_bom(self):
+        """BOM в начале CSV, как у файлов из Excel, не портит заголовок."""
+        response = self.upload(
+            '\ufefftitle,text,slug\nЗаметка,Текст,\n', 'csv'
+        )
+        self.assertEqual(response.context['result'].created, 1)
+        self.assertTrue(Note.objects.filter(title='Заметка').exists())
+
+    def test_import_rolled_back_on_decode_error(self):
+        """Файл, битый в середине, не оставляет импортированных заметок."""
+        lines = ''.join(
+            json.dumps({'title': f'Заметка {number}', 'text': 'Текст'}) + '\n'
+            for number in range(IMPORT_BATCH_SIZE * 2)
+        )
+        response = self.author_client.post(self.IMPORT_URL, data={
+            'file': SimpleUploadedFile(
+                'notes.jsonl', lines.encode() + b'\xff\n'
+            ),
+            'format': 'jsonl',
+        })
+        self.assertFormError(
+            response, 'form', 'file', 'Файл должен быть в кодировке UTF-8.'
+        )
+        self.assertEqual(Note.objects.count(), 1)
+
+    def test_export(self):
+        """Экспорт отдаёт заметки пользователя потоком."""
+        for file_format, expected in (
+            ('jsonl', '{"title": "Заголовок", "text": "Текст", '
+                      '"slug": "taken"}\n'),
+            ('csv', 'title,text,slug\r\nЗаголовок,Текст,taken\r\n'),
+        ):
+            with self.subTest(file_format=file_format):
+                response = self.author_client.get(
+                    self.EXPORT_URL, {'format': file_format}
+                )
+                self.assertEqual(
+                    b''.join(response.streaming_content).decode(), expected
+                )
+
+    def test_import_export_commands(self):
+        """Команды импорта и экспорта переносят заметки к другому автору."""
+        reader, = create_users(1, 'Читатель')
+        with TemporaryDirectory() as directory:
+            path = Path(directory) / 'notes.jsonl'
+            call_command('export_notes', 'Автор', output=path)
+            Note.objects.filter(author=self.author).delete()
+            call_command(
+                'import_notes', 'Читатель', path, stdout=StringIO()
+            )
+        imported = Note.objects.get()
+        self.assertEqual(imported.author, reader)
+        self.assertEqual(imported.slug, 'taken')
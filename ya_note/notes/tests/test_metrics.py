@@ -0,0 +1,150 @@
+import threading
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from notes.factories import create_notes, create_users
+from notes.metrics import (
+    CACHE_REQUESTS, CONTENT_TYPE, FORM_ERRORS, REQUEST_QUERIES, REQUESTS,
+    WRITES, Counter
+)
+from notes.slugs import SLUGIFY_CACHE_REQUESTS, slugify
+
+from .constants import URL
+
+SLUG_CONFLICT = ('NoteForm', 'slug', 'slug_conflict')
+
+
+def value(metric, key):
+    """Метрики общие на процесс, поэтому тесты сравнивают приросты."""
+    return metric.values().get(key, 0)
+
+
+class TestMetrics(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, = create_users(1)
+        cls.note, = create_notes(1, [cls.author], slug='note-slug')
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_endpoint_renders_metrics(self):
+        self.author_client.get(URL.list)
+        response = self.client.get('/metrics')
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE)
+        content = response.content.decode()
+        self.assertIn('# TYPE notes_note_writes_total counter', content)
+        self.assertIn(
+            'http_request_duration_seconds_bucket{view="notes:list",'
+            'method="GET",le="+Inf"}', content
+        )
+
+    def test_request_observed(self):
+        key = ('notes:list', 'GET', '200')
+        before = value(REQUESTS, key)
+        queries = REQUEST_QUERIES.values().get(('notes:list',))
+        self.author_client.get(URL.list)
+        self.assertEqual(value(REQUESTS, key), before + 1)
+        self.assertEqual(
+            REQUEST_QUERIES.values()[('notes:list',)][-1],
+            (queries[-1] if queries else 0) + 1,
+        )
+
+    def test_unknown_method_labelled_other(self):
+        before = value(REQUESTS, ('notes:list', 'other', '405'))
+        self.author_client.generic('BREW', URL.list)
+        self.assertEqual(
+            value(REQUESTS, ('notes:list', 'other', '405')), before + 1
+        )
+        self.assertFalse(
+            any(key[1] == 'BREW' for key in REQUESTS.values())
+        )
+
+    def test_cache_counted(self):
+        hits = value(CACHE_REQUESTS, ('note', 'hit'))
+        misses = value(CACHE_REQUESTS, ('note', 'miss'))
+        self.author_client.get(URL.detail)
+        self.author_client.get(URL.detail)
+        self.assertEqual(value(CACHE_REQUESTS, ('note', 'miss')), misses + 1)
+        self.assertEqual(value(CACHE_REQUESTS, ('note', 'hit')), hits + 1)
+
+    def test_slugify_cache_exported(self):
+        hits = value(SLUGIFY_CACHE_REQUESTS, ('hit',))
+        slugify('Заголовок для метрик')
+        slugify('Заголовок для метрик')
+        self.assertEqual(value(SLUGIFY_CACHE_REQUESTS, ('hit',)), hits + 1)
+        content = self.client.get('/metrics').content.decode()
+        self.assertIn(
+            '# TYPE notes_slugify_cache_requests_total counter', content
+        )
+        self.assertIn(
+            f'notes_slugify_cache_requests_total{{result="hit"}} {hits + 1}',
+            content,
+        )
+
+    def test_writes_counted(self):
+        created = value(WRITES, ('created',))
+        deleted = value(WRITES, ('deleted',))
+        self.author_client.post(URL.add, data={
+            'title': 'Заголовок', 'text': 'Текст', 'slug': 'new-slug',
+        })
+        self.author_client.post(URL.delete)
+        self.assertEqual(value(WRITES, ('created',)), created + 1)
+        self.assertEqual(value(WRITES, ('deleted',)), deleted + 1)
+
+    def test_slug_conflict_counted(self):
+        before = value(FORM_ERRORS, SLUG_CONFLICT)
+        self.author_client.post(URL.add, data={
+            'title': 'Заголовок', 'text': 'Текст', 'slug': self.note.slug,
+        })
+        self.assertEqual(value(FORM_ERRORS, SLUG_CONFLICT), before + 1)
+
+    def test_import_counted(self):
+        created = value(WRITES, ('created',))
+        conflicts = value(FORM_ERRORS, SLUG_CONFLICT)
+        lines = (
+            '{"title": "Первая", "text": "Текст", "slug": "first"}\n'
+            '{"title": "Вторая", "text": "Текст", "slug": "note-slug"}\n'
+        )
+        self.author_client.post(reverse('notes:import'), data={
+            'file': SimpleUploadedFile('notes.jsonl', lines.encode()),
+            'format': 'jsonl',
+        })
+        self.assertEqual(value(WRITES, ('created',)), created + 1)
+        self.assertEqual(value(FORM_ERRORS, SLUG_CONFLICT), conflicts + 1)
+
+    def test_thread_shards_summed(self):
+        counter = Counter('test_total', 'Проверка.', ('kind',))
+
+        def work():
+            for _ in range(100):
+                counter.inc(kind='a')
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.values(), {('a',): 400})
+        self.assertEqual(
+            list(counter.samples()), ['test_total{kind="a"} 400']
+        )
+
+    def test_finished_thread_shards_merged(self):
+        counter = Counter('test_total', 'Проверка.', ('kind',))
+
+        def work():
+            counter.inc(kind='a')
+
+        for _ in range(10):
+            thread = threading.Thread(target=work)
+            thread.start()
+            thread.join()
+        # Копии завершившихся потоков перенесены в общую.
+        self.assertFalse(counter._shards)
+        counter.inc(kind='a')
+        self.assertEqual(counter.values(), {('a',): 11})
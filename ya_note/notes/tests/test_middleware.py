@@ -0,0 +1,32 @@
+from django.test import Client, TestCase, override_settings
+
+from notes.factories import create_users
+from notes.middleware import QueryBudgetExceeded
+
+from .constants import URL
+
+
+class TestQueryBudget(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, = create_users(1)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    @override_settings(QUERY_BUDGETS={'notes:list': 0})
+    def test_over_budget_request_fails(self):
+        """Превышение бюджета запросов роняет запрос в тестах."""
+        with self.assertRaises(QueryBudgetExceeded):
+            self.author_client.get(URL.list)
+
+    @override_settings(
+        QUERY_BUDGET_MODE='warn', QUERY_BUDGETS={'notes:list': 0}
+    )
+    def test_over_budget_request_logged(self):
+        """В режиме разработки превышение бюджета только логируется."""
+        with self.assertLogs('notes.middleware', 'WARNING') as logs:
+            self.author_client.get(URL.list)
+        self.assertEqual(
+            logs.records[0].query_budget['url_name'], 'notes:list'
+        )
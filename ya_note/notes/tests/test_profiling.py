@@ -0,0 +1,54 @@
+import pstats
+import re
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.test import Client, TestCase, override_settings
+
+from notes.factories import create_notes, create_users
+
+from .constants import URL
+
+METRIC = re.compile(r'(\w+);dur=([\d.]+)')
+
+
+@override_settings(PROFILING=True, PROFILING_SAMPLE_RATE=0)
+class TestProfiling(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, = create_users(1)
+        create_notes(5, [cls.author])
+
+    def setUp(self):
+        # Набор middleware клиент собирает при первом запросе.
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_server_timing_phases(self):
+        response = self.author_client.get(URL.list)
+        timing = {
+            name: float(duration) for name, duration
+            in METRIC.findall(response['Server-Timing'])
+        }
+        self.assertEqual(set(timing), {'db', 'tpl', 'view', 'mw', 'total'})
+        self.assertGreater(timing['db'], 0)
+        self.assertGreater(timing['tpl'], 0)
+
+    @override_settings(PROFILING=False)
+    def test_disabled(self):
+        self.assertNotIn(
+            'Server-Timing', self.author_client.get(URL.list)
+        )
+
+    def test_sampled_request_profiled(self):
+        with TemporaryDirectory() as directory:
+            with self.settings(
+                PROFILING_SAMPLE_RATE=1, PROFILING_DIR=directory
+            ):
+                self.author_client.get(URL.list)
+            dump, = Path(directory).glob('*-notes-list-*.prof')
+            stats = pstats.Stats(str(dump))
+        self.assertTrue(any(
+            function == 'get' for _, _, function in stats.stats
+        ))
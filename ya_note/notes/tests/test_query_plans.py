@@ -0,0 +1,51 @@
+import re
+from unittest import skipIf
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from notes.factories import create_users
+from notes.models import Note
+
+from .constants import FIELD_DATA, FIELD_NAMES, URL
+
+# SQLite до 3.36 пишет «SCAN TABLE x» и «SCAN TABLE x AS y», новые —
+# «SCAN x».
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+@skipIf(connection.vendor != 'sqlite', 'План запроса SQLite.')
+class TestQueryPlans(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, = create_users(1)
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        Note.objects.create(
+            **dict(zip(FIELD_NAMES, (*FIELD_DATA, cls.author)))
+        )
+
+    def full_scans(self, captured_queries):
+        """Возвращает запросы, план которых содержит полный обход таблицы."""
+        scans = []
+        with connection.cursor() as cursor:
+            for query in captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                for row in cursor.fetchall():
+                    if FULL_SCAN.match(row[-1]):
+                        scans.append((query['sql'], row[-1]))
+        return scans
+
+    def test_views_use_indexes(self):
+        """Запросы страниц заметок не обходят таблицы целиком."""
+        for url in (URL.list, URL.detail, URL.edit, URL.delete):
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    self.author_client.get(url)
+                self.assertEqual(
+                    self.full_scans(queries.captured_queries), []
+                )
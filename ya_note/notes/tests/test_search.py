@@ -0,0 +1,126 @@
+import io
+import json
+from http import HTTPStatus
+from unittest import mock
+
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from notes.bulk import SLUG_QUERY_CHUNK, import_notes, read_rows
+from notes.factories import create_users
+from notes.models import Note
+from notes.search import query_terms, search_notes
+
+
+class TestSearch(TestCase):
+    URL = reverse('notes:search')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author, cls.reader = create_users(2)
+        cls.note = Note.objects.create(
+            title='Зелёная ёлка',
+            text='Купили новые игрушки и <b>гирлянду</b>.',
+            author=cls.author,
+        )
+        Note.objects.create(
+            title='Чужая ёлка', text='Игрушки.', author=cls.reader
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def found(self, query, author=None):
+        page = search_notes(author or self.author, query)
+        return [note.pk for note in page.object_list]
+
+    def test_query_terms(self):
+        self.assertEqual(
+            query_terms('Ёлками, ЁЛКИ и ель!'), ['елк', 'ель']
+        )
+
+    def test_word_forms(self):
+        """Находятся другие формы слов, «ё» не отличается от «е»."""
+        for query in ('ёлки', 'елками', 'игрушкам', 'зеленые гирлянды'):
+            with self.subTest(query=query):
+                self.assertEqual(self.found(query), [self.note.pk])
+
+    def test_only_own_notes(self):
+        self.assertEqual(self.found('елка', self.reader), [
+            Note.objects.get(author=self.reader).pk
+        ])
+        self.assertEqual(self.found('гирлянда', self.reader), [])
+
+    def test_highlight_is_escaped(self):
+        response = self.client.get(self.URL, {'q': 'гирлянду'})
+        note, = response.context['page'].object_list
+        self.assertIn('<mark>гирлянду</mark>', note.snippet)
+        self.assertIn('&lt;b&gt;', note.snippet)
+        self.assertNotIn('<b>', note.snippet)
+
+    def test_highlight_keeps_yo(self):
+        """Выдача показывает «ё» как в заметке, с «ё» и без в запросе."""
+        for query in ('зелёная ёлка', 'зеленая елка'):
+            with self.subTest(query=query):
+                note, = search_notes(self.author, query).object_list
+                self.assertEqual(
+                    note.title_html, '<mark>Зелёная</mark> <mark>ёлка</mark>'
+                )
+        Note.objects.create(
+            title='Ель', text='Зеленая хвоя.', author=self.author
+        )
+        note, = search_notes(self.author, 'зелёная хвоя').object_list
+        self.assertIn('<mark>Зеленая</mark>', note.snippet)
+
+    def test_index_follows_changes(self):
+        self.note.title = 'Сосна'
+        self.note.save()
+        self.assertEqual(self.found('ёлка'), [])
+        self.assertEqual(self.found('сосны'), [self.note.pk])
+        self.note.delete()
+        self.assertEqual(self.found('сосны'), [])
+
+    def test_bulk_import_is_indexed(self):
+        lines = io.StringIO('{"title": "Пальма", "text": "Тропики."}\n')
+        import_notes(self.author, read_rows(lines, 'jsonl'))
+        self.assertEqual(
+            self.found('пальмы'),
+            [Note.objects.get(title='Пальма').pk],
+        )
+
+    def test_large_batch_is_indexed(self):
+        """Пачка больше SLUG_QUERY_CHUNK попадает в индекс целиком."""
+        count = SLUG_QUERY_CHUNK * 2 + 1
+        lines = io.StringIO(''.join(
+            json.dumps({'title': f'Пальма {number}', 'text': 'Тропики.'})
+            + '\n'
+            for number in range(count)
+        ))
+        import_notes(self.author, read_rows(lines, 'jsonl'))
+        page = search_notes(self.author, 'тропики', per_page=count)
+        self.assertEqual(len(page.object_list), count)
+
+    def test_ranking_and_pages(self):
+        """Совпадение в заголовке выше, страницы листаются."""
+        in_text = Note.objects.create(
+            title='Праздник', text='Наряжаем ёлку.', author=self.author
+        )
+        first = search_notes(self.author, 'ёлка', per_page=1)
+        self.assertEqual([n.pk for n in first.object_list], [self.note.pk])
+        self.assertTrue(first.has_next)
+        second = search_notes(self.author, 'ёлка', page=2, per_page=1)
+        self.assertEqual([n.pk for n in second.object_list], [in_text.pk])
+        self.assertFalse(second.has_next)
+
+    def test_invalid_page(self):
+        for page in ('abc', '0', '1000'):
+            with self.subTest(page=page):
+                response = self.client.get(
+                    self.URL, {'q': 'ёлка', 'page': page}
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_fallback_without_fts(self):
+        with mock.patch('notes.search.fts_enabled', return_value=False):
+            self.assertEqual(self.found('игрушк'), [self.note.pk])
@@ -1,9 +1,54 @@
+import hashlib
+import io
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError
+from django.http import (
+    Http404, HttpResponseBadRequest, HttpResponseRedirect,
+    StreamingHttpResponse
+)
 from django.urls import reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
-from .forms import NoteForm
+from .bulk import (
+    FORMATS, IMPORT_ENCODING, export_notes, import_notes, read_rows
+)
+from . import cache
+from .forms import WARNING, NoteForm, NoteImportForm, SearchForm
 from .models import Note
+from .search import parse_page, search_notes
+from .slugs import is_slug_conflict
+
+# Наибольший id, который база принимает в запросе (INTEGER в SQLite
+# и bigint в PostgreSQL).
+MAX_ID = 2 ** 63 - 1
+
+
+def notes_etag(request, *args, **kwargs):
+    """Валидатор ETag: адрес, пользователь и версия его заметок."""
+    user_id = request.user.pk
+    version = cache.notes_version(user_id)
+    key = f'{request.get_full_path()}:{user_id}:{version}'
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def streaming_response(request, chunks, **kwargs):
+    """
+    Потоковый ответ из chunks.
+
+    Под ASGI Django 3.2 перебирает потоковый ответ в цикле событий, где
+    обращаться к базе нельзя. Поэтому там chunks собираются заранее,
+    ещё в потоке представления, и поток с постоянной памятью остаётся
+    только под WSGI.
+    """
+    if isinstance(request, ASGIRequest):
+        chunks = list(chunks)
+    return StreamingHttpResponse(chunks, **kwargs)
 
 
 class Home(generic.TemplateView):
@@ -25,6 +70,19 @@ class NoteBase(LoginRequiredMixin):
         """Пользователь может работать только со своими заметками."""
         return self.model.objects.filter(author=self.request.user)
 
+    def form_valid(self, form):
+        """Занятый slug ловим по ограничению уникальности при записи."""
+        try:
+            self.object = form.save()
+        except IntegrityError as error:
+            if not is_slug_conflict(error):
+                raise
+            form.add_error('slug', ValidationError(
+                form.instance.slug + WARNING, code='slug_conflict'
+            ))
+            return self.form_invalid(form)
+        return HttpResponseRedirect(self.get_success_url())
+
 
 class NoteCreate(NoteBase, generic.CreateView):
     """Добавление заметки."""
@@ -32,9 +90,7 @@ class NoteCreate(NoteBase, generic.CreateView):
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
@@ -49,11 +105,122 @@ class NoteDelete(NoteBase, generic.DeleteView):
     template_name = 'notes/delete.html'
 
 
+@method_decorator(condition(etag_func=notes_etag), name='get')
 class NotesList(NoteBase, generic.ListView):
     """Список всех заметок пользователя."""
     template_name = 'notes/list.html'
 
-
+    def get_queryset(self):
+        """
+        Выводим страницу заметок после курсора ?after= — id заметки.
+
+        Шаблону нужны только id, slug и заголовок, тексты заметок
+        не загружаем. Размер страницы определяется в настройках проекта,
+        готовые страницы берутся из кэша заметок пользователя.
+        """
+        after = self.request.GET.get('after', 0)
+        try:
+            after = int(after)
+        except ValueError:
+            raise Http404('Некорректный курсор страницы.')
+        if not 0 <= after <= MAX_ID:
+            raise Http404('Некорректный курсор страницы.')
+        notes, self.next_cursor = cache.notes_page(
+            self.request.user.pk, after, lambda: self.load_page(after)
+        )
+        return notes
+
+    def load_page(self, after):
+        queryset = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).filter(id__gt=after).order_by('id')
+        per_page = settings.NOTES_COUNT_ON_LIST_PAGE
+        notes = list(queryset[:per_page + 1])
+        next_cursor = (
+            notes[per_page - 1].id if len(notes) > per_page else None
+        )
+        return notes[:per_page], next_cursor
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.next_cursor
+        return context
+
+
+@method_decorator(condition(etag_func=notes_etag), name='get')
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+    def get_object(self, queryset=None):
+        """
+        Заметку берём из кэша заметок пользователя.
+
+        Только здесь: изменение и удаление читают заметку из базы,
+        иначе запись по устаревшей копии из кэша вернула бы удалённую
+        заметку.
+        """
+        return cache.note(
+            self.request.user.pk,
+            self.kwargs[self.slug_url_kwarg],
+            lambda: super(NoteDetail, self).get_object(queryset),
+        )
+
+
+class NoteSearch(LoginRequiredMixin, generic.TemplateView):
+    """Поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = SearchForm(self.request.GET)
+        query = form.cleaned_data['q'] if form.is_valid() else ''
+        context['form'] = form
+        context['query'] = query
+        context['page'] = search_notes(
+            self.request.user, query, parse_page(self.request.GET.get('page'))
+        )
+        return context
+
+
+class NoteImport(LoginRequiredMixin, generic.FormView):
+    """Массовый импорт заметок из файла."""
+    template_name = 'notes/import.html'
+    form_class = NoteImportForm
+
+    def form_valid(self, form):
+        lines = io.TextIOWrapper(
+            form.cleaned_data['file'].file, encoding=IMPORT_ENCODING,
+            newline='',
+        )
+        try:
+            result = import_notes(
+                self.request.user,
+                read_rows(lines, form.cleaned_data['format']),
+            )
+        except UnicodeDecodeError:
+            form.add_error('file', 'Файл должен быть в кодировке UTF-8.')
+            return self.form_invalid(form)
+        return self.render_to_response(
+            self.get_context_data(form=form, result=result)
+        )
+
+
+class NoteExport(LoginRequiredMixin, generic.View):
+    """Выгрузка всех заметок пользователя файлом."""
+
+    def get(self, request):
+        file_format = request.GET.get('format', 'jsonl')
+        if file_format not in FORMATS:
+            return HttpResponseBadRequest('Неизвестный формат выгрузки.')
+        response = streaming_response(
+            request,
+            export_notes(request.user, file_format),
+            content_type=(
+                'text/csv' if file_format == 'csv' else 'application/jsonl'
+            ),
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="notes.{file_format}"'
+        )
+        return response
@@ -1,5 +1,7 @@
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -22,6 +24,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'notes.metrics.MetricsMiddleware',
+    'notes.profiling.ProfilingMiddleware',
+    'notes.middleware.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -51,14 +56,119 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Асинхронные варианты страниц для чтения (notes.async_urls).
+# Включаются в yanote.asgi, под WSGI от них проку нет.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS') == '1'
+
+
+# Профиль базы данных задаётся окружением: DB_ENGINE=sqlite
+# (по умолчанию) или DB_ENGINE=postgresql.
+DB_ENGINE = os.getenv('DB_ENGINE', 'sqlite')
+# Постоянные соединения перед запросом проверяются на живость (notes.db).
+DB_HEALTH_CHECKS = os.getenv('DB_HEALTH_CHECKS', '1') == '1'
+# Не чаще раза в столько секунд на соединение.
+DB_HEALTH_CHECK_INTERVAL = int(os.getenv('DB_HEALTH_CHECK_INTERVAL', '30'))
+# Прагмы SQLite для конкурентной работы, выставляются при открытии
+# каждого соединения (notes.db). SQLITE_TUNING=0 их отключает.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 128 * 2**20,
+} if os.getenv('SQLITE_TUNING', '1') == '1' else {}
+
+if DB_ENGINE == 'postgresql':
+    # За PgBouncer в режиме транзакций серверные курсоры не работают.
+    DB_POOLER = os.getenv('DB_POOLER')
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'yanote'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+            'DISABLE_SERVER_SIDE_CURSORS': DB_POOLER == 'pgbouncer',
+            'OPTIONS': {'connect_timeout': 5},
+        }
     }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '0')),
+            # Тестовая база в файле, а не в памяти: в памяти SQLite
+            # не даёт писать из нескольких потоков, а тесты конкурентного
+            # создания заметок проверяют именно это.
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'Неизвестный DB_ENGINE: {DB_ENGINE}.')
+
+# Кэш default хранит штампы версий и заметки пользователей (notes.cache)
+# и сессии cached_db. Штампы меняются в том процессе, где изменили
+# заметку, поэтому при нескольких процессах веб-сервера кэш должен быть
+# общим, например CACHE_BACKEND=django.core.cache.backends.memcached.
+# PyMemcacheCache и CACHE_LOCATION=127.0.0.1:11211.
+CACHE_BACKEND = os.getenv(
+    'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+)
+# Число процессов веб-сервера; эту переменную читают gunicorn и uvicorn.
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+if WEB_CONCURRENCY > 1 and CACHE_BACKEND.endswith('.LocMemCache'):
+    raise ImproperlyConfigured(
+        'При WEB_CONCURRENCY > 1 кэш заметок должен быть общим для '
+        'процессов: задайте CACHE_BACKEND и CACHE_LOCATION.'
+    )
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+    # Кэш пользователей для request.user (notes.auth), свой в каждом
+    # процессе.
+    'users': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'users',
+    },
 }
 
+# Хранилище сессий: db, cached_db (сессия читается из кэша default,
+# база — на случай промаха) или signed_cookies (сессия в подписанной
+# cookie, без базы). cached_db с LocMemCache подходит только для одного
+# процесса: выход в одном процессе не сбросит сессию в кэше другого.
+SESSION_PROFILE = os.getenv('SESSION_PROFILE', 'db')
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+if SESSION_PROFILE not in SESSION_ENGINES:
+    raise ImproperlyConfigured(
+        f'Неизвестный SESSION_PROFILE: {SESSION_PROFILE}.'
+    )
+SESSION_ENGINE = SESSION_ENGINES[SESSION_PROFILE]
+
+AUTHENTICATION_BACKENDS = [
+    'notes.auth.CachedModelBackend',
+    # Сессии, созданные до кэша пользователей.
+    'django.contrib.auth.backends.ModelBackend',
+]
+USER_CACHE_ALIAS = 'users'
+# USER_CACHE_TIMEOUT=0 отключает кэш пользователей.
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', '60'))
+
+# Кэш, в котором хранятся штампы версий и заметки пользователей;
+# должен быть общим для всех процессов, см. CACHE_BACKEND.
+NOTES_CACHE_ALIAS = 'default'
+NOTES_CACHE_TIMEOUT = 300
+
+NOTES_COUNT_ON_LIST_PAGE = 100
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +197,25 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+# Разбивка времени запросов в заголовке Server-Timing и профили cProfile
+# доли запросов (notes.profiling).
+PROFILING = os.getenv('PROFILING') == '1'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_DIR = os.getenv('PROFILING_DIR', BASE_DIR / 'profiles')
+
+# Бюджет SQL-запросов на один HTTP-запрос по имени URL.
+QUERY_BUDGET_MODE = 'warn' if DEBUG else None
+QUERY_BUDGET_REPEAT_THRESHOLD = 3
+QUERY_BUDGETS = {
+    'notes:home': 2,
+    'notes:list': 3,
+    'notes:detail': 3,
+    'notes:add': 6,
+    'notes:edit': 6,
+    'notes:delete': 5,
+    'notes:success': 2,
+    'notes:search': 3,
+    # Импорт вставляет заметки пачками, число запросов растёт с файлом.
+    'notes:import': None,
+}